@@ -0,0 +1,283 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from src import reports, services
+from src.store import TransactionStore
+from src.synthetic import XLSX_MAX_ROWS, generate_transactions, write_statement
+from src.utils import filter_transactions_by_date, load_transactions
+from src.views import events_page, home_page
+
+DEFAULT_SIZES = [10_000, 100_000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Разница меньше этого порога считается шумом измерения
+NOISE_FLOOR_S = 0.002
+
+Context = Dict[str, Any]
+Case = Tuple[str, Callable[[Context], Any], bool]
+
+
+def _clear_caches() -> None:
+    """
+    Сбрасывает кэши результатов, чтобы замер включал вычисление
+
+    Для DataFrame других кэшей нет: куб, отпечаток и поисковые
+    структуры строятся при каждом вызове. Производные структуры
+    TransactionStore (индекс периодов для home_page и events_page)
+    сохраняются, как у работающего сервера.
+    """
+    for module in (reports, services):
+        for value in vars(module).values():
+            cache_clear = getattr(value, "cache_clear", None)
+            if callable(cache_clear):
+                cache_clear()
+
+
+def _cases() -> List[Case]:
+    """Случаи замера: (имя, функция от контекста, нужен ли xlsx)"""
+    date_time = "2021-06-15 12:00:00"
+    return [
+        (
+            "load_transactions[xlsx]",
+            lambda c: load_transactions(c["path"], use_snapshot=False),
+            True,
+        ),
+        ("load_transactions[snapshot]", lambda c: load_transactions(c["path"]), True),
+        (
+            "filter_transactions_by_date[M]",
+            lambda c: filter_transactions_by_date(c["df"], date_time, "M"),
+            False,
+        ),
+        (
+            "filter_transactions_by_date[Y]",
+            lambda c: filter_transactions_by_date(c["df"], date_time, "Y"),
+            False,
+        ),
+        (
+            "spending_by_category",
+            lambda c: reports.spending_by_category(c["df"], "Супермаркеты"),
+            False,
+        ),
+        ("spending_by_weekday", lambda c: reports.spending_by_weekday(c["df"]), False),
+        ("spending_by_workday", lambda c: reports.spending_by_workday(c["df"]), False),
+        (
+            "profitable_cashback_categories",
+            lambda c: services.profitable_cashback_categories(c["df"], 2021, 6),
+            False,
+        ),
+        (
+            "cashback_top_by_month",
+            lambda c: services.cashback_top_by_month(c["df"], 3),
+            False,
+        ),
+        (
+            "investment_bank",
+            lambda c: services.investment_bank("2021-06", c["df"], 10),
+            False,
+        ),
+        (
+            "investment_savings",
+            lambda c: services.investment_savings(c["df"], [10, 50, 100], [5, 10]),
+            False,
+        ),
+        ("simple_search", lambda c: services.simple_search("магнит", c["df"]), False),
+        (
+            "batch_search",
+            lambda c: services.batch_search(["магнит", "такси", "ozon"], c["df"]),
+            False,
+        ),
+        ("phone_number_search", lambda c: services.phone_number_search(c["df"]), False),
+        (
+            "phone_transactions_search",
+            lambda c: services.phone_transactions_search(c["phone"], c["df"]),
+            False,
+        ),
+        ("phone_number_totals", lambda c: services.phone_number_totals(c["df"]), False),
+        (
+            "person_transfers_search",
+            lambda c: services.person_transfers_search(c["df"]),
+            False,
+        ),
+        ("home_page", lambda c: home_page(date_time, c["store"]), False),
+        ("events_page", lambda c: events_page(date_time, c["store"]), False),
+    ]
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """
+    Замеряет время и пиковую память вызова
+
+    Время - по repeat запускам без трассировки памяти, пик памяти -
+    отдельным запуском под tracemalloc.
+
+    Returns:
+        {'median_s', 'min_s', 'peak_mb'}
+    """
+    timings = []
+    for _ in range(repeat):
+        _clear_caches()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_s": round(statistics.median(timings), 6),
+        "min_s": round(min(timings), 6),
+        "peak_mb": round(peak / 2**20, 3),
+    }
+
+
+def _context(rows: int, workdir: str, max_xlsx_rows: int, seed: int) -> Context:
+    df = generate_transactions(rows, seed=seed)
+    phones = df["Номер телефона"][df["Номер телефона"] != ""]
+    context: Context = {
+        "df": df,
+        "store": TransactionStore.from_frame(df),
+        "phone": phones.iloc[0] if len(phones) else "+70000000000",
+        "path": None,
+    }
+    if rows <= min(max_xlsx_rows, XLSX_MAX_ROWS):
+        path = os.path.join(workdir, f"statement_{rows}.xlsx")
+        write_statement(df, path)
+        context["path"] = path
+    return context
+
+
+def run(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    repeat: int = 3,
+    max_xlsx_rows: int = 100_000,
+    only: Optional[Sequence[str]] = None,
+    seed: int = 0,
+    log: Callable[[str], None] = print,
+) -> Dict[str, Any]:
+    """
+    Прогоняет набор замеров на синтетических данных
+
+    Args:
+        sizes: Размеры данных в строках
+        repeat: Количество запусков каждого случая
+        max_xlsx_rows: Наибольший размер, для которого пишется xlsx
+            (замеры загрузки для больших размеров пропускаются)
+        only: Имена случаев для запуска (None - все)
+        seed: Зерно генератора данных
+
+    Returns:
+        {'meta': {...}, 'results': {'случай@строки': замер}}
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Отчеты пишут файлы в текущий каталог
+        os.chdir(workdir)
+        try:
+            for rows in sizes:
+                context = _context(rows, workdir, max_xlsx_rows, seed)
+                for name, func, needs_file in _cases():
+                    if only and name not in only:
+                        continue
+                    if needs_file and context["path"] is None:
+                        continue
+                    stats = measure(lambda: func(context), repeat)
+                    results[f"{name}@{rows}"] = {"case": name, "rows": rows, **stats}
+                    log(
+                        f"{name:<34} {rows:>10} {stats['median_s'] * 1000:>10.2f} ms"
+                        f" {stats['peak_mb']:>9.2f} MB"
+                    )
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 1.5
+) -> List[str]:
+    """
+    Сравнивает результаты с базовыми
+
+    Замедлением считается медиана или пик памяти больше базовых
+    в tolerance раз (разницы по времени меньше NOISE_FLOOR_S не считаются).
+
+    Returns:
+        Описания регрессий (пустой список - регрессий нет)
+    """
+    regressions = []
+    for key, now in current["results"].items():
+        before = baseline.get("results", {}).get(key)
+        if before is None:
+            continue
+        slower = now["median_s"] - before["median_s"]
+        if now["median_s"] > before["median_s"] * tolerance and slower > NOISE_FLOOR_S:
+            regressions.append(
+                f"{key}: {before['median_s'] * 1000:.2f} ms -> "
+                f"{now['median_s'] * 1000:.2f} ms"
+            )
+        if now["peak_mb"] > before["peak_mb"] * tolerance and now["peak_mb"] > 1:
+            regressions.append(
+                f"{key}: {before['peak_mb']:.2f} MB -> {now['peak_mb']:.2f} MB"
+            )
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-xlsx-rows", type=int, default=100_000)
+    parser.add_argument("--only", nargs="+")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = run(args.sizes, args.repeat, args.max_xlsx_rows, args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Базовые результаты не найдены: {args.baseline}")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(result, json.load(f), args.tolerance)
+    for line in regressions:
+        print(f"РЕГРЕССИЯ {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
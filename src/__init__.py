@@ -1,28 +1,67 @@
-from .config import Config
-from .reports import (spending_by_category, spending_by_weekday,
-                      spending_by_workday)
-from .services import (investment_bank, person_transfers_search,
-                       phone_number_search, profitable_cashback_categories,
-                       simple_search)
-from .utils import (filter_transactions_by_date, get_currency_rates,
-                    get_greeting, get_stock_prices, load_transactions)
-from .views import events_page, home_page
-
-__all__ = [
-    "Config",
-    "load_transactions",
-    "filter_transactions_by_date",
-    "home_page",
-    "events_page",
-    "profitable_cashback_categories",
-    "investment_bank",
-    "simple_search",
-    "phone_number_search",
-    "person_transfers_search",
-    "spending_by_category",
-    "spending_by_weekday",
-    "spending_by_workday",
-    "get_greeting",
-    "get_currency_rates",
-    "get_stock_prices",
-]
+"""
+Анализ банковских транзакций
+
+Подмодули и их зависимости (pandas, python-dotenv, aiohttp) загружаются
+при первом обращении к имени пакета, поэтому `import src` дешев.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# Имя -> подмодуль, из которого оно берется
+_EXPORTS = {
+    "Config": "config",
+    "TransactionStore": "store",
+    "SQLiteStore": "sqlite_store",
+    "load_transactions": "utils",
+    "filter_transactions_by_date": "utils",
+    "home_page": "views",
+    "events_page": "views",
+    "profitable_cashback_categories": "services",
+    "investment_bank": "services",
+    "investment_savings": "services",
+    "simple_search": "services",
+    "batch_search": "services",
+    "cashback_top_by_month": "services",
+    "phone_number_search": "services",
+    "person_transfers_search": "services",
+    "spending_by_category": "reports",
+    "spending_by_weekday": "reports",
+    "spending_by_workday": "reports",
+    "spending_trends": "trends",
+    "get_greeting": "greeting",
+    "get_currency_rates": "utils",
+    "get_stock_prices": "utils",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .config import Config
+    from .greeting import get_greeting
+    from .reports import (spending_by_category, spending_by_weekday,
+                          spending_by_workday)
+    from .services import (batch_search, cashback_top_by_month,
+                           investment_bank, investment_savings,
+                           person_transfers_search, phone_number_search,
+                           profitable_cashback_categories, simple_search)
+    from .sqlite_store import SQLiteStore
+    from .store import TransactionStore
+    from .trends import spending_trends
+    from .utils import (filter_transactions_by_date, get_currency_rates,
+                        get_stock_prices, load_transactions)
+    from .views import events_page, home_page
@@ -0,0 +1,130 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 3
+BATCH_SIZE = 256
+
+
+class AuditWriter:
+    """
+    Фоновая запись отчетов в файл JSON Lines
+
+    Запись сериализуется в JSON сразу в write(): в очередь попадает
+    готовая строка, поэтому изменение объектов после вызова (например,
+    результата из кэша memoize) не меняет запись. Строки пишутся
+    отдельным потоком пачками за одно открытие файла. Когда файл
+    превышает max_bytes, он переименовывается в <имя>.1 (старые копии
+    сдвигаются до backup_count).
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = MAX_BYTES,
+        backup_count: int = BACKUP_COUNT,
+    ) -> None:
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name=f"audit-{os.path.basename(filename)}", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """Сериализует запись и ставит ее в очередь, не дожидаясь записи на диск"""
+        try:
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"Ошибка сериализации отчета для {self.filename}: {e}")
+            return
+        self._queue.put(line)
+
+    def flush(self) -> None:
+        """Ждет, пока все поставленные записи окажутся в файле"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Дописывает очередь и останавливает поток"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: List[str] = []
+            item = self._queue.get()
+            taken = 1
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+            while not stop and len(batch) < BATCH_SIZE:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+            try:
+                if batch:
+                    self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"Ошибка записи отчета в {self.filename}: {e}")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[str]) -> None:
+        with open(self.filename, "a", encoding="utf-8") as f:
+            f.write("".join(batch))
+        if os.path.getsize(self.filename) > self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        if self.backup_count <= 0:
+            os.remove(self.filename)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.filename}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.filename}.{i + 1}")
+        os.replace(self.filename, f"{self.filename}.1")
+
+
+_writers: Dict[str, AuditWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(filename: str) -> AuditWriter:
+    """Возвращает общий фоновый писатель для файла"""
+    with _writers_lock:
+        writer = _writers.get(filename)
+        if writer is None:
+            writer = AuditWriter(filename)
+            _writers[filename] = writer
+        return writer
+
+
+def flush_all() -> None:
+    """Дописывает очереди всех писателей"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush()
+
+
+atexit.register(flush_all)
@@ -0,0 +1,264 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from typing import (Any, Callable, Dict, Iterable, List, Optional, Sequence,
+                    TextIO, Union)
+
+import numpy as np
+from pandas import DataFrame
+
+from src import reports, services
+from src.config import Config
+from src.period_index import DATE_RANGES
+from src.search import engine_for, iter_frames_at, phone_index_for
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore
+from src.trends import DEFAULT_WINDOWS, TREND_KEYS, spending_trends
+from src.views import events_page, home_page
+
+CHUNK_SIZE = 10_000
+
+Source = Union[TransactionStore, SQLiteStore]
+
+
+class JsonOutput:
+    """
+    Потоковый вывод результатов
+
+    Строки таблиц пишутся частями по мере получения: в формате ndjson -
+    по объекту в строке, в формате json - элементами одного массива.
+    """
+
+    def __init__(self, stream: TextIO, fmt: str = "ndjson") -> None:
+        self.stream = stream
+        self.fmt = fmt
+
+    def value(self, value: Any) -> None:
+        """Выводит одно значение (словарь, число и т.п.)"""
+        indent = 2 if self.fmt == "json" else None
+        self.stream.write(
+            json.dumps(value, ensure_ascii=False, default=str, indent=indent) + "\n"
+        )
+
+    def rows(self, frames: Iterable[DataFrame], columns: Optional[List[str]]) -> int:
+        """
+        Выводит строки таблиц, не собирая их в один список
+
+        Returns:
+            Количество выведенных строк
+        """
+        count = 0
+        if self.fmt == "json":
+            self.stream.write("[")
+        for frame in frames:
+            if columns:
+                frame = frame[[c for c in columns if c in frame.columns]]
+            if frame.empty:
+                continue
+            lines = frame.to_json(
+                orient="records",
+                lines=True,
+                force_ascii=False,
+                date_format="iso",
+            ).rstrip("\n")
+            if self.fmt == "json":
+                if count:
+                    self.stream.write(",")
+                self.stream.write("\n" + lines.replace("\n", ",\n"))
+            else:
+                self.stream.write(lines + "\n")
+            self.stream.flush()
+            count += len(frame)
+        if self.fmt == "json":
+            self.stream.write("\n]\n" if count else "]\n")
+        return count
+
+
+def _positions(args: argparse.Namespace, store: TransactionStore) -> np.ndarray:
+    engine = engine_for(store)
+    if args.kind == "text":
+        if len(args.query) == 1:
+            return engine.contains(args.query[0])
+        found = engine.contains_many(args.query)
+        return np.unique(np.concatenate([found[q] for q in args.query]))
+    if args.kind == "phone":
+        return phone_index_for(store).positions(args.query[0])
+    if args.kind == "phones":
+        return engine.phone_positions()
+    return engine.person_transfer_positions()
+
+
+def _search(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+    if isinstance(store, SQLiteStore):
+        frames = store.iter_search(args.kind, args.query, args.limit, CHUNK_SIZE)
+        out.rows(frames, args.columns)
+        return
+    positions = _positions(args, store)
+    if args.limit is not None:
+        positions = positions[: args.limit]
+    frames = iter_frames_at(store, engine_for(store), positions, CHUNK_SIZE)
+    out.rows(frames, args.columns)
+
+
+def _frame(result: DataFrame, out: JsonOutput, columns: Optional[List[str]]) -> None:
+    out.rows(
+        (result.iloc[i:i + CHUNK_SIZE] for i in range(0, len(result), CHUNK_SIZE)),
+        columns,
+    )
+
+
+def _report(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+    if args.kind == "category":
+        if not args.category:
+            raise SystemExit("Для отчета category нужна --category")
+        out.value(reports.spending_by_category(store, args.category))
+    elif args.kind == "weekday":
+        out.value(reports.spending_by_weekday(store))
+    else:
+        out.value(reports.spending_by_workday(store))
+
+
+def _cashback(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+    if args.year is not None and args.month is not None:
+        out.value(services.profitable_cashback_categories(store, args.year, args.month))
+        return
+    top = services.cashback_top_by_month(store, args.top, args.start, args.end)
+    _frame(top, out, None)
+
+
+def _invest(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+    savings = services.investment_savings(
+        store, args.limits, args.percents, args.start, args.end
+    )
+    _frame(savings, out, None)
+
+
+def _trends(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+    if isinstance(store, SQLiteStore):
+        raise SystemExit("Команда trends не поддерживает --sqlite")
+    trends = spending_trends(store, args.by, args.start, args.end)
+    out.value(trends.to_dict(args.windows))
+
+
+def _page(
+    view: Callable[[str, TransactionStore, str], Dict[str, Any]],
+) -> Callable[..., None]:
+    def run(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+        if isinstance(store, SQLiteStore):
+            raise SystemExit(f"Команда {args.command} не поддерживает --sqlite")
+        out.value(view(args.date_time, store, args.date_range))
+
+    return run
+
+
+def _import(args: argparse.Namespace, store: Source, out: JsonOutput) -> None:
+    if not isinstance(store, SQLiteStore):
+        raise SystemExit("Для импорта нужна --sqlite")
+    out.value({"rows": store.import_file(args.data, args.chunk_size)})
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(
+        prog="bank", description="Анализ банковских транзакций"
+    )
+    parser.add_argument("--data", default=Config.DATA_FILE_PATH, help="Файл выписки")
+    parser.add_argument("--sqlite", help="База SQLite вместо файла выписки")
+    parser.add_argument(
+        "--format", choices=["ndjson", "json"], default="ndjson", dest="fmt"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for name, view in (("home", home_page), ("events", events_page)):
+        page = commands.add_parser(name, help=f"Данные страницы {name}")
+        page.add_argument("--date-time", default=now)
+        page.add_argument(
+            "--range",
+            choices=DATE_RANGES,
+            default="M",
+            dest="date_range",
+            help="Период до --date-time: неделя, месяц, год или вся история",
+        )
+        page.set_defaults(handler=_page(view))
+
+    report = commands.add_parser("report", help="Отчеты по расходам")
+    report.add_argument("kind", choices=["category", "weekday", "workday"])
+    report.add_argument("--category")
+    report.set_defaults(handler=_report)
+
+    search = commands.add_parser("search", help="Поиск транзакций")
+    search.add_argument("kind", choices=["text", "phone", "phones", "transfers"])
+    search.add_argument("query", nargs="*", help="Строки поиска или номер телефона")
+    search.add_argument("--limit", type=int)
+    search.add_argument("--columns", nargs="+", help="Выводить только эти колонки")
+    search.set_defaults(handler=_search)
+
+    cashback = commands.add_parser("cashback", help="Категории с наибольшим кэшбэком")
+    cashback.add_argument("--year", type=int)
+    cashback.add_argument("--month", type=int)
+    cashback.add_argument("--top", type=int, default=3)
+    cashback.add_argument("--start", help="Первый месяц YYYY-MM")
+    cashback.add_argument("--end", help="Последний месяц YYYY-MM")
+    cashback.set_defaults(handler=_cashback)
+
+    invest = commands.add_parser("invest", help="Накопления инвесткопилки")
+    invest.add_argument("--limits", type=int, nargs="*", default=[])
+    invest.add_argument("--percents", type=float, nargs="*", default=[])
+    invest.add_argument("--start", help="Первый месяц YYYY-MM")
+    invest.add_argument("--end", help="Последний месяц YYYY-MM")
+    invest.set_defaults(handler=_invest)
+
+    trends = commands.add_parser("trends", help="Динамика расходов по дням")
+    trends.add_argument("--by", choices=TREND_KEYS, default="category")
+    trends.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS))
+    trends.add_argument("--start", help="Первый день YYYY-MM-DD")
+    trends.add_argument("--end", help="Последний день YYYY-MM-DD")
+    trends.set_defaults(handler=_trends)
+
+    load = commands.add_parser("import", help="Импорт выписки в базу --sqlite")
+    load.add_argument("--chunk-size", type=int, default=50_000)
+    load.set_defaults(handler=_import)
+    return parser
+
+
+def main(
+    argv: Optional[Sequence[str]] = None,
+    stream: Optional[TextIO] = None,
+    store: Optional[Source] = None,
+) -> int:
+    """
+    Точка входа командной строки
+
+    Args:
+        argv: Аргументы (по умолчанию sys.argv)
+        stream: Куда писать результат (по умолчанию stdout)
+        store: Готовое хранилище (по умолчанию - база из --sqlite
+            или файл из --data)
+
+    Returns:
+        Код завершения
+    """
+    args = build_parser().parse_args(argv)
+    if args.command == "search":
+        needs_query = args.kind in ("text", "phone")
+        if needs_query and not args.query:
+            raise SystemExit(f"Для поиска {args.kind} нужна строка запроса")
+
+    if store is None:
+        store = SQLiteStore(args.sqlite) if args.sqlite else TransactionStore(args.data)
+    out = JsonOutput(stream or sys.stdout, args.fmt)
+    try:
+        args.handler(args, store, out)
+        out.stream.flush()
+    except BrokenPipeError:
+        # Читатель закрыл вывод раньше времени (например, `| head`)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,57 @@
 import os
 from pathlib import Path
+from typing import Any, Optional
 
-from dotenv import load_dotenv
+BASE_DIR = Path(__file__).parent.parent
 
-load_dotenv()
+# Настройки, которые читаются из окружения (и файла .env) при первом обращении
+ENV_SETTINGS = (
+    "API_KEY",
+    "STOCK_API_KEY",
+    "CURRENCY_API_KEY",
+    "EXCHANGE_API_URL",
+    "EXCHANGE_HISTORY_URL",
+    "STOCK_API_URL",
+    "METRICS_ENABLED",
+    "BASE_CURRENCY",
+)
 
-BASE_DIR = Path(__file__).parent.parent
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Один раз загружает переменные из .env"""
+    global _env_loaded
+    if _env_loaded:
+        return
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    _env_loaded = True
+
+
+class _LazySettings(type):
+    """
+    Метакласс, откладывающий чтение окружения
+
+    Атрибуты из ENV_SETTINGS вычисляются при первом обращении к ним
+    и затем хранятся в классе, поэтому импорт конфигурации не читает
+    .env и не импортирует python-dotenv.
+    """
+
+    def __getattr__(cls, name: str) -> Optional[str]:
+        if name not in ENV_SETTINGS:
+            raise AttributeError(name)
+        load_env()
+        value = os.getenv(name)
+        setattr(cls, name, value)
+        return value
+
+    def __dir__(cls) -> Any:
+        return sorted(set(super().__dir__()) | set(ENV_SETTINGS))
 
 
-class Config:
-    API_KEY = os.getenv("API_KEY")
-    STOCK_API_KEY = os.getenv("STOCK_API_KEY")
-    CURRENCY_API_KEY = os.getenv("CURRENCY_API_KEY")
+class Config(metaclass=_LazySettings):
     DATA_FILE_PATH = str(BASE_DIR / "data" / "operations.xlsx")
     USER_SETTINGS_PATH = str(BASE_DIR / "user_settings.json")
+    RATES_PATH = str(BASE_DIR / "data" / "rates.csv")
@@ -0,0 +1,202 @@
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from src.store import Transactions, TransactionStore, as_dataframe
+
+logger = logging.getLogger(__name__)
+
+CUBE_KEYS = ["day", "category", "weekday", "card", "sign"]
+CUBE_VALUES = ["amount", "cashback", "count"]
+
+
+class AggregateCube:
+    """
+    Предрассчитанные суммы операций и кэшбэка
+
+    Одна строка таблицы - сочетание (день, категория, день недели, карта,
+    знак суммы) с суммой операций, суммой бонусов и количеством операций.
+    Размер таблицы зависит от числа различных дней и категорий, а не от
+    числа транзакций, поэтому отчеты по кубу не обходят исходные строки.
+    """
+
+    def __init__(self, table: DataFrame) -> None:
+        self.table = table
+
+    @staticmethod
+    def _rollup(df: DataFrame) -> DataFrame:
+        """
+        Сворачивает транзакции в строки куба
+
+        Ключи кодируются целыми числами (день, коды категории и карты,
+        знак) и сворачиваются через bincount без группировки строк.
+        """
+        dates = pd.to_datetime(df["Дата операции"])
+        valid = dates.notna().to_numpy()
+        days = dates.to_numpy()[valid].astype("datetime64[D]").astype(np.int64)
+        amounts = pd.to_numeric(df["Сумма операции"]).to_numpy(dtype=float)[valid]
+
+        def text(column: str) -> Tuple[np.ndarray, np.ndarray]:
+            if column not in df.columns:
+                return np.zeros(len(days), dtype=np.int64), np.array([""], object)
+            codes, uniques = pd.factorize(df[column].to_numpy()[valid])
+            labels = np.append(np.asarray(uniques, dtype=object).astype(str), "")
+            # Разные значения с одинаковой строкой (1 и "1") - одна ячейка
+            remap, labels = pd.factorize(labels)
+            return remap[codes], np.asarray(labels, dtype=object)
+
+        cashback_col = "Бонусы (включая кэшбэк)"
+        if cashback_col in df.columns:
+            cashback = pd.to_numeric(df[cashback_col]).to_numpy(dtype=float)[valid]
+        else:
+            cashback = np.zeros(len(days))
+
+        category, categories = text("Категория")
+        card, cards = text("Номер карты")
+        sign = np.sign(amounts).astype(np.int64)
+        first = days.min() if len(days) else 0
+        key = (
+            ((days - first) * len(categories) + category) * len(cards) + card
+        ) * 3 + (sign + 1)
+        cells, index = np.unique(key, return_inverse=True)
+
+        rest, cell_sign = np.divmod(cells, 3)
+        rest, cell_card = np.divmod(rest, len(cards))
+        cell_day, cell_category = np.divmod(rest, len(categories))
+        day = (cell_day + first).astype("datetime64[D]").astype("datetime64[ns]")
+        return pd.DataFrame(
+            {
+                "day": day,
+                "category": categories[cell_category],
+                "weekday": ((cell_day + first + 3) % 7).astype(np.int8),
+                "card": cards[cell_card],
+                "sign": (cell_sign - 1).astype(np.int8),
+                "amount": np.bincount(index, weights=amounts, minlength=len(cells)),
+                "cashback": np.bincount(index, weights=cashback, minlength=len(cells)),
+                "count": np.bincount(index, minlength=len(cells)).astype(np.int64),
+            }
+        )
+
+    @classmethod
+    def build(cls, df: DataFrame) -> "AggregateCube":
+        """
+        Строит куб за один проход по транзакциям
+
+        Args:
+            df: DataFrame с колонками "Дата операции" и "Сумма операции"
+
+        Returns:
+            AggregateCube
+        """
+        return cls(cls._rollup(df))
+
+    def append(self, df: DataFrame) -> None:
+        """
+        Добавляет в куб новые транзакции
+
+        Сворачиваются только новые строки, затем они объединяются с
+        уже посчитанными ячейками.
+
+        Args:
+            df: DataFrame с добавленными транзакциями
+        """
+        if df.empty:
+            return
+        combined = pd.concat([self.table, self._rollup(df)], ignore_index=True)
+        self.table = combined.groupby(CUBE_KEYS, sort=False).sum().reset_index()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _select(
+        self, category: Optional[str] = None, sign: Optional[int] = None
+    ) -> DataFrame:
+        table = self.table
+        if category is not None:
+            table = table[table["category"] == category]
+        if sign is not None:
+            table = table[table["sign"] == sign]
+        return table
+
+    def total_by(
+        self,
+        keys: List[str],
+        value: str = "amount",
+        category: Optional[str] = None,
+        sign: Optional[int] = None,
+    ) -> Series:
+        """
+        Суммы по выбранным измерениям куба
+
+        Args:
+            keys: Измерения из CUBE_KEYS
+            value: 'amount', 'cashback' или 'count'
+            category: Ограничить одной категорией
+            sign: Ограничить знаком суммы (-1 расходы, 1 доходы)
+
+        Returns:
+            Series с суммами, отсортированный по ключам
+        """
+        return self._select(category, sign).groupby(keys)[value].sum()
+
+    def monthly_total_by(
+        self,
+        keys: List[str],
+        value: str = "amount",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Series:
+        """
+        Суммы по месяцам и выбранным измерениям за одну группировку
+
+        Args:
+            keys: Измерения из CUBE_KEYS (кроме day)
+            value: 'amount', 'cashback' или 'count'
+            start: Первый месяц 'YYYY-MM' (None - с начала данных)
+            end: Последний месяц 'YYYY-MM' включительно (None - до конца)
+
+        Returns:
+            Series с индексом (month, *keys), month - pd.Period
+        """
+        table = self.table
+        month = table["day"].dt.to_period("M").rename("month")
+        mask = np.ones(len(table), dtype=bool)
+        if start is not None:
+            mask &= (month >= pd.Period(start, "M")).to_numpy()
+        if end is not None:
+            mask &= (month <= pd.Period(end, "M")).to_numpy()
+        selected = table[mask]
+        return selected.groupby([month[mask], *keys])[value].sum()
+
+    def month_slice(self, year: int, month: int) -> "AggregateCube":
+        """Часть куба за указанный месяц"""
+        day = self.table["day"]
+        mask = (day.dt.year == year) & (day.dt.month == month)
+        return AggregateCube(self.table[mask])
+
+
+def cube_for(transactions: Transactions) -> AggregateCube:
+    """
+    Возвращает куб агрегатов для транзакций
+
+    Для TransactionStore куб строится один раз на версию данных и
+    дополняется при дозаписи транзакций. Для DataFrame и списка куб
+    строится при каждом вызове, поэтому изменения данных на месте
+    учитываются.
+
+    Args:
+        transactions: Список транзакций, DataFrame или TransactionStore
+
+    Returns:
+        AggregateCube
+    """
+    if isinstance(transactions, TransactionStore):
+        return transactions.derived(
+            "aggregate_cube",
+            AggregateCube.build,
+            lambda cube, rows, frame: cube.append(rows),
+        )
+    return AggregateCube.build(as_dataframe(transactions, copy=False))
@@ -0,0 +1,338 @@
+import logging
+import os
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Валюта, к которой приводят курсы источника котировок
+QUOTE_CURRENCY = "RUB"
+RATE_COLUMNS = ["date", "currency", "rate"]
+ORIGINAL_AMOUNT_COLUMN = "Сумма в валюте операции"
+# Курс старше стольких дней на дату операции не используется
+MAX_RATE_AGE_DAYS = 7
+
+Fetcher = Callable[[List[str], date], List[Dict[str, Any]]]
+
+
+def _fetch_rates(currencies: List[str], day: date) -> List[Dict[str, Any]]:
+    """
+    Курсы за день из API котировок, если он настроен
+
+    Курсы за сегодня берутся из get_currency_rates, за прошедшие дни -
+    из истории курсов (Config.EXCHANGE_HISTORY_URL). Без API
+    get_currency_rates возвращает условные значения, которые нельзя
+    сохранять в историю курсов.
+    """
+    from src.utils import _quote_service, get_currency_rates
+
+    service = _quote_service()
+    if service is None:
+        logger.debug("API котировок не настроен, курсы не обновлены")
+        return []
+    if day >= date.today():
+        return get_currency_rates(currencies)
+    if not Config.EXCHANGE_HISTORY_URL:
+        logger.debug(f"История курсов не настроена, курсы за {day} не получены")
+        return []
+    return service.historical_rates(currencies, day)
+
+
+class RateTable:
+    """
+    Дневные курсы валют к рублю, сохраняемые на диске
+
+    Таблица пополняется курсами за нужные даты (ensure, refresh):
+    запрашиваются только пары (дата, валюта), которых в таблице еще нет
+    и которые в этом процессе еще не запрашивались, новые строки
+    дописываются в конец CSV файла. Курс на дату берется последний
+    известный на эту дату, но не старше MAX_RATE_AGE_DAYS; более ранние
+    или более поздние курсы не подставляются. Поиск по (дата, валюта)
+    для всех строк выполняется одним searchsorted по составному ключу.
+    """
+
+    def __init__(
+        self, path: Optional[str] = Config.RATES_PATH, fetch: Fetcher = _fetch_rates
+    ) -> None:
+        self.path = path
+        self.fetch = fetch
+        self._lock = threading.RLock()
+        self._rows = pd.DataFrame(columns=RATE_COLUMNS)
+        self._requested: Set[Tuple[date, str]] = set()
+        if path is not None and os.path.exists(path):
+            try:
+                self._rows = pd.read_csv(path, dtype={"currency": str})
+            except Exception as e:
+                logger.warning(f"Не удалось прочитать курсы: {e}")
+        self._index()
+
+    def _index(self) -> None:
+        """Сортирует записи и строит ключи для поиска"""
+        rows = self._rows.dropna()
+        rows = rows.assign(
+            date=pd.to_datetime(rows["date"]).dt.normalize(),
+            currency=rows["currency"].astype(str).str.upper(),
+            rate=rows["rate"].astype(float),
+        )
+        rows = rows.drop_duplicates(["currency", "date"], keep="last")
+        self._rows = rows.sort_values(["currency", "date"], ignore_index=True)
+
+        codes, currencies = pd.factorize(self._rows["currency"], sort=True)
+        self._currencies = pd.Index(currencies)
+        days = self._rows["date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        self._keys = _keys(codes, days)
+        self._codes = codes
+        self._days = days
+        self._rates = self._rows["rate"].to_numpy(dtype=float)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def has(self, day: Union[str, date], currency: str) -> bool:
+        """Есть ли курс валюты именно за этот день"""
+        rows = self._rows
+        return bool(
+            ((rows["date"] == pd.Timestamp(day)) & (rows["currency"] == currency)).any()
+        )
+
+    def add(self, day: Union[str, date], rates: Dict[str, float]) -> None:
+        """
+        Добавляет курсы за день и дописывает их в файл
+
+        Args:
+            day: Дата курсов
+            rates: {валюта: рублей за единицу}
+        """
+        added = pd.DataFrame(
+            {
+                "date": pd.Timestamp(day).strftime("%Y-%m-%d"),
+                "currency": [c.upper() for c in rates],
+                "rate": [float(r) for r in rates.values()],
+            },
+            columns=RATE_COLUMNS,
+        )
+        if added.empty:
+            return
+        with self._lock:
+            if self.path is not None:
+                header = not os.path.exists(self.path)
+                added.to_csv(self.path, mode="a", header=header, index=False)
+            added["date"] = pd.to_datetime(added["date"])
+            self._rows = pd.concat([self._rows, added], ignore_index=True)
+            self._index()
+
+    def refresh(
+        self, currencies: Iterable[str], day: Optional[Union[str, date]] = None
+    ) -> int:
+        """
+        Запрашивает курсы за день для валют, которых в таблице еще нет
+
+        Args:
+            currencies: Коды валют
+            day: Дата курсов (по умолчанию сегодня)
+
+        Returns:
+            Количество добавленных курсов
+        """
+        day = pd.Timestamp(day or date.today()).date()
+        with self._lock:
+            missing = sorted(
+                {c.upper() for c in currencies if c.upper() != QUOTE_CURRENCY}
+            )
+            missing = [
+                c
+                for c in missing
+                if (day, c) not in self._requested and not self.has(day, c)
+            ]
+            if not missing:
+                return 0
+            self._requested.update((day, c) for c in missing)
+            try:
+                quotes = self.fetch(missing, day)
+            except Exception as e:
+                logger.warning(f"Не удалось обновить курсы: {e}")
+                return 0
+            rates = {
+                str(q["currency"]): float(q["rate"])
+                for q in quotes
+                if q.get("rate") is not None
+            }
+            self.add(day, rates)
+            return len(rates)
+
+    def ensure(self, days: Any, currencies: Any) -> int:
+        """
+        Запрашивает курсы на даты операций, которых в таблице нет
+
+        Для каждой даты выполняется один запрос по недостающим валютам;
+        пары, уже запрошенные в этом процессе, повторно не запрашиваются.
+
+        Args:
+            days: Даты операций
+            currencies: Коды валют той же длины
+
+        Returns:
+            Количество добавленных курсов
+        """
+        with self._lock:
+            days = pd.to_datetime(pd.Series(days)).dt.normalize().to_numpy()
+            codes = pd.Series(np.asarray(currencies, dtype=object)).astype(str)
+            pairs = pd.DataFrame(
+                {"day": days, "currency": codes.str.upper().to_numpy()}
+            ).drop_duplicates()
+            pairs = pairs[pairs["currency"] != QUOTE_CURRENCY]
+            codes = self._currencies.get_indexer(pairs["currency"])
+            days = pairs["day"].to_numpy().astype("datetime64[D]").astype(np.int64)
+            known = pd.Index(self._keys).get_indexer(_keys(codes, days))
+            pairs = pairs[(codes < 0) | (known < 0)]
+
+            added = 0
+            for day, group in pairs.groupby("day"):
+                added += self.refresh(group["currency"], day.date())
+            return added
+
+    def lookup(self, days: Any, currencies: Any) -> np.ndarray:
+        """
+        Курсы к рублю для пар (дата, валюта)
+
+        Args:
+            days: Даты операций
+            currencies: Коды валют той же длины
+
+        Returns:
+            Рублей за единицу валюты; 1 для рубля, NaN для валют без курса
+            не старше MAX_RATE_AGE_DAYS на дату
+        """
+        currencies = pd.Series(np.asarray(currencies, dtype=object)).astype(str)
+        currencies = currencies.str.upper().to_numpy(dtype=object)
+        codes = self._currencies.get_indexer(currencies)
+        days = (
+            pd.to_datetime(pd.Series(days)).to_numpy().astype("datetime64[D]")
+        ).astype(np.int64)
+
+        result = np.full(len(codes), np.nan)
+        known = codes >= 0
+        if known.any():
+            pos = np.searchsorted(self._keys, _keys(codes[known], days[known]), "right")
+            pos = np.maximum(pos - 1, 0)
+            found = (
+                (self._codes[pos] == codes[known])
+                & (self._days[pos] <= days[known])
+                & (days[known] - self._days[pos] <= MAX_RATE_AGE_DAYS)
+            )
+            result[np.flatnonzero(known)[found]] = self._rates[pos[found]]
+        result[currencies == QUOTE_CURRENCY] = 1.0
+        return result
+
+
+def _keys(codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Составной ключ (валюта, день), упорядоченный как пары"""
+    return codes.astype(np.int64) * (1 << 32) + (days + (1 << 31))
+
+
+def normalize_amounts(
+    df: DataFrame, base: str = QUOTE_CURRENCY, table: Optional["RateTable"] = None
+) -> DataFrame:
+    """
+    Переводит "Сумма операции" в базовую валюту
+
+    Если банк уже списал операцию в базовой валюте ("Валюта платежа"),
+    берется "Сумма платежа". Остальные суммы переводятся по курсу на
+    дату операции; недостающие курсы на эти даты запрашиваются один раз
+    (см. RateTable.ensure). Суммы, для которых курса нет, остаются в
+    валюте операции, о чем пишется предупреждение.
+
+    Исходная сумма сохраняется в колонке ORIGINAL_AMOUNT_COLUMN, колонка
+    "Валюта операции" не меняется. Если колонка уже есть, перевод
+    выполняется из нее, поэтому повторный вызов не меняет результат.
+
+    Args:
+        df: Очищенные транзакции
+        base: Код базовой валюты
+        table: Таблица курсов (по умолчанию - общая, см. default_rate_table)
+
+    Returns:
+        DataFrame с суммами в базовой валюте
+    """
+    columns = {"Дата операции", "Сумма операции", "Валюта операции"}
+    if df.empty or not columns <= set(df.columns):
+        return df
+
+    base = base.upper()
+    currencies = df["Валюта операции"].fillna(base).astype(str).str.upper()
+    foreign = (currencies != base).to_numpy()
+    converted = ORIGINAL_AMOUNT_COLUMN in df.columns
+    if not foreign.any() and not converted:
+        return df
+
+    source = ORIGINAL_AMOUNT_COLUMN if converted else "Сумма операции"
+    amounts = pd.to_numeric(df[source]).to_numpy(dtype=float)
+    result = amounts.copy()
+    pending = foreign.copy()
+    if {"Сумма платежа", "Валюта платежа"} <= set(df.columns):
+        paid = df["Валюта платежа"].astype(str).str.upper().to_numpy() == base
+        payment = pd.to_numeric(df["Сумма платежа"], errors="coerce").to_numpy(float)
+        settled = pending & paid & ~np.isnan(payment)
+        result[settled] = payment[settled]
+        pending &= ~settled
+
+    if pending.any():
+        if table is None:
+            table = default_rate_table()
+        days = df["Дата операции"].to_numpy()[pending]
+        codes = currencies.to_numpy()[pending]
+        bases = np.full(len(days), base, dtype=object)
+        table.ensure(np.r_[days, days], np.r_[codes, bases])
+        rates = table.lookup(days, codes)
+        if base != QUOTE_CURRENCY:
+            rates = rates / table.lookup(days, bases)
+
+        missing = np.isnan(rates)
+        if missing.any():
+            unknown = sorted(set(codes[missing]))
+            logger.warning(
+                f"Нет курсов для {int(missing.sum())} операций в {unknown}, "
+                "суммы оставлены в валюте операции"
+            )
+            rates[missing] = 1.0
+        result[pending] = np.round(amounts[pending] * rates, 2)
+
+    df = df.copy()
+    df[ORIGINAL_AMOUNT_COLUMN] = amounts
+    df["Сумма операции"] = result
+    return df
+
+
+def original_amounts(df: DataFrame) -> DataFrame:
+    """
+    Возвращает суммы в валюте операции, как в выписке
+
+    Обратное к normalize_amounts: "Сумма операции" берется из
+    ORIGINAL_AMOUNT_COLUMN, сама колонка удаляется.
+    """
+    if ORIGINAL_AMOUNT_COLUMN not in df.columns:
+        return df
+    raw = df[ORIGINAL_AMOUNT_COLUMN].to_numpy(dtype=float)
+    df = df.drop(columns=ORIGINAL_AMOUNT_COLUMN)
+    df["Сумма операции"] = raw
+    return df
+
+
+_table: Optional[RateTable] = None
+_table_lock = threading.Lock()
+
+
+def default_rate_table() -> RateTable:
+    """Общая таблица курсов из Config.RATES_PATH"""
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = RateTable()
+        return _table
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+
+DEFAULT_RATES = {"USD": 1 / 75.0, "EUR": 1 / 90.0, "CNY": 1 / 11.0, "TRY": 1 / 3.0}
+DEFAULT_PRICES = {
+    "AAPL": 150.0,
+    "AMZN": 130.0,
+    "GOOG": 120.0,
+    "GOOGL": 120.0,
+    "MSFT": 330.0,
+    "TSLA": 250.0,
+}
+
+
+class FakeQuoteServer:
+    """
+    Локальная замена API курсов валют и котировок для тестов и разработки
+
+    Отвечает в формате exchangerate-api (/latest/RUB, курсы на дату -
+    /history/RUB/YYYY-MM-DD) и stockdata (/quote?symbols=...). Задержка
+    ответа и отказ включаются полями delay и fail.
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, float]] = None,
+        prices: Optional[Dict[str, float]] = None,
+        delay: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.prices = dict(DEFAULT_PRICES if prices is None else prices)
+        self.delay = delay
+        self.fail = False
+        self.hits: Dict[str, int] = {"exchange": 0, "stock": 0}
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def exchange_url(self) -> str:
+        return f"{self.base_url}/latest/RUB"
+
+    @property
+    def history_url(self) -> str:
+        return f"{self.base_url}/history/RUB/{{date}}"
+
+    @property
+    def stock_url(self) -> str:
+        return f"{self.base_url}/quote"
+
+    async def _respond(self, kind: str, payload: Any) -> web.Response:
+        self.hits[kind] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            return web.json_response({"error": "unavailable"}, status=503)
+        return web.json_response(payload)
+
+    async def _exchange(self, request: web.Request) -> web.Response:
+        return await self._respond("exchange", {"base": "RUB", "rates": self.rates})
+
+    async def _stock(self, request: web.Request) -> web.Response:
+        symbols = request.query.get("symbols", "").split(",")
+        data = [
+            {"ticker": s, "price": self.prices[s]} for s in symbols if s in self.prices
+        ]
+        return await self._respond("stock", {"data": data})
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/latest/RUB", self._exchange)
+        app.router.add_get("/history/RUB/{date}", self._exchange)
+        app.router.add_get("/quote", self._stock)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "FakeQuoteServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+
+async def _serve_forever(port: int) -> None:
+    async with FakeQuoteServer(port=port) as server:
+        print(f"EXCHANGE_API_URL={server.exchange_url}")
+        print(f"EXCHANGE_HISTORY_URL={server.history_url}")
+        print(f"STOCK_API_URL={server.stock_url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve_forever(8765))
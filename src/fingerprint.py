@@ -0,0 +1,68 @@
+import hashlib
+import json
+from typing import Any, Dict
+
+import pandas as pd
+from pandas import DataFrame
+
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore
+
+
+def frame_fingerprint(df: DataFrame) -> Dict[str, Any]:
+    """
+    Отпечаток DataFrame: размер и хеш содержимого
+
+    Хеш считается по значениям без форматирования строк, поэтому
+    стоит порядка одного прохода по данным.
+
+    Args:
+        df: DataFrame
+
+    Returns:
+        Словарь {'shape': [строки, колонки], 'hash': hex}
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    if not df.empty:
+        hashed = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        digest.update(hashed.tobytes())
+    return {"shape": list(df.shape), "hash": digest.hexdigest()}
+
+
+def _extend_fingerprint(
+    fingerprint: Dict[str, Any], rows: DataFrame, frame: DataFrame
+) -> None:
+    """Обновляет отпечаток после дозаписи строк, не хешируя старые данные"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(fingerprint["hash"].encode())
+    digest.update(frame_fingerprint(rows)["hash"].encode())
+    fingerprint["shape"] = list(frame.shape)
+    fingerprint["hash"] = digest.hexdigest()
+
+
+def data_fingerprint(data: Any) -> Dict[str, Any]:
+    """
+    Отпечаток входных данных отчета или сервиса
+
+    Для TransactionStore считается один раз на версию данных, для
+    SQLiteStore берется из счетчика импортов без чтения данных.
+    DataFrame и список хешируются по содержимому при каждом вызове,
+    поэтому изменения на месте (df.loc[i, col] = ...) тоже учитываются.
+
+    Args:
+        data: DataFrame, TransactionStore, SQLiteStore или список транзакций
+
+    Returns:
+        Словарь {'shape': ..., 'hash': ...}
+    """
+    if isinstance(data, TransactionStore):
+        return data.derived("fingerprint", frame_fingerprint, _extend_fingerprint)
+    if isinstance(data, SQLiteStore):
+        return data.fingerprint()
+    if isinstance(data, DataFrame):
+        return frame_fingerprint(data)
+    if isinstance(data, list):
+        return frame_fingerprint(pd.DataFrame(data))
+    text = json.dumps(data, ensure_ascii=False, default=str, sort_keys=True)
+    return {"shape": None, "hash": hashlib.blake2b(text.encode()).hexdigest()[:32]}
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+
+def get_greeting(time: datetime) -> str:
+    """Возвращает приветствие в зависимости от времени суток"""
+    hour = time.hour
+    if 5 <= hour < 12:
+        return "Доброе утро"
+    elif 12 <= hour < 17:
+        return "Добрый день"
+    elif 17 <= hour < 23:
+        return "Добрый вечер"
+    return "Доброй ночи"
@@ -0,0 +1,318 @@
+import glob
+import logging
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from pandas import DataFrame
+
+from src.currency import ORIGINAL_AMOUNT_COLUMN, original_amounts
+from src.search import text_index_for
+from src.snapshot import save_snapshot, source_key
+from src.store import TransactionStore
+from src.text_index import index_path
+from src.utils import (TRANSACTION_COLUMNS, clean_transactions, index_by_date,
+                       load_transactions, to_base_currency)
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_statements(source: Union[str, Iterable[str]]) -> List[str]:
+    """
+    Возвращает список файлов выписок
+
+    Args:
+        source: Каталог (берутся все *.xlsx), шаблон glob или список путей
+
+    Returns:
+        Отсортированный список путей
+    """
+    if isinstance(source, str):
+        if os.path.isdir(source):
+            pattern = os.path.join(source, "*.xlsx")
+        else:
+            pattern = source
+        paths = glob.glob(pattern)
+    else:
+        paths = list(source)
+    return sorted(p for p in paths if not os.path.basename(p).startswith("~$"))
+
+
+def row_hashes(df: DataFrame) -> np.ndarray:
+    """Хеш каждой строки по всем колонкам"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def merge_statements(frames: List[DataFrame]) -> DataFrame:
+    """
+    Объединяет выписки и убирает пересекающиеся строки
+
+    Одинаковые строки внутри одной выписки сохраняются (это могут быть
+    две одинаковые покупки), а повтор той же строки в другой выписке
+    считается пересечением периодов и отбрасывается. Строки сравниваются
+    по row_keys, поэтому типы колонок в разных файлах (целые или
+    дробные бонусы) на результат не влияют.
+
+    Args:
+        frames: Очищенные DataFrame отдельных выписок
+
+    Returns:
+        Объединенный DataFrame, отсортированный по дате операции
+    """
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    keyed = []
+    for frame in frames:
+        frame = frame.reset_index(drop=True)
+        hashes = row_keys(frame)
+        occurrence = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+        keyed.append((frame, hashes, occurrence))
+
+    merged = pd.concat([f for f, _, _ in keyed], ignore_index=True)
+    keys = pd.DataFrame(
+        {
+            "hash": np.concatenate([h for _, h, _ in keyed]),
+            "occurrence": np.concatenate([o for _, _, o in keyed]),
+        }
+    )
+    merged = merged[~keys.duplicated().to_numpy()].reset_index(drop=True)
+    return index_by_date(merged) if "Дата операции" in merged.columns else merged
+
+
+def load_statements(
+    source: Union[str, Iterable[str]], max_workers: Optional[int] = None
+) -> DataFrame:
+    """
+    Загружает несколько выписок параллельно
+
+    Каждая выписка разбирается в отдельном процессе по тем же правилам,
+    что и load_transactions (включая снимки на диске). Суммы переводятся
+    в базовую валюту после объединения, в этом процессе: так курсы
+    запрашиваются один раз и таблицу курсов пишет один процесс.
+
+    Args:
+        source: Каталог, шаблон glob или список путей
+        max_workers: Число процессов (по умолчанию - число ядер)
+
+    Returns:
+        Объединенный DataFrame без пересечений, отсортированный по дате
+    """
+    paths = resolve_statements(source)
+    if not paths:
+        logger.warning(f"Выписки не найдены: {source}")
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    load = partial(load_transactions, convert=False)
+    if workers <= 1:
+        frames = [load(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(load, paths))
+
+    logger.info(f"Загружено выписок: {len(paths)}")
+    return to_base_currency(merge_statements(frames))
+
+
+KEY_COLUMNS = [
+    "Дата операции",
+    "Сумма операции",
+    "Описание",
+    "Категория",
+    "Номер карты",
+]
+
+
+def row_keys(df: DataFrame) -> np.ndarray:
+    """
+    Хеш строки по ключевым полям транзакции
+
+    В отличие от row_hashes не зависит от того, каким способом
+    прочитан файл (целые или дробные бонусы, None или NaN в тексте).
+    Сумма берется в валюте операции, поэтому ключ не зависит от курса
+    перевода в базовую валюту.
+
+    Args:
+        df: Очищенный DataFrame
+
+    Returns:
+        Массив uint64
+    """
+    keys = pd.DataFrame(index=range(len(df)))
+    for col in KEY_COLUMNS:
+        if col not in df.columns:
+            continue
+        if col == "Сумма операции" and ORIGINAL_AMOUNT_COLUMN in df.columns:
+            col = ORIGINAL_AMOUNT_COLUMN
+        values = df[col].reset_index(drop=True)
+        if col == "Дата операции":
+            keys[col] = pd.to_datetime(values)
+        elif col in ("Сумма операции", ORIGINAL_AMOUNT_COLUMN):
+            keys["Сумма операции"] = values.astype(float).round(2)
+        else:
+            keys[col] = values.astype(object).fillna("").astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class HighWaterMark(NamedTuple):
+    """Последняя загруженная дата и ключи строк с этой датой"""
+
+    last_date: Optional[pd.Timestamp]
+    last_keys: Counter
+
+
+def high_water_mark(df: DataFrame) -> HighWaterMark:
+    """Вычисляет отметку по уже загруженным транзакциям"""
+    if df.empty or "Дата операции" not in df.columns:
+        return HighWaterMark(None, Counter())
+    last_date = df["Дата операции"].max()
+    at_last = df[df["Дата операции"] == last_date]
+    return HighWaterMark(last_date, Counter(row_keys(at_last).tolist()))
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.strptime(str(value), "%d.%m.%Y %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def read_new_rows(file_path: str, since: Optional[pd.Timestamp]) -> DataFrame:
+    """
+    Читает из выписки только строки не старше отметки
+
+    Строки читаются потоково. Выписки банка упорядочены от новых
+    операций к старым, поэтому чтение останавливается на первой более
+    старой строке, если до нее порядок не нарушался.
+
+    Args:
+        file_path: Путь к xlsx файлу
+        since: Дата последней загруженной операции (None - читать все)
+
+    Returns:
+        Очищенный DataFrame с кандидатами в новые строки (суммы
+        переведены так же, как в load_transactions)
+    """
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+        columns = [str(c) for c in header]
+        date_pos = columns.index("Дата операции")
+
+        selected: List[Any] = []
+        previous: Optional[datetime] = None
+        descending = True
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            op_date = _parse_date(row[date_pos])
+            if op_date is None:
+                continue
+            if previous is not None and op_date > previous:
+                descending = False
+            previous = op_date
+
+            if since is None or op_date >= since:
+                selected.append(row)
+            elif descending:
+                break
+    finally:
+        workbook.close()
+
+    return to_base_currency(clean_transactions(pd.DataFrame(selected, columns=columns)))
+
+
+def ingest_new_transactions(store: TransactionStore) -> int:
+    """
+    Дозагружает в хранилище операции, появившиеся в файле
+
+    Если хранилище еще не загружено, файл загружается целиком.
+    Разбираются только строки не старше последней загруженной даты;
+    строки с этой датой, которые уже есть в хранилище, отбрасываются.
+    Новые строки дописываются в хранилище (куб, индексы поиска
+    и отпечаток дополняются на месте), снимок и индекс на диске
+    перезаписываются.
+
+    Args:
+        store: Хранилище с путем к файлу
+
+    Returns:
+        Количество добавленных транзакций
+
+    Raises:
+        ValueError: Если у хранилища нет файла
+    """
+    if store.file_path is None:
+        raise ValueError("У хранилища нет файла для дозагрузки")
+
+    with store.lock:
+        current = store.peek()
+        if current is None:
+            store.get()
+            return 0
+
+        mark = high_water_mark(current)
+        key = source_key(store.file_path, with_hash=False)
+        candidates = read_new_rows(store.file_path, mark.last_date)
+        if candidates.empty:
+            store.touch()
+            return 0
+
+        keys = row_keys(candidates)
+        seen = Counter(mark.last_keys)
+        keep = np.ones(len(candidates), dtype=bool)
+        dates = candidates["Дата операции"].to_numpy()
+        for i, key in enumerate(keys.tolist()):
+            if dates[i] == mark.last_date and seen[key]:
+                seen[key] -= 1
+                keep[i] = False
+        new_rows = candidates[keep]
+
+        added = store.append(new_rows)
+        if added:
+            logger.info(f"Дозагружено транзакций: {added}")
+            _persist(store, key)
+        else:
+            store.touch()
+        return added
+
+
+def _persist(store: TransactionStore, key: Dict[str, Any]) -> None:
+    """
+    Перезаписывает снимок и индекс поиска после дозагрузки
+
+    Снимок хранит суммы как в выписке: перевод в базовую валюту
+    выполняется при каждой загрузке. Строки пишутся в порядке выписки
+    банка - от новых операций к старым (на этом порядке основан и
+    read_new_rows), поэтому load_transactions возвращает их так же,
+    как при разборе xlsx. Операции с одинаковой датой сохраняют
+    порядок хранилища: после перезагрузки строки получают те же
+    позиции, что и в сохраненном индексе. key - ключ файла, снятый
+    до чтения новых строк.
+    """
+    assert store.file_path is not None
+    frame = store.get()
+    dates = frame["Дата операции"].to_numpy(dtype="datetime64[ns]").view("int64")
+    source = frame.iloc[np.argsort(-dates, kind="stable")]
+    try:
+        save_snapshot(
+            original_amounts(source).reset_index(drop=True), store.file_path, key
+        )
+        text_index_for(store).save(
+            index_path(store.file_path), {**key, "rows": len(frame)}
+        )
+    except Exception as e:
+        logger.warning(f"Не удалось обновить файлы рядом с выпиской: {e}")
@@ -0,0 +1,167 @@
+import copy
+import inspect
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, TypeVar
+
+import numpy as np
+from pandas import DataFrame, Series
+
+from src.fingerprint import data_fingerprint
+
+T = TypeVar("T", bound=Any)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+def estimate_size(obj: Any) -> int:
+    """Приблизительный объем результата в памяти, байт"""
+    if isinstance(obj, DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class MemoCache:
+    """
+    LRU-кэш результатов, ограниченный объемом памяти
+
+    Ключ - отпечаток набора данных плюс остальные параметры вызова,
+    поэтому при изменении данных старые записи просто перестают
+    находиться и со временем вытесняются.
+    """
+
+    def __init__(
+        self, max_bytes: int = DEFAULT_MAX_BYTES, ttl: Optional[float] = None
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, ...], Tuple[Any, int, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[str, ...]) -> Tuple[bool, Any]:
+        """Возвращает (найдено, значение)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None:
+                if time.monotonic() - entry[2] > self.ttl:
+                    self._drop(key)
+                    self.evictions += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: Tuple[str, ...], value: Any) -> None:
+        """Сохраняет значение и вытесняет самые старые записи"""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def _drop(self, key: Tuple[str, ...]) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Очищает кэш и счетчики"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Счетчики попаданий, промахов и вытеснений"""
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.evictions, len(self._entries), self._bytes
+            )
+
+
+def memoize(
+    data_arg: str = "transactions",
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    ttl: Optional[float] = None,
+) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Декоратор кэширования результатов по отпечатку данных
+
+    Для TransactionStore отпечаток берется из кэша хранилища, поэтому
+    повторный вызов стоит микросекунды; для DataFrame и списка
+    отпечаток считается по содержимому при каждом вызове (один проход
+    хеширования), так что изменение данных на месте сбрасывает кэш.
+    У обернутой функции есть cache_info() и cache_clear().
+
+    Args:
+        data_arg: Имя параметра с данными
+        max_bytes: Предельный объем кэша
+        ttl: Время жизни записи в секундах (None - без ограничения)
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        signature = inspect.signature(func)
+        cache = MemoCache(max_bytes=max_bytes, ttl=ttl)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            try:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                params: Dict[str, Any] = dict(bound.arguments)
+                fingerprint = data_fingerprint(params.pop(data_arg))
+                key = (
+                    json.dumps(fingerprint, sort_keys=True),
+                    json.dumps(params, sort_keys=True, default=str),
+                )
+            except Exception:
+                return func(*args, **kwargs)
+
+            found, value = cache.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            return copy.copy(value)  # type: ignore[no-any-return]
+
+        wrapper.cache_info = cache.info  # type: ignore[attr-defined]
+        wrapper.cache_clear = cache.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
@@ -0,0 +1,308 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass, field
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import (Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar,
+                    cast)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_LIMIT = 10_000
+PREFIX = "bank"
+
+# None - еще не прочитано из Config.METRICS_ENABLED
+_enabled: Optional[bool] = None
+
+
+@dataclass
+class TimerStats:
+    """Накопленные замеры одной функции"""
+
+    calls: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+
+@dataclass
+class Registry:
+    """Таймеры, счетчики и последние вызовы для трассы"""
+
+    timers: Dict[str, TimerStats] = field(default_factory=dict)
+    counters: Dict[str, float] = field(default_factory=dict)
+    spans: Deque[Dict[str, Any]] = field(
+        default_factory=lambda: deque(maxlen=TRACE_LIMIT)
+    )
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+registry = Registry()
+
+
+def enable(on: bool = True) -> None:
+    """Включает или выключает сбор метрик"""
+    global _enabled
+    _enabled = on
+
+
+def _resolve() -> bool:
+    """Читает флаг из конфигурации при первом вызове инструментированной функции"""
+    global _enabled
+    if _enabled is None:
+        from src.config import Config
+
+        _enabled = Config.METRICS_ENABLED == "1"
+    return _enabled
+
+
+def is_enabled() -> bool:
+    """Включен ли сбор метрик"""
+    return _resolve()
+
+
+def reset() -> None:
+    """Очищает накопленные метрики"""
+    with registry.lock:
+        registry.timers.clear()
+        registry.counters.clear()
+        registry.spans.clear()
+
+
+def add(name: str, value: float = 1) -> None:
+    """Увеличивает счетчик (ничего не делает, если метрики выключены)"""
+    if not _enabled:
+        if _enabled is False or not _resolve():
+            return
+    with registry.lock:
+        registry.counters[name] = registry.counters.get(name, 0) + value
+
+
+def _size(result: Any) -> Tuple[int, int]:
+    """Количество строк и байт результата"""
+    memory_usage = getattr(result, "memory_usage", None)
+    if callable(memory_usage) and hasattr(result, "columns"):
+        return len(result), int(memory_usage(index=True, deep=False).sum())
+    if isinstance(result, (list, dict, tuple)):
+        return len(result), 0
+    return 0, 0
+
+
+def _record(name: str, started: float, ended: float, result: Any, failed: bool) -> None:
+    rows, size = _size(result)
+    elapsed = ended - started
+    with registry.lock:
+        stats = registry.timers.get(name)
+        if stats is None:
+            stats = registry.timers[name] = TimerStats()
+        stats.calls += 1
+        stats.errors += failed
+        stats.seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        stats.rows += rows
+        stats.bytes += size
+        registry.spans.append(
+            {
+                "name": name,
+                "ts": started,
+                "dur": elapsed,
+                "tid": threading.get_ident(),
+                "rows": rows,
+                "bytes": size,
+                "error": failed,
+            }
+        )
+
+
+def instrument(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Декоратор замера времени, строк и байт результата
+
+    Пока метрики выключены, обертка только проверяет флаг и вызывает
+    функцию. Поддерживаются обычные и async функции.
+
+    Args:
+        name: Имя метрики (по умолчанию модуль.функция)
+    """
+
+    def decorator(func: F) -> F:
+        metric = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if not _enabled:
+                    if _enabled is False or not _resolve():
+                        return await func(*args, **kwargs)
+                started = time.perf_counter()
+                result, failed = None, True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    _record(metric, started, time.perf_counter(), result, failed)
+
+            return cast(F, async_wrapper)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                if _enabled is False or not _resolve():
+                    return func(*args, **kwargs)
+            started = time.perf_counter()
+            result, failed = None, True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                _record(metric, started, time.perf_counter(), result, failed)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Текущие метрики
+
+    Returns:
+        {'timers': {имя: {...}}, 'counters': {имя: значение}}
+    """
+    with registry.lock:
+        return {
+            "timers": {k: vars(v).copy() for k, v in registry.timers.items()},
+            "counters": dict(registry.counters),
+        }
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus() -> str:
+    """Метрики в текстовом формате Prometheus"""
+    data = snapshot()
+    lines: List[str] = []
+    series = [
+        ("call_seconds_total", "counter", "seconds"),
+        ("call_seconds_max", "gauge", "max_seconds"),
+        ("calls_total", "counter", "calls"),
+        ("call_errors_total", "counter", "errors"),
+        ("call_rows_total", "counter", "rows"),
+        ("call_bytes_total", "counter", "bytes"),
+    ]
+    for metric, kind, key in series:
+        lines.append(f"# TYPE {PREFIX}_{metric} {kind}")
+        for name, stats in sorted(data["timers"].items()):
+            lines.append(f'{PREFIX}_{metric}{{name="{_label(name)}"}} {stats[key]}')
+    if data["counters"]:
+        lines.append(f"# TYPE {PREFIX}_events_total counter")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f'{PREFIX}_events_total{{name="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    """
+    Записывает метрики для textfile collector node_exporter
+
+    Файл заменяется атомарно, чтобы сборщик не прочитал его наполовину.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+def write_trace(path: str) -> None:
+    """
+    Записывает последние вызовы в формате Chrome Trace Event
+
+    Файл открывается в chrome://tracing или Perfetto.
+    """
+    with registry.lock:
+        spans = list(registry.spans)
+    events = [
+        {
+            "name": span["name"],
+            "ph": "X",
+            "ts": round(span["ts"] * 1e6, 3),
+            "dur": round(span["dur"] * 1e6, 3),
+            "pid": os.getpid(),
+            "tid": span["tid"],
+            "args": {k: span[k] for k in ("rows", "bytes", "error")},
+        }
+        for span in spans
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events}, f, ensure_ascii=False)
+
+
+@dataclass
+class Profile:
+    """Результат profile_call"""
+
+    result: Any
+    seconds: float
+    stats: str
+    peak_bytes: int
+    top_allocations: List[str]
+
+
+def profile_call(
+    func: Callable[..., Any],
+    *args: Any,
+    sort: str = "cumulative",
+    limit: int = 25,
+    **kwargs: Any,
+) -> Profile:
+    """
+    Выполняет один вызов под cProfile и tracemalloc
+
+    Args:
+        func: Вызываемая функция
+        *args: Позиционные аргументы функции
+        sort: Порядок сортировки pstats
+        limit: Сколько строк профиля и мест выделения памяти оставить
+        **kwargs: Именованные аргументы функции
+
+    Returns:
+        Profile с результатом вызова, текстом профиля и пиком памяти
+    """
+    profiler = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        allocations = tracemalloc.take_snapshot().statistics("lineno")[:limit]
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(limit)
+    return Profile(
+        result=result,
+        seconds=seconds,
+        stats=out.getvalue(),
+        peak_bytes=peak,
+        top_allocations=[str(stat) for stat in allocations],
+    )
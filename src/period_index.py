@@ -0,0 +1,254 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.store import Transactions, TransactionStore, as_dataframe
+from src.utils import index_by_date, period_bounds
+
+# Сколько крупнейших операций хранится для каждого дня и месяца
+TOP_K = 10
+DATE_RANGES = ("W", "M", "Y", "ALL")
+
+DateLike = Union[str, date, datetime]
+
+
+def period_to_date(
+    date_time: DateLike, date_range: str = "M"
+) -> Tuple[Optional[pd.Timestamp], pd.Timestamp]:
+    """
+    Период от начала недели, месяца или года до указанного момента
+
+    Args:
+        date_time: Конец периода (включительно)
+        date_range: 'W', 'M', 'Y' или 'ALL' (вся история до date_time)
+
+    Returns:
+        Кортеж (начало или None для 'ALL', конец)
+
+    Raises:
+        ValueError: При некорректном диапазоне
+    """
+    end = pd.Timestamp(date_time)
+    if date_range == "ALL":
+        return None, end
+    if date_range not in DATE_RANGES:
+        raise ValueError(f"Некорректный диапазон: {date_range}")
+    start, _ = period_bounds(end, date_range)
+    return start, end
+
+
+def _full_groups(starts: np.ndarray, lo: int, hi: int) -> Tuple[int, int]:
+    """Группы (дни или месяцы), целиком лежащие в строках [lo, hi)"""
+    first = int(np.searchsorted(starts[:-1], lo, side="left"))
+    last = int(np.searchsorted(starts[1:], hi, side="right"))
+    return first, max(first, last)
+
+
+def _top_by_group(
+    amounts: np.ndarray, starts: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Позиции k крупнейших сумм в каждой группе подряд идущих строк
+
+    Returns:
+        (позиции, границы групп в массиве позиций)
+    """
+    sizes = np.diff(starts)
+    codes = np.repeat(np.arange(len(sizes)), sizes)
+    rows = np.arange(len(amounts))
+    order = np.lexsort((rows, -amounts, codes))
+    rank = rows - starts[codes[order]]
+    offsets = np.concatenate(([0], np.cumsum(np.minimum(sizes, k))))
+    return order[rank < k], offsets
+
+
+class PeriodIndex:
+    """
+    Итоги и крупнейшие операции за любой период без обхода строк
+
+    Строится по транзакциям, отсортированным по дате. Для каждого дня
+    хранятся накопленные суммы и количества доходов и расходов, для
+    каждого дня и месяца - позиции TOP_K крупнейших операций. Период
+    раскладывается на целые месяцы, целые дни и неполные крайние дни:
+    итоги берутся разностью накопленных сумм, крупнейшие операции
+    выбираются из заранее отобранных кандидатов, и только строки
+    неполного дня просматриваются напрямую.
+    """
+
+    def __init__(self, frame: DataFrame, top_k: int = TOP_K) -> None:
+        self.frame = frame
+        self.top_k = top_k
+        if frame.empty or "Дата операции" not in frame.columns:
+            times = np.empty(0, dtype="datetime64[ns]")
+            amounts = np.empty(0, dtype=float)
+        else:
+            times = frame["Дата операции"].to_numpy(dtype="datetime64[ns]")
+            amounts = pd.to_numeric(frame["Сумма операции"]).to_numpy(dtype=float)
+        self._times = times
+        self._amounts = amounts
+
+        n = len(amounts)
+        days = times.astype("datetime64[D]")
+        _, day_starts = np.unique(days, return_index=True)
+        _, month_starts = np.unique(days.astype("datetime64[M]"), return_index=True)
+        self._day_starts = np.append(day_starts, n)
+        self._month_starts = np.append(month_starts, n)
+
+        income = amounts > 0
+        expense = amounts < 0
+        self._prefix = {
+            "income_total": self._day_prefix(np.where(income, amounts, 0.0)),
+            "income_count": self._day_prefix(income.astype(float)),
+            "expense_total": self._day_prefix(np.where(expense, amounts, 0.0)),
+            "expense_count": self._day_prefix(expense.astype(float)),
+        }
+        self._day_top = _top_by_group(amounts, self._day_starts, top_k)
+        self._month_top = _top_by_group(amounts, self._month_starts, top_k)
+
+    @classmethod
+    def build(cls, df: DataFrame) -> "PeriodIndex":
+        """Строит индекс по транзакциям в любом порядке"""
+        if df.empty or "Дата операции" not in df.columns:
+            return cls(df)
+        return cls(index_by_date(df))
+
+    def _day_prefix(self, values: np.ndarray) -> np.ndarray:
+        """Накопленные по дням суммы: prefix[d] - сумма за дни до d"""
+        if not len(values):
+            return np.zeros(1)
+        per_day = np.add.reduceat(values, self._day_starts[:-1])
+        return np.concatenate(([0.0], np.cumsum(per_day)))
+
+    def _rows(self, start: Optional[DateLike], end: DateLike) -> Tuple[int, int]:
+        """Строки [lo, hi) с датой в [start, end]"""
+        lo = 0
+        if start is not None:
+            lo = int(
+                np.searchsorted(self._times, np.datetime64(pd.Timestamp(start)), "left")
+            )
+        hi = int(
+            np.searchsorted(self._times, np.datetime64(pd.Timestamp(end)), "right")
+        )
+        return lo, max(lo, hi)
+
+    def totals(self, start: Optional[DateLike], end: DateLike) -> Dict[str, Any]:
+        """
+        Суммы и количества доходов и расходов за период
+
+        Args:
+            start: Начало периода (None - с начала данных)
+            end: Конец периода включительно
+
+        Returns:
+            {'expenses': {'total_amount', 'count'}, 'income': {...}}
+        """
+        lo, hi = self._rows(start, end)
+        first, last = _full_groups(self._day_starts, lo, hi)
+        if first < last:
+            edges = [
+                (lo, int(self._day_starts[first])),
+                (int(self._day_starts[last]), hi),
+            ]
+        else:
+            edges = [(lo, hi)]
+
+        result: Dict[str, float] = {
+            name: float(prefix[last] - prefix[first])
+            for name, prefix in self._prefix.items()
+        }
+        for a, b in edges:
+            part = self._amounts[a:b]
+            result["income_total"] += float(part[part > 0].sum())
+            result["income_count"] += int((part > 0).sum())
+            result["expense_total"] += float(part[part < 0].sum())
+            result["expense_count"] += int((part < 0).sum())
+        return {
+            "expenses": {
+                "total_amount": result["expense_total"],
+                "count": int(result["expense_count"]),
+            },
+            "income": {
+                "total_amount": result["income_total"],
+                "count": int(result["income_count"]),
+            },
+        }
+
+    def _candidates(self, lo: int, hi: int) -> np.ndarray:
+        """Позиции, среди которых есть top_k крупнейших операций строк [lo, hi)"""
+        parts: List[np.ndarray] = []
+        month_top, month_offsets = self._month_top
+        first, last = _full_groups(self._month_starts, lo, hi)
+        if first < last:
+            parts.append(month_top[month_offsets[first]:month_offsets[last]])
+            segments = [
+                (lo, int(self._month_starts[first])),
+                (int(self._month_starts[last]), hi),
+            ]
+        else:
+            segments = [(lo, hi)]
+
+        day_top, day_offsets = self._day_top
+        for a, b in segments:
+            if a >= b:
+                continue
+            first, last = _full_groups(self._day_starts, a, b)
+            if first < last:
+                parts.append(day_top[day_offsets[first]:day_offsets[last]])
+                parts.append(np.arange(a, self._day_starts[first]))
+                parts.append(np.arange(self._day_starts[last], b))
+            else:
+                parts.append(np.arange(a, b))
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts).astype(np.int64)
+
+    def top_positions(
+        self, start: Optional[DateLike], end: DateLike, n: int = 5
+    ) -> np.ndarray:
+        """
+        Позиции n операций с наибольшей суммой за период
+
+        При равных суммах раньше идет более ранняя операция.
+
+        Args:
+            start: Начало периода (None - с начала данных)
+            end: Конец периода включительно
+            n: Количество операций
+
+        Returns:
+            Позиции строк frame по убыванию суммы
+        """
+        lo, hi = self._rows(start, end)
+        if n > self.top_k:
+            candidates = np.arange(lo, hi)
+        else:
+            candidates = self._candidates(lo, hi)
+        order = np.lexsort((candidates, -self._amounts[candidates]))
+        return candidates[order[:n]]
+
+    def top(
+        self, start: Optional[DateLike], end: DateLike, n: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Операции с наибольшей суммой за период в виде списка словарей"""
+        positions = self.top_positions(start, end, n)
+        return self.frame.iloc[positions].to_dict("records")
+
+
+def period_index_for(transactions: Transactions) -> PeriodIndex:
+    """
+    Возвращает индекс периодов для транзакций
+
+    Для TransactionStore индекс строится один раз на версию данных.
+
+    Args:
+        transactions: Список транзакций, DataFrame или TransactionStore
+
+    Returns:
+        PeriodIndex
+    """
+    if isinstance(transactions, TransactionStore):
+        return transactions.derived("period_index", PeriodIndex.build)
+    return PeriodIndex.build(as_dataframe(transactions, copy=False))
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import date
+from typing import (Any, Awaitable, Callable, Dict, List, Optional, Sequence,
+                    Tuple)
+
+import aiohttp
+
+from src.config import Config
+from src.metrics import add, instrument
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300.0
+DEFAULT_TIMEOUT = 5.0
+
+CacheKey = Tuple[str, str]
+
+
+class QuoteClient:
+    """
+    Асинхронный клиент курсов валют и цен акций
+
+    Все запросы идут через одну сессию aiohttp с пулом соединений.
+    Значения кэшируются по каждому символу на ttl секунд. Одновременные
+    запросы одного символа объединяются в один сетевой запрос. Если
+    значение устарело, сразу возвращается старое, а обновление идет
+    в фоне; при ошибке или таймауте остается последнее известное значение.
+    Курсы на прошедшие даты (history_url) не меняются и кэшируются
+    без срока.
+    """
+
+    def __init__(
+        self,
+        exchange_url: str,
+        stock_url: str,
+        stock_api_key: Optional[str] = None,
+        ttl: float = DEFAULT_TTL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = 20,
+        history_url: Optional[str] = None,
+    ) -> None:
+        self.exchange_url = exchange_url
+        self.stock_url = stock_url
+        self.history_url = history_url
+        self.stock_api_key = stock_api_key
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.requests_made = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: Dict[CacheKey, Tuple[Any, float]] = {}
+        self._inflight: Dict[CacheKey, "asyncio.Task[Any]"] = {}
+        self._history: Dict[date, Dict[str, float]] = {}
+
+    async def __aenter__(self) -> "QuoteClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Закрывает сессию и ее соединения"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @instrument("quotes.fetch")
+    async def _fetch_json(
+        self, url: str, params: Optional[Dict[str, str]] = None
+    ) -> Any:
+        self.requests_made += 1
+        async with self._get_session().get(url, params=params) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def _fetch_exchange(self) -> Dict[str, float]:
+        """Курсы всех валют к рублю одним запросом"""
+        return _rub_rates(await self._fetch_json(self.exchange_url))
+
+    async def _fetch_stock(self, symbol: str) -> float:
+        params = {"symbols": symbol}
+        if self.stock_api_key:
+            params["api_token"] = self.stock_api_key
+        data = await self._fetch_json(self.stock_url, params)
+        return float(data["data"][0]["price"])
+
+    def _refresh(
+        self, key: CacheKey, loader: Callable[[], Awaitable[Any]]
+    ) -> "asyncio.Task[Any]":
+        """Запускает загрузку ключа или возвращает уже идущую"""
+        task = self._inflight.get(key)
+        if task is not None:
+            return task
+
+        async def run() -> Any:
+            try:
+                value = await loader()
+                self._cache[key] = (value, time.monotonic())
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        task.add_done_callback(_log_failure)
+        self._inflight[key] = task
+        return task
+
+    async def _cached(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            add("quotes.cache_hit")
+            return entry[0]
+
+        task = self._refresh(key, loader)
+        if entry is not None:
+            add("quotes.cache_stale")
+            return entry[0]
+        add("quotes.cache_miss")
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except Exception as e:
+            logger.warning(f"Котировка {key[1]} недоступна: {e}")
+            return None
+
+    async def _currency_rate(self, currency: str) -> Optional[float]:
+        async def load() -> Optional[float]:
+            rates = await self._refresh(("exchange", "*"), self._fetch_exchange)
+            return rates.get(currency)
+
+        rate: Optional[float] = await self._cached(("currency", currency), load)
+        return rate
+
+    async def _stock_price(self, symbol: str) -> Optional[float]:
+        price: Optional[float] = await self._cached(
+            ("stock", symbol), lambda: self._fetch_stock(symbol)
+        )
+        return price
+
+    async def get_currency_rates(
+        self, currencies: Sequence[str]
+    ) -> List[Dict[str, Any]]:
+        """Курсы валют к рублю: [{'currency', 'rate'}]"""
+        rates = await asyncio.gather(*(self._currency_rate(c) for c in currencies))
+        return [{"currency": c, "rate": r} for c, r in zip(currencies, rates)]
+
+    async def get_stock_prices(self, stocks: Sequence[str]) -> List[Dict[str, Any]]:
+        """Цены акций: [{'stock', 'price'}]"""
+        prices = await asyncio.gather(*(self._stock_price(s) for s in stocks))
+        return [{"stock": s, "price": p} for s, p in zip(stocks, prices)]
+
+    async def get_quotes(
+        self, currencies: Sequence[str], stocks: Sequence[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Курсы валют и цены акций одновременно"""
+        rates, prices = await asyncio.gather(
+            self.get_currency_rates(currencies), self.get_stock_prices(stocks)
+        )
+        return rates, prices
+
+    async def get_historical_rates(
+        self, currencies: Sequence[str], day: date
+    ) -> List[Dict[str, Any]]:
+        """
+        Курсы валют к рублю на прошедшую дату: [{'currency', 'rate'}]
+
+        Raises:
+            ValueError: Если history_url не задан
+        """
+        if not self.history_url:
+            raise ValueError("Адрес истории курсов не задан")
+        rates = self._history.get(day)
+        if rates is None:
+            url = self.history_url.format(date=day.isoformat())
+            rates = _rub_rates(await self._fetch_json(url))
+            self._history[day] = rates
+        return [{"currency": c, "rate": rates.get(c)} for c in currencies]
+
+
+def _rub_rates(data: Any) -> Dict[str, float]:
+    """Рублей за единицу валюты из ответа exchangerate-api с базой RUB"""
+    return {
+        str(currency): 1 / float(rate)
+        for currency, rate in data["rates"].items()
+        if rate
+    }
+
+
+def _log_failure(task: "asyncio.Task[Any]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Ошибка обновления котировки: {task.exception()}")
+
+
+class QuoteService:
+    """
+    Синхронный доступ к QuoteClient из обычного кода
+
+    Клиент живет в отдельном потоке со своим циклом событий, поэтому
+    пул соединений и кэш сохраняются между вызовами.
+    """
+
+    def __init__(self, client: QuoteClient) -> None:
+        self.client = client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="quotes", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, coro: Awaitable[Any]) -> Any:
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)  # type: ignore[arg-type]
+        return future.result(self.client.timeout * 2)
+
+    def quotes(
+        self, currencies: Sequence[str], stocks: Sequence[str]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Курсы валют и цены акций одним параллельным запросом"""
+        result: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]] = self._run(
+            self.client.get_quotes(currencies, stocks)
+        )
+        return result
+
+    def historical_rates(
+        self, currencies: Sequence[str], day: date
+    ) -> List[Dict[str, Any]]:
+        """Курсы валют к рублю на прошедшую дату"""
+        rates: List[Dict[str, Any]] = self._run(
+            self.client.get_historical_rates(currencies, day)
+        )
+        return rates
+
+    def close(self) -> None:
+        """Закрывает клиента и останавливает поток"""
+        self._run(self.client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_service: Optional[QuoteService] = None
+_service_lock = threading.Lock()
+
+
+def default_quote_service() -> Optional[QuoteService]:
+    """
+    Общий сервис котировок по настройкам Config
+
+    Returns:
+        QuoteService или None, если адреса API не заданы
+    """
+    global _service
+    if not Config.EXCHANGE_API_URL or not Config.STOCK_API_URL:
+        return None
+    with _service_lock:
+        if _service is None:
+            _service = QuoteService(
+                QuoteClient(
+                    Config.EXCHANGE_API_URL,
+                    Config.STOCK_API_URL,
+                    Config.STOCK_API_KEY,
+                    history_url=Config.EXCHANGE_HISTORY_URL,
+                )
+            )
+        return _service
@@ -1,10 +1,18 @@
-import json
+import inspect
 import logging
 from datetime import datetime
 from functools import wraps
-from typing import Any, Callable, Dict, Optional, TypeVar
+from typing import Any, Callable, Dict, Iterable, Optional, TypeVar, Union
 
-from pandas import DataFrame
+from pandas import DataFrame, Series
+
+from src.audit import get_writer
+from src.cube import cube_for
+from src.fingerprint import data_fingerprint
+from src.memo import memoize
+from src.metrics import instrument
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore, as_dataframe
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,10 +20,42 @@ logger = logging.getLogger(__name__)
 T = TypeVar("T", bound=Any)
 
 
+def _report_record(
+    func: Callable[..., Any], args: Any, kwargs: Any, result: Any
+) -> Dict[str, Any]:
+    """
+    Компактная запись об отчете: отпечаток данных вместо их текста
+
+    Отпечаток хранилища берется из того же кэша, что и в memoize,
+    поэтому данные повторно не хешируются. Запись, включая результат,
+    сериализуется сразу при постановке в очередь (см. AuditWriter.write),
+    так что последующие изменения результата в нее не попадают.
+    """
+    params = dict(inspect.signature(func).bind(*args, **kwargs).arguments)
+    data = params.pop(next(iter(params)), None) if params else None
+    try:
+        fingerprint: Any = data_fingerprint(data)
+    except Exception as e:
+        fingerprint = {"error": str(e)}
+    return {
+        "function": func.__name__,
+        "timestamp": datetime.now().isoformat(),
+        "input": fingerprint,
+        "params": params,
+        "result": result,
+    }
+
+
 def report_decorator(
     filename: Optional[str] = None,
 ) -> Callable[[Callable[..., T]], Callable[..., T]]:
-    """Декоратор для сохранения отчетов"""
+    """
+    Декоратор для сохранения отчетов
+
+    Запись содержит имя функции, отпечаток входных данных (размер и хеш),
+    остальные параметры и результат. Файл пишется фоновым потоком
+    (см. src.audit) и ограничен по размеру.
+    """
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
@@ -24,17 +64,9 @@ def report_decorator(
                 result = func(*args, **kwargs)
 
                 if filename:
-                    report_data = {
-                        "function": func.__name__,
-                        "timestamp": datetime.now().isoformat(),
-                        "args": str(args),
-                        "kwargs": str(kwargs),
-                        "result": str(result),
-                    }
-
-                    with open(filename, "a", encoding="utf-8") as f:
-                        json.dump(report_data, f, ensure_ascii=False)
-                        f.write("\n")
+                    get_writer(filename).write(
+                        _report_record(func, args, kwargs, result)
+                    )
 
                 return result
             except Exception as e:
@@ -46,92 +78,192 @@ def report_decorator(
     return decorator
 
 
+@instrument()
 @report_decorator()
-def spending_by_category(transactions: DataFrame, category: str) -> Dict[str, float]:
+@memoize()
+def spending_by_category(
+    transactions: Union[DataFrame, TransactionStore, SQLiteStore], category: str
+) -> Dict[str, float]:
     """
     Рассчитывает расходы по указанной категории
 
     Args:
-        transactions: DataFrame с транзакциями
+        transactions: DataFrame с транзакциями, TransactionStore или SQLiteStore
         category: Категория для анализа
 
     Returns:
-        Словарь {дата: сумма}
+        Словарь {дата: сумма за день}
     """
     try:
-        if (
-            "Категория" not in transactions.columns
-            or "Дата операции" not in transactions.columns
-        ):
-            return {}
-
-        filtered = transactions[transactions["Категория"] == category]
-        if filtered.empty:
+        if isinstance(transactions, SQLiteStore):
+            return transactions.spending_by_category(category)
+        columns = as_dataframe(transactions, copy=False).columns
+        if "Категория" not in columns or "Дата операции" not in columns:
             return {}
 
-        return {
-            str(k.date()): float(v)
-            for k, v in filtered.groupby("Дата операции")["Сумма операции"]
-            .sum()
-            .to_dict()
-            .items()
-        }
+        totals = cube_for(transactions).total_by(["day"], category=category)
+        return {str(k.date()): float(v) for k, v in totals.items()}
     except Exception as e:
         logger.error(f"Ошибка в spending_by_category: {e}")
         return {}
 
 
+@instrument()
 @report_decorator()
-def spending_by_weekday(transactions: DataFrame) -> Dict[int, float]:
+@memoize()
+def spending_by_weekday(
+    transactions: Union[DataFrame, TransactionStore, SQLiteStore]
+) -> Dict[int, float]:
     """
     Анализирует расходы по дням недели
 
     Args:
-        transactions: DataFrame с транзакциями
+        transactions: DataFrame с транзакциями, TransactionStore или SQLiteStore
 
     Returns:
         Словарь {день_недели: сумма} (0-пн, 6-вс)
     """
     try:
-        if "Дата операции" not in transactions.columns:
+        if isinstance(transactions, SQLiteStore):
+            return transactions.spending_by_weekday()
+        if "Дата операции" not in as_dataframe(transactions, copy=False).columns:
             return {}
 
-        transactions = transactions.copy()
-        transactions["weekday"] = transactions["Дата операции"].dt.weekday
-        return {
-            int(k): float(v)
-            for k, v in transactions.groupby("weekday")["Сумма операции"]
-            .sum()
-            .to_dict()
-            .items()
-        }
+        totals = cube_for(transactions).total_by(["weekday"])
+        return {int(k): float(v) for k, v in totals.items()}
     except Exception as e:
         logger.error(f"Ошибка в spending_by_weekday: {e}")
         return {}
 
 
+@instrument()
 @report_decorator(filename="workday_spending_report.json")
-def spending_by_workday(transactions: DataFrame) -> Dict[str, float]:
+@memoize()
+def spending_by_workday(
+    transactions: Union[DataFrame, TransactionStore, SQLiteStore]
+) -> Dict[str, float]:
     """
     Сравнивает расходы в рабочие дни и выходные
 
     Args:
-        transactions: DataFrame с транзакциями
+        transactions: DataFrame с транзакциями, TransactionStore или SQLiteStore
 
     Returns:
         Словарь {'weekdays': сумма, 'weekends': сумма}
     """
     try:
-        if "Дата операции" not in transactions.columns:
+        if isinstance(transactions, SQLiteStore):
+            return transactions.spending_by_workday()
+        if "Дата операции" not in as_dataframe(transactions, copy=False).columns:
             return {"weekdays": 0.0, "weekends": 0.0}
 
-        transactions = transactions.copy()
-        transactions["is_weekday"] = transactions["Дата операции"].dt.weekday < 5
-        grouped = transactions.groupby("is_weekday")["Сумма операции"].sum()
+        totals = cube_for(transactions).total_by(["weekday"])
         return {
-            "weekdays": float(grouped.get(True, 0)),
-            "weekends": float(grouped.get(False, 0)),
+            "weekdays": float(totals[totals.index < 5].sum()),
+            "weekends": float(totals[totals.index >= 5].sum()),
         }
     except Exception as e:
         logger.error(f"Ошибка в spending_by_workday: {e}")
         return {"weekdays": 0.0, "weekends": 0.0}
+
+
+def _accumulate(total: Optional[Series], part: Series) -> Series:
+    """Складывает частичные суммы по совпадающим ключам"""
+    if total is None:
+        return part
+    return total.add(part, fill_value=0)
+
+
+@instrument()
+@report_decorator()
+def spending_by_category_chunked(
+    chunks: Iterable[DataFrame], category: str
+) -> Dict[str, float]:
+    """
+    Расходы по категории, накопленные по частям
+
+    Args:
+        chunks: Части транзакций (например, из iter_transaction_chunks)
+        category: Категория для анализа
+
+    Returns:
+        Словарь {дата: сумма}, как в spending_by_category
+    """
+    try:
+        total: Optional[Series] = None
+        for chunk in chunks:
+            if (
+                "Категория" not in chunk.columns
+                or "Дата операции" not in chunk.columns
+            ):
+                continue
+            filtered = chunk[chunk["Категория"] == category]
+            if filtered.empty:
+                continue
+            days = filtered["Дата операции"].dt.normalize()
+            part = filtered.groupby(days)["Сумма операции"].sum()
+            total = _accumulate(total, part)
+
+        if total is None:
+            return {}
+        return {str(k.date()): float(v) for k, v in total.sort_index().items()}
+    except Exception as e:
+        logger.error(f"Ошибка в spending_by_category_chunked: {e}")
+        return {}
+
+
+@instrument()
+@report_decorator()
+def spending_by_weekday_chunked(chunks: Iterable[DataFrame]) -> Dict[int, float]:
+    """
+    Расходы по дням недели, накопленные по частям
+
+    Args:
+        chunks: Части транзакций
+
+    Returns:
+        Словарь {день_недели: сумма} (0-пн, 6-вс)
+    """
+    try:
+        total: Optional[Series] = None
+        for chunk in chunks:
+            if "Дата операции" not in chunk.columns or chunk.empty:
+                continue
+            part = chunk.groupby(chunk["Дата операции"].dt.weekday)[
+                "Сумма операции"
+            ].sum()
+            total = _accumulate(total, part)
+
+        if total is None:
+            return {}
+        return {int(k): float(v) for k, v in total.sort_index().items()}
+    except Exception as e:
+        logger.error(f"Ошибка в spending_by_weekday_chunked: {e}")
+        return {}
+
+
+@instrument()
+@report_decorator()
+def spending_by_workday_chunked(chunks: Iterable[DataFrame]) -> Dict[str, float]:
+    """
+    Расходы в рабочие дни и выходные, накопленные по частям
+
+    Args:
+        chunks: Части транзакций
+
+    Returns:
+        Словарь {'weekdays': сумма, 'weekends': сумма}
+    """
+    result = {"weekdays": 0.0, "weekends": 0.0}
+    try:
+        for chunk in chunks:
+            if "Дата операции" not in chunk.columns or chunk.empty:
+                continue
+            is_weekday = chunk["Дата операции"].dt.weekday < 5
+            amounts = chunk["Сумма операции"]
+            result["weekdays"] += float(amounts[is_weekday].sum())
+            result["weekends"] += float(amounts[~is_weekday].sum())
+        return result
+    except Exception as e:
+        logger.error(f"Ошибка в spending_by_workday_chunked: {e}")
+        return {"weekdays": 0.0, "weekends": 0.0}
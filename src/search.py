@@ -0,0 +1,395 @@
+import logging
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from src.snapshot import source_key
+from src.store import Transactions, TransactionStore, as_dataframe
+from src.text_index import InvertedIndex, index_path
+from src.utils import PHONE_COLUMN, extract_phone_numbers, normalize_phone
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_WORD = "перевод"
+TRANSFER_EXCLUDE = ("банк", "организация")
+
+_SEPARATOR = "\x00"
+# Подстроки короче длины триграммы ищутся сканированием колонки
+MIN_INDEXED_LENGTH = 3
+
+
+class SearchEngine:
+    """
+    Поиск по колонке "Описание" без обхода строк в Python
+
+    Описания приводятся к нижнему регистру один раз при построении и
+    склеиваются в общий текст, по которому подстроки ищутся одним
+    регулярным выражением, а найденные смещения переводятся в номера
+    строк одним searchsorted. Подстроки короче MIN_INDEXED_LENGTH
+    встречаются почти везде и ищутся str.contains по колонке. Если
+    передан InvertedIndex, подстроки ищутся по нему: он проверяет
+    каждое различное описание один раз, а описания строк в нижнем
+    регистре движок берет из индекса, а не хранит свою копию. Методы
+    возвращают номера строк (позиции для iloc); сами строки
+    материализуются только через take().
+    """
+
+    def __init__(
+        self,
+        descriptions: Sequence[Any],
+        frame: Optional[DataFrame] = None,
+        index: Optional[InvertedIndex] = None,
+        phones: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.frame = frame
+        self.index = index
+        self._raw = pd.Series([str(v) for v in descriptions], dtype=object)
+        self._phones = None if phones is None else np.asarray(phones, dtype=object)
+        shared = self._shared_lower()
+        if shared is None:
+            self._lower = self._raw.str.lower()
+            lengths = self._lower.str.len().to_numpy(dtype=np.int64) + 1
+        else:
+            self._lower = shared
+            lengths = self.index.lengths() + 1  # type: ignore[union-attr]
+        self._text = _SEPARATOR.join(self._lower) + _SEPARATOR
+        self._offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    @classmethod
+    def from_frame(
+        cls, df: DataFrame, index: Optional[InvertedIndex] = None
+    ) -> "SearchEngine":
+        """Строит движок по DataFrame с колонкой "Описание" """
+        phones = df[PHONE_COLUMN].tolist() if PHONE_COLUMN in df.columns else None
+        return cls(_descriptions(df), frame=df, index=index, phones=phones)
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def _shared_lower(self) -> Optional[Series]:
+        """Описания в нижнем регистре из индекса, если он по тем же строкам"""
+        if self.index is not None and len(self.index) == len(self._raw):
+            return self.index.lower
+        return None
+
+    def extend(self, rows: DataFrame, frame: Optional[DataFrame] = None) -> None:
+        """
+        Дописывает в движок строки, добавленные в конец данных
+
+        Args:
+            rows: Новые транзакции
+            frame: Полный DataFrame после добавления
+        """
+        raw = pd.Series([str(v) for v in _descriptions(rows)], dtype=object)
+        lower = raw.str.lower()
+        lengths = lower.str.len().to_numpy(dtype=np.int64) + 1
+
+        self._raw = pd.concat([self._raw, raw], ignore_index=True)
+        shared = self._shared_lower()
+        if shared is None:
+            shared = pd.concat([self._lower, lower], ignore_index=True)
+        self._lower = shared
+        self._text += "".join(text + _SEPARATOR for text in lower)
+        self._offsets = np.concatenate(
+            (self._offsets, self._offsets[-1] + np.cumsum(lengths))
+        )
+        if self._phones is not None:
+            self._phones = np.concatenate(
+                (self._phones, _phones_of(rows).to_numpy(dtype=object))
+            )
+        self.frame = frame
+
+    def contains(self, query: str) -> np.ndarray:
+        """
+        Позиции строк, в описании которых есть подстрока (без учета регистра)
+
+        Args:
+            query: Строка для поиска
+
+        Returns:
+            Отсортированный массив позиций
+        """
+        needle = query.lower()
+        if not needle:
+            return np.arange(len(self), dtype=np.int64)
+        if self.index is not None and _SEPARATOR not in needle:
+            return self.index.substring(needle)
+        if _SEPARATOR in needle or len(needle) < MIN_INDEXED_LENGTH:
+            # Короткие подстроки встречаются почти в каждой строке
+            return np.flatnonzero(
+                self._lower.str.contains(needle, regex=False).to_numpy()
+            )
+
+        starts = [m.start() for m in re.finditer(re.escape(needle), self._text)]
+        rows = np.searchsorted(self._offsets, starts, side="right") - 1
+        return np.unique(rows).astype(np.int64)
+
+    def contains_many(self, queries: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Выполняет несколько запросов по одному подготовленному тексту
+
+        Общим для запросов остается только подготовка: текст и индекс
+        строятся один раз. Каждый запрос - отдельный просмотр: поиск
+        одной подстроки по общему тексту или кандидатам индекса.
+        Объединенное выражение (альтернатива в опережающей проверке, с
+        перекрывающимися вхождениями) проходит текст один раз, но в
+        3-6 раз медленнее: модуль re ищет быстро только одиночную
+        подстроку, а альтернативу проверяет в каждой позиции текста.
+
+        Args:
+            queries: Строки для поиска
+
+        Returns:
+            Словарь {запрос: позиции}
+        """
+        return {query: self.contains(query) for query in dict.fromkeys(queries)}
+
+    def phones(self) -> np.ndarray:
+        """Нормализованные номера телефонов по строкам ("" - номера нет)"""
+        if self._phones is None:
+            self._phones = extract_phone_numbers(self._raw).to_numpy(dtype=object)
+        return self._phones
+
+    def phone_positions(self) -> np.ndarray:
+        """Позиции строк с номером телефона в описании"""
+        return np.flatnonzero(self.phones() != "")
+
+    def person_transfer_positions(self) -> np.ndarray:
+        """Позиции переводов физическим лицам"""
+        mask = self._lower.str.contains(TRANSFER_WORD, regex=False)
+        for word in TRANSFER_EXCLUDE:
+            mask &= ~self._lower.str.contains(word, regex=False)
+        return np.flatnonzero(mask.to_numpy(dtype=bool))
+
+    def take(self, positions: np.ndarray) -> DataFrame:
+        """Материализует найденные строки"""
+        if self.frame is None:
+            raise ValueError("Движок построен без DataFrame")
+        return self.frame.iloc[positions]
+
+
+class PhoneIndex:
+    """
+    Хеш-индекс номер телефона -> позиции строк
+
+    Строится по колонке нормализованных номеров, поэтому поиск
+    переводов на номер и итоги по номерам не требуют регулярных выражений.
+    """
+
+    def __init__(
+        self, phones: Sequence[str], amounts: Optional[Sequence[float]] = None
+    ) -> None:
+        values = np.asarray(phones, dtype=object)
+        rows = np.flatnonzero(values != "")
+        groups = pd.Series(values[rows], dtype=object).groupby(
+            values[rows], sort=False
+        )
+        self._positions: Dict[str, np.ndarray] = {
+            str(phone): rows[idx] for phone, idx in groups.indices.items()
+        }
+        self._amounts = None if amounts is None else np.asarray(amounts, dtype=float)
+
+    @classmethod
+    def from_frame(cls, df: DataFrame) -> "PhoneIndex":
+        """Строит индекс по DataFrame с транзакциями"""
+        return cls(_phones_of(df).tolist(), _amounts_of(df))
+
+    def extend(self, rows: DataFrame) -> None:
+        """
+        Дописывает в индекс строки, добавленные в конец данных
+
+        Args:
+            rows: Новые транзакции
+        """
+        base = 0 if self._amounts is None else len(self._amounts)
+        added = PhoneIndex(_phones_of(rows).tolist(), _amounts_of(rows))
+        for phone, positions in added._positions.items():
+            current = self._positions.get(phone)
+            shifted = positions + base
+            self._positions[phone] = (
+                shifted if current is None else np.concatenate((current, shifted))
+            )
+        if self._amounts is not None and added._amounts is not None:
+            self._amounts = np.concatenate((self._amounts, added._amounts))
+
+    def __contains__(self, phone: str) -> bool:
+        return normalize_phone(phone) in self._positions
+
+    def phones(self) -> List[str]:
+        """Все встретившиеся номера"""
+        return list(self._positions)
+
+    def positions(self, phone: str) -> np.ndarray:
+        """
+        Позиции транзакций с указанным номером
+
+        Args:
+            phone: Номер в любом поддерживаемом формате
+
+        Returns:
+            Отсортированный массив позиций
+        """
+        rows = self._positions.get(normalize_phone(phone))
+        return rows if rows is not None else np.empty(0, dtype=np.int64)
+
+    def totals(self) -> Dict[str, float]:
+        """Суммы операций по каждому номеру"""
+        if self._amounts is None:
+            return {}
+        amounts = self._amounts
+        return {
+            phone: float(amounts[rows].sum()) for phone, rows in self._positions.items()
+        }
+
+
+def phone_index_for(transactions: Transactions) -> PhoneIndex:
+    """
+    Возвращает индекс номеров телефонов
+
+    Для TransactionStore индекс строится один раз на версию данных.
+
+    Args:
+        transactions: Список транзакций, DataFrame или TransactionStore
+
+    Returns:
+        PhoneIndex
+    """
+    if isinstance(transactions, TransactionStore):
+        return transactions.derived(
+            "phone_index",
+            PhoneIndex.from_frame,
+            lambda index, rows, frame: index.extend(rows),
+        )
+    return PhoneIndex.from_frame(as_dataframe(transactions, copy=False))
+
+
+def _phones_of(df: DataFrame) -> Series:
+    if PHONE_COLUMN in df.columns:
+        return df[PHONE_COLUMN]
+    if "Описание" in df.columns:
+        return extract_phone_numbers(df["Описание"])
+    return pd.Series([""] * len(df), dtype=object)
+
+
+def _amounts_of(df: DataFrame) -> Optional[List[float]]:
+    if "Сумма операции" not in df.columns:
+        return None
+    return df["Сумма операции"].tolist()
+
+
+def _descriptions(df: DataFrame) -> List[Any]:
+    if "Описание" in df.columns:
+        return df["Описание"].tolist()
+    return [""] * len(df)
+
+
+def text_index_for(store: TransactionStore) -> InvertedIndex:
+    """
+    Возвращает инвертированный индекс для данных хранилища
+
+    Индекс сохраняется рядом с файлом данных и при следующем запуске
+    загружается с диска, если файл не менялся.
+
+    Args:
+        store: Хранилище транзакций
+
+    Returns:
+        InvertedIndex, позиции которого соответствуют store.get()
+    """
+
+    def build(df: DataFrame) -> InvertedIndex:
+        if store.file_path is None:
+            return InvertedIndex.build(_descriptions(df))
+
+        key = {**source_key(store.file_path, with_hash=False), "rows": len(df)}
+        path = index_path(store.file_path)
+        index = InvertedIndex.load(path, key)
+        if index is None:
+            index = InvertedIndex.build(_descriptions(df))
+            try:
+                index.save(path, key)
+            except Exception as e:
+                logger.warning(f"Не удалось сохранить индекс: {e}")
+        return index
+
+    return store.derived(
+        "text_index",
+        build,
+        lambda index, rows, frame: index.extend(_descriptions(rows)),
+    )
+
+
+def engine_for(transactions: Transactions) -> SearchEngine:
+    """
+    Возвращает поисковый движок для транзакций
+
+    Для TransactionStore движок строится один раз на версию данных
+    и использует инвертированный индекс.
+
+    Args:
+        transactions: Список транзакций, DataFrame или TransactionStore
+
+    Returns:
+        SearchEngine
+    """
+    if isinstance(transactions, TransactionStore):
+        store = transactions
+        return store.derived(
+            "search_engine",
+            lambda df: SearchEngine.from_frame(df, index=text_index_for(store)),
+            lambda engine, rows, frame: engine.extend(rows, frame),
+        )
+    if isinstance(transactions, DataFrame):
+        return SearchEngine.from_frame(transactions)
+    return SearchEngine([t.get("Описание", "") for t in transactions])
+
+
+def records_at(
+    transactions: Transactions, engine: SearchEngine, positions: np.ndarray
+) -> List[Dict[str, Any]]:
+    """
+    Возвращает найденные транзакции в виде списка словарей
+
+    Args:
+        transactions: Источник, по которому построен движок
+        engine: Поисковый движок
+        positions: Позиции найденных строк
+
+    Returns:
+        Список транзакций со строковыми ключами
+    """
+    if isinstance(transactions, (DataFrame, TransactionStore)):
+        return [
+            {str(k): v for k, v in row.items()}
+            for row in engine.take(positions).to_dict("records")
+        ]
+    return [{str(k): v for k, v in transactions[i].items()} for i in positions]
+
+
+def iter_frames_at(
+    transactions: Transactions,
+    engine: SearchEngine,
+    positions: np.ndarray,
+    chunk_size: int = 10_000,
+) -> Iterator[DataFrame]:
+    """
+    Выдает найденные строки частями, не собирая весь результат
+
+    Args:
+        transactions: Источник, по которому построен движок
+        engine: Поисковый движок
+        positions: Позиции найденных строк
+        chunk_size: Количество строк в одной части
+
+    Returns:
+        Итератор DataFrame со строками в порядке positions
+    """
+    for start in range(0, len(positions), chunk_size):
+        part = positions[start:start + chunk_size]
+        if isinstance(transactions, (DataFrame, TransactionStore)):
+            yield engine.take(part)
+        else:
+            yield DataFrame([transactions[i] for i in part])
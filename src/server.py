@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+from aiohttp import web
+
+from src import metrics
+from src.config import Config
+from src.cube import cube_for
+from src.period_index import DATE_RANGES, period_index_for
+from src.store import TransactionStore
+from src.utils import load_transactions
+from src.views import events_page, home_page
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 10_000
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+dumps = partial(json.dumps, ensure_ascii=False, default=str)
+
+
+class LatencyStats:
+    """
+    Задержки ответов по каждому адресу
+
+    Хранятся последние window замеров, по ним считаются p50 и p99.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, seconds: float) -> None:
+        """Добавляет замер в секундах"""
+        samples = self._samples.get(endpoint)
+        if samples is None:
+            samples = self._samples[endpoint] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Сводка по адресам
+
+        Returns:
+            {адрес: {'count', 'p50_ms', 'p99_ms', 'max_ms'}}
+        """
+        result = {}
+        for endpoint, samples in sorted(self._samples.items()):
+            ms = np.asarray(samples) * 1000
+            p50, p99 = np.percentile(ms, [50, 99])
+            result[endpoint] = {
+                "count": self._counts[endpoint],
+                "p50_ms": round(float(p50), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+        return result
+
+
+class DashboardService:
+    """
+    Данные, которые сервер держит в памяти между запросами
+
+    Транзакции загружаются один раз. Отдаваемое хранилище не обращается
+    к файлу: изменения файла подхватывает reload(), который загружает
+    новые данные в пуле потоков и подменяет хранилище целиком, поэтому
+    запросы во время перезагрузки обслуживаются старыми данными.
+    """
+
+    def __init__(
+        self,
+        file_path: Optional[str] = Config.DATA_FILE_PATH,
+        loader: Callable[[str], Any] = load_transactions,
+        executor: Optional[Executor] = None,
+        store: Optional[TransactionStore] = None,
+    ) -> None:
+        self.file_path = file_path
+        self._loader = loader
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=min(8, (os.cpu_count() or 1) + 2), thread_name_prefix="views"
+        )
+        self.store = store
+        self.stamp: Optional[Tuple[int, int]] = None
+        self.stats = LatencyStats()
+        self._reload_lock = asyncio.Lock()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        if self.file_path is None:
+            return None
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _build(self) -> Tuple[TransactionStore, Optional[Tuple[int, int]]]:
+        """Загружает данные и заранее строит агрегаты"""
+        assert self.file_path is not None
+        stamp = self._file_stamp()
+        store = TransactionStore.from_frame(self._loader(self.file_path))
+        cube_for(store)
+        period_index_for(store)
+        return store, stamp
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет тяжелую функцию в пуле, не блокируя цикл событий"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Перезагружает данные, если файл изменился
+
+        Args:
+            force: Перезагрузить даже без изменений файла
+
+        Returns:
+            True, если хранилище было заменено
+        """
+        async with self._reload_lock:
+            if self.file_path is None:
+                return False
+            if not force and self.store is not None:
+                if self._file_stamp() == self.stamp:
+                    return False
+            store, stamp = await self.run(self._build)
+            self.store, self.stamp = store, stamp
+            logger.info(f"Данные сервера загружены: {len(store.get())} строк")
+            return True
+
+    async def watch(self, interval: float) -> None:
+        """Периодически проверяет файл и перезагружает данные"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Ошибка перезагрузки данных: {str(e)}")
+
+
+SERVICE = web.AppKey("service", DashboardService)
+WATCHER = web.AppKey("watcher", "asyncio.Task[None]")
+
+
+def _date_time(request: web.Request) -> str:
+    value = request.query.get("date_time")
+    if value is None:
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def _service(request: web.Request) -> DashboardService:
+    return request.app[SERVICE]
+
+
+async def _page(
+    request: web.Request,
+    view: Callable[[str, TransactionStore, str], Dict[str, Any]],
+) -> web.Response:
+    service = _service(request)
+    date_time = _date_time(request)
+    try:
+        datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        raise web.HTTPBadRequest(text="date_time: ожидается YYYY-MM-DD HH:MM:SS")
+    date_range = request.query.get("date_range", "M")
+    if date_range not in DATE_RANGES:
+        raise web.HTTPBadRequest(text=f"date_range: ожидается одно из {DATE_RANGES}")
+    if service.store is None:
+        await service.reload()
+    result = await service.run(view, date_time, service.store, date_range)
+    return web.json_response(result, dumps=dumps)
+
+
+async def home_handler(request: web.Request) -> web.Response:
+    return await _page(request, home_page)
+
+
+async def events_handler(request: web.Request) -> web.Response:
+    return await _page(request, events_page)
+
+
+async def stats_handler(request: web.Request) -> web.Response:
+    return web.json_response(_service(request).stats.summary())
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(text=metrics.to_prometheus(), content_type="text/plain")
+
+
+async def reload_handler(request: web.Request) -> web.Response:
+    reloaded = await _service(request).reload(force=True)
+    return web.json_response({"reloaded": reloaded})
+
+
+@web.middleware
+async def latency_middleware(
+    request: web.Request, handler: Handler
+) -> web.StreamResponse:
+    started = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        resource = request.match_info.route.resource
+        endpoint = resource.canonical if resource is not None else "unmatched"
+        _service(request).stats.record(endpoint, time.perf_counter() - started)
+
+
+def create_app(
+    service: Optional[DashboardService] = None, watch_interval: float = 0.0
+) -> web.Application:
+    """
+    Создает приложение aiohttp с главной страницей и страницей событий
+
+    Адреса: GET /home, GET /events (параметры date_time и date_range:
+    W, M, Y, ALL), GET /stats (p50/p99 задержек по адресам), GET /metrics
+    (метрики src.metrics в формате Prometheus), POST /reload.
+
+    Args:
+        service: Сервис с данными (по умолчанию - файл из Config)
+        watch_interval: Период проверки файла в секундах (0 - не проверять)
+
+    Returns:
+        web.Application
+    """
+    app = web.Application(middlewares=[latency_middleware])
+    app[SERVICE] = service or DashboardService()
+    app.router.add_get("/home", home_handler)
+    app.router.add_get("/events", events_handler)
+    app.router.add_get("/stats", stats_handler)
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_post("/reload", reload_handler)
+
+    async def startup(app: web.Application) -> None:
+        service = app[SERVICE]
+        if service.store is None:
+            await service.reload()
+        if watch_interval > 0:
+            app[WATCHER] = asyncio.create_task(service.watch(watch_interval))
+
+    async def cleanup(app: web.Application) -> None:
+        watcher = app.get(WATCHER)
+        if watcher is not None:
+            watcher.cancel()
+        app[SERVICE].executor.shutdown(wait=False)
+
+    app.on_startup.append(startup)
+    app.on_cleanup.append(cleanup)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTTP сервер страниц приложения")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--data", default=Config.DATA_FILE_PATH)
+    parser.add_argument("--watch", type=float, default=5.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    app = create_app(DashboardService(args.data), watch_interval=args.watch)
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
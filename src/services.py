@@ -1,123 +1,309 @@
-import re
-from typing import Any, Dict, List, Union
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
+from src.cube import cube_for
+from src.memo import memoize
+from src.metrics import instrument
+from src.search import engine_for, phone_index_for, records_at
+from src.sqlite_store import CASHBACK_TOP_COLUMNS, SQLiteStore
+from src.store import Transactions, as_dataframe
 
+Source = Union[Transactions, SQLiteStore]
+
+
+@instrument()
+@memoize()
+def cashback_top_by_month(
+    transactions: Source,
+    top_n: int = 3,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> DataFrame:
+    """
+    Категории с наибольшим кэшбэком за каждый месяц.
+
+    Все месяцы считаются одной группировкой по (месяц, категория).
+
+    Аргументы:
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
+        top_n: Сколько категорий оставлять в каждом месяце
+        start: Первый месяц 'YYYY-MM' (None - с начала данных)
+        end: Последний месяц 'YYYY-MM' включительно (None - до конца)
+
+    Возвращает:
+        DataFrame с колонками month ('YYYY-MM'), category, cashback, rank
+        (1 - наибольший кэшбэк), отсортированный по месяцу и rank
+    """
+    if isinstance(transactions, SQLiteStore):
+        return transactions.cashback_top_by_month(top_n, start, end)
+    df = as_dataframe(transactions, copy=False)
+    if (
+        df.empty
+        or "Дата операции" not in df.columns
+        or "Бонусы (включая кэшбэк)" not in df.columns
+    ):
+        return pd.DataFrame(columns=CASHBACK_TOP_COLUMNS)
+
+    totals = cube_for(transactions).monthly_total_by(
+        ["category"], value="cashback", start=start, end=end
+    )
+    table = totals.reset_index().sort_values(
+        ["month", "cashback"], ascending=[True, False], kind="mergesort"
+    )
+    table["rank"] = table.groupby("month").cumcount() + 1
+    table = table[table["rank"] <= top_n].reset_index(drop=True)
+    table["month"] = table["month"].astype(str)
+    return table[CASHBACK_TOP_COLUMNS]
+
+
+@instrument()
+@memoize()
 def profitable_cashback_categories(
-    transactions: Union[List[Dict[str, Any]], DataFrame], year: int, month: int
+    transactions: Source, year: int, month: int
 ) -> Dict[str, float]:
     """Определяет категории с наибольшим кэшбэком"""
-    if isinstance(transactions, DataFrame):
-        df = transactions.copy()
-    else:
-        df = pd.DataFrame(transactions)
-
     try:
-        if df.empty or "Дата операции" not in df.columns:
-            return {}
-
-        filtered = df[
-            (df["Дата операции"].dt.year == year)
-            & (df["Дата операции"].dt.month == month)
-        ]
-        cashback = (
-            filtered.groupby("Категория")["Бонусы (включая кэшбэк)"].sum().nlargest(3)
-        )
-        return {str(k): float(v) for k, v in cashback.items()}
+        period = f"{year:04d}-{month:02d}"
+        top = cashback_top_by_month(transactions, 3)
+        rows = top[top["month"] == period]
+        return {str(c): float(v) for c, v in zip(rows["category"], rows["cashback"])}
     except Exception:
         return {}
 
 
-def investment_bank(
-    month: str, transactions: Union[List[Dict[str, Any]], DataFrame], percent: int
-) -> float:
-    """Рассчитывает инвестиционные накопления."""
-    if isinstance(transactions, DataFrame):
-        df = transactions.copy()
+INVESTMENT_COLUMNS = ["month", "rule", "parameter", "savings"]
+
+
+def _monthly_spending(
+    df: DataFrame,
+    limits: Sequence[int],
+    start: Optional[str],
+    end: Optional[str],
+) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Расходы по месяцам и суммы остатков до округления вверх по шагам"""
+    amounts = pd.to_numeric(df["Сумма операции"]).to_numpy(dtype=float)
+    months = pd.to_datetime(df["Дата операции"]).to_numpy().astype("datetime64[M]")
+    mask = (amounts < 0) & ~np.isnat(months)
+    if start is not None:
+        mask &= months >= np.datetime64(start, "M")
+    if end is not None:
+        mask &= months <= np.datetime64(end, "M")
+    spent = np.round(-amounts[mask], 2)
+    codes, month_index = pd.factorize(months[mask], sort=True)
+    n_months = len(month_index)
+
+    steps = np.asarray(limits, dtype=float)
+    rest = np.round(np.ceil(spent[:, None] / steps) * steps - spent[:, None], 2)
+    rests = np.zeros((n_months, len(steps)))
+    for j in range(len(steps)):
+        rests[:, j] = np.bincount(codes, weights=rest[:, j], minlength=n_months)
+    monthly = np.bincount(codes, weights=spent, minlength=n_months)
+    labels = list(pd.DatetimeIndex(month_index).strftime("%Y-%m"))
+    return labels, monthly, rests
+
+
+@instrument()
+@memoize()
+def investment_savings(
+    transactions: Source,
+    limits: Sequence[int] = (),
+    percents: Sequence[float] = (),
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> DataFrame:
+    """
+    Накопления "инвесткопилки" по месяцам для нескольких правил сразу.
+
+    Правило округления откладывает разницу между расходом и ближайшей
+    сверху суммой, кратной limit (для 1712 ₽ и limit 50 это 38 ₽).
+    Правило процента откладывает percent% от расходов месяца.
+    Все правила и месяцы считаются за один проход по расходам.
+
+    Аргументы:
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
+        limits: Шаги округления, например (10, 50, 100)
+        percents: Проценты от расходов
+        start: Первый месяц 'YYYY-MM' (None - с начала данных)
+        end: Последний месяц 'YYYY-MM' включительно (None - до конца)
+
+    Возвращает:
+        DataFrame с колонками month ('YYYY-MM'), rule ('round' или
+        'percent'), parameter, savings
+    """
+    if not (len(limits) or len(percents)):
+        return pd.DataFrame(columns=INVESTMENT_COLUMNS)
+    if isinstance(transactions, SQLiteStore):
+        labels, monthly, rests = transactions.monthly_spending(limits, start, end)
     else:
-        df = pd.DataFrame(transactions)
+        df = as_dataframe(transactions, copy=False)
+        if df.empty:
+            return pd.DataFrame(columns=INVESTMENT_COLUMNS)
+        labels, monthly, rests = _monthly_spending(df, limits, start, end)
+    if not labels:
+        return pd.DataFrame(columns=INVESTMENT_COLUMNS)
+
+    columns = [rests[:, j] for j in range(len(limits))]
+    columns += [monthly * float(percent) / 100 for percent in percents]
+    rules = [("round", limit) for limit in limits]
+    rules += [("percent", percent) for percent in percents]
+    return pd.DataFrame(
+        {
+            "month": np.repeat(labels, len(rules)),
+            "rule": [rule for _ in labels for rule, _ in rules],
+            "parameter": [param for _ in labels for _, param in rules],
+            "savings": np.round(np.column_stack(columns).ravel(), 2),
+        },
+        columns=INVESTMENT_COLUMNS,
+    )
 
-    monthly = df[df["Дата операции"].dt.strftime("%Y-%m") == month]
-    expenses = monthly[monthly["Сумма операции"] < 0]["Сумма операции"].sum()
-    return abs(float(expenses * percent / 100))
 
+@instrument()
+@memoize()
+def investment_bank(month: str, transactions: Source, percent: int) -> float:
+    """
+    Рассчитывает инвестиционные накопления.
 
-def simple_search(
-    query: str, transactions: Union[List[Dict[str, Any]], DataFrame]
-) -> List[Dict[str, Any]]:
+    Для месяца не в формате 'YYYY-MM' возвращает 0.0, как для месяца
+    без расходов.
+    """
+    try:
+        if datetime.strptime(month, "%Y-%m").strftime("%Y-%m") != month:
+            return 0.0
+    except (TypeError, ValueError):
+        return 0.0
+    savings = investment_savings(
+        transactions, percents=[percent], start=month, end=month
+    )
+    return abs(float(savings["savings"].sum()))
+
+
+def _records(df: DataFrame) -> List[Dict[str, Any]]:
+    """Строки результата SQLiteStore в виде списка словарей"""
+    return [{str(k): v for k, v in row.items()} for row in df.to_dict("records")]
+
+
+@instrument()
+def simple_search(query: str, transactions: Source) -> List[Dict[str, Any]]:
     """
     Поиск транзакций по текстовому запросу в описании.
 
     Аргументы:
         query: Строка для поиска
-        transactions: Список транзакций или DataFrame
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
 
     Возвращает:
         Список найденных транзакций
     """
-    if isinstance(transactions, DataFrame):
-        trans_list = [dict(row) for _, row in transactions.iterrows()]
-    else:
-        trans_list = transactions
+    if isinstance(transactions, SQLiteStore):
+        return _records(transactions.search("text", [query]))
+    engine = engine_for(transactions)
+    return records_at(transactions, engine, engine.contains(query))
+
+
+@instrument()
+def batch_search(
+    queries: List[str], transactions: Source
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Выполняет несколько текстовых запросов по одному движку поиска.
+
+    Описания готовятся один раз, затем каждый запрос ищется
+    по подготовленному тексту (см. SearchEngine.contains_many).
+
+    Аргументы:
+        queries: Строки для поиска
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
 
-    return [
-        {str(k): v for k, v in t.items()}
-        for t in trans_list
-        if query.lower() in str(t.get("Описание", "")).lower()
-    ]
+    Возвращает:
+        Словарь {запрос: список найденных транзакций}
+    """
+    if isinstance(transactions, SQLiteStore):
+        return {
+            query: _records(transactions.search("text", [query])) for query in queries
+        }
+    engine = engine_for(transactions)
+    return {
+        query: records_at(transactions, engine, positions)
+        for query, positions in engine.contains_many(queries).items()
+    }
 
 
-def phone_number_search(
-    transactions: Union[List[Dict[str, Any]], DataFrame]
-) -> List[Dict[str, Any]]:
+@instrument()
+def phone_number_search(transactions: Source) -> List[Dict[str, Any]]:
     """
     Поиск транзакций, содержащих номера телефонов в описании.
 
     Аргументы:
-        transactions: Список транзакций или DataFrame
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
 
     Возвращает:
         Список транзакций с номерами телефонов
     """
-    if isinstance(transactions, DataFrame):
-        trans_list = [dict(row) for _, row in transactions.iterrows()]
-    else:
-        trans_list = transactions
+    if isinstance(transactions, SQLiteStore):
+        return _records(transactions.search("phones"))
+    engine = engine_for(transactions)
+    return records_at(transactions, engine, engine.phone_positions())
 
-    phone_pattern = re.compile(
-        r"(\+7|8)[\s-]?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{2}[\s-]?\d{2}"
-    )
-    return [
-        {str(k): v for k, v in t.items()}
-        for t in trans_list
-        if phone_pattern.search(str(t.get("Описание", "")))
-    ]
 
+@instrument()
+def phone_transactions_search(phone: str, transactions: Source) -> List[Dict[str, Any]]:
+    """
+    Поиск транзакций с указанным номером телефона в описании.
+
+    Аргументы:
+        phone: Номер телефона в любом формате (+7..., 8...)
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
+
+    Возвращает:
+        Список транзакций с этим номером
+    """
+    if isinstance(transactions, SQLiteStore):
+        return _records(transactions.search("phone", [phone]))
+    engine = engine_for(transactions)
+    positions = phone_index_for(transactions).positions(phone)
+    return records_at(transactions, engine, positions)
+
+
+@instrument()
+def phone_number_totals(transactions: Source) -> Dict[str, float]:
+    """
+    Суммы операций по каждому номеру телефона из описаний.
+
+    Аргументы:
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
+
+    Возвращает:
+        Словарь {номер: сумма}
+    """
+    if isinstance(transactions, SQLiteStore):
+        return transactions.phone_totals()
+    return phone_index_for(transactions).totals()
 
-def person_transfers_search(
-    transactions: Union[List[Dict[str, Any]], DataFrame]
-) -> List[Dict[str, Any]]:
+
+@instrument()
+def person_transfers_search(transactions: Source) -> List[Dict[str, Any]]:
     """
     Поиск переводов между физическими лицами.
 
     Аргументы:
-        transactions: Список транзакций или DataFrame
+        transactions: Список транзакций, DataFrame, TransactionStore
+            или SQLiteStore
 
     Возвращает:
         Список найденных переводов
     """
-    if isinstance(transactions, DataFrame):
-        trans_list = [dict(row) for _, row in transactions.iterrows()]
-    else:
-        trans_list = transactions
-
-    return [
-        {str(k): v for k, v in t.items()}
-        for t in trans_list
-        if "перевод" in str(t.get("Описание", "")).lower()
-        and not any(
-            x in str(t.get("Описание", "")).lower() for x in ["банк", "организация"]
-        )
-    ]
+    if isinstance(transactions, SQLiteStore):
+        return _records(transactions.search("transfers"))
+    engine = engine_for(transactions)
+    return records_at(transactions, engine, engine.person_transfer_positions())
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".snapshot.npz"
+
+
+def snapshot_path(file_path: str) -> str:
+    """Путь к снимку, который лежит рядом с исходным файлом"""
+    source = Path(file_path)
+    return str(source.with_name(source.stem + SNAPSHOT_SUFFIX))
+
+
+def file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """Возвращает sha256 содержимого файла"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key(file_path: str, with_hash: bool = True) -> Dict[str, Any]:
+    """
+    Ключ снимка: размер, время изменения и хеш исходного файла
+
+    Args:
+        file_path: Путь к исходному файлу
+        with_hash: Считать ли хеш содержимого
+
+    Returns:
+        Словарь {'size', 'mtime_ns', 'sha256'}
+    """
+    stat = os.stat(file_path)
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_hash(file_path) if with_hash else None,
+    }
+
+
+def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+    with np.load(path, allow_pickle=False) as data:
+        meta: Dict[str, Any] = json.loads(str(data["__meta__"]))
+    return meta
+
+
+def save_snapshot(
+    df: pd.DataFrame, file_path: str, key: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Сохраняет очищенный DataFrame в колоночный снимок .npz
+
+    Ключ снимка должен описывать файл, который был прочитан: если файл
+    изменился после чтения, снимок не записывается, иначе он выглядел
+    бы актуальным для новых данных. Снимок пишется во временный файл
+    с уникальным именем и атомарно подменяет прежний, поэтому
+    одновременные записи не мешают друг другу.
+
+    Args:
+        df: Очищенный DataFrame с транзакциями
+        file_path: Путь к исходному xlsx файлу
+        key: Ключ source_key(file_path, with_hash=False), снятый до
+            чтения файла (по умолчанию - текущий)
+
+    Returns:
+        True, если снимок записан
+    """
+    if not pd.api.types.is_integer_dtype(df.index):
+        return False
+    if key is None:
+        key = source_key(file_path, with_hash=False)
+
+    arrays: Dict[str, np.ndarray] = {}
+    columns: List[Dict[str, str]] = []
+
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            kind = "datetime"
+            arrays[f"c{i}"] = series.to_numpy(dtype="datetime64[ns]").view("int64")
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(
+            series
+        ):
+            kind = "numeric"
+            arrays[f"c{i}"] = series.to_numpy()
+        else:
+            mask = series.isna().to_numpy()
+            values = series[~mask]
+            if not all(isinstance(v, str) for v in values):
+                logger.info(f"Снимок не поддерживает колонку {col}")
+                return False
+            kind = "text"
+            arrays[f"c{i}"] = series.where(~mask, "").to_numpy(dtype=str)
+            arrays[f"c{i}_mask"] = mask
+        columns.append({"name": str(col), "kind": kind})
+
+    digest = file_hash(file_path)
+    current = source_key(file_path, with_hash=False)
+    if (current["size"], current["mtime_ns"]) != (key["size"], key["mtime_ns"]):
+        logger.info(f"Файл {file_path} изменился после чтения, снимок не записан")
+        return False
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "key": {**key, "sha256": digest},
+        "columns": columns,
+    }
+    arrays["__meta__"] = np.array(json.dumps(meta, ensure_ascii=False))
+    arrays["__index__"] = df.index.to_numpy(dtype="int64")
+
+    target = Path(snapshot_path(file_path))
+    with tempfile.NamedTemporaryFile(
+        dir=target.parent, prefix=target.name, suffix=".tmp", delete=False
+    ) as tmp:
+        try:
+            np.savez(tmp, **arrays)  # type: ignore[arg-type]
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, target)
+    return True
+
+
+def load_snapshot(file_path: str) -> Optional[pd.DataFrame]:
+    """
+    Загружает снимок, если он соответствует текущему исходному файлу
+
+    Сначала сравниваются размер и mtime; хеш считается только когда они
+    отличаются (например, файл перезаписан тем же содержимым).
+
+    Args:
+        file_path: Путь к исходному xlsx файлу
+
+    Returns:
+        DataFrame или None, если снимка нет или он устарел
+    """
+    path = snapshot_path(file_path)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        meta = _read_meta(path)
+        if meta is None or meta.get("version") != SNAPSHOT_VERSION:
+            return None
+
+        stored = meta["key"]
+        current = source_key(file_path, with_hash=False)
+        if (stored["size"], stored["mtime_ns"]) != (
+            current["size"],
+            current["mtime_ns"],
+        ):
+            if stored["size"] != current["size"]:
+                return None
+            if file_hash(file_path) != stored["sha256"]:
+                return None
+
+        data: Dict[str, Any] = {}
+        with np.load(path, allow_pickle=False) as npz:
+            for i, col in enumerate(meta["columns"]):
+                values = npz[f"c{i}"]
+                if col["kind"] == "datetime":
+                    data[col["name"]] = values.view("datetime64[ns]")
+                elif col["kind"] == "text":
+                    text = values.astype(object)
+                    text[npz[f"c{i}_mask"]] = np.nan
+                    data[col["name"]] = text
+                else:
+                    data[col["name"]] = values
+            index = npz["__index__"]
+        return pd.DataFrame(data, index=index)
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать снимок {path}: {e}")
+        return None
@@ -0,0 +1,538 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.config import Config
+from src.search import TRANSFER_EXCLUDE, TRANSFER_WORD
+from src.utils import (PHONE_COLUMN, iter_transaction_chunks, normalize_phone,
+                       period_bounds)
+
+logger = logging.getLogger(__name__)
+
+# Колонка выписки -> (колонка таблицы, тип)
+COLUMNS = {
+    "Дата операции": ("op_date", "TEXT"),
+    "Дата платежа": ("payment_date", "TEXT"),
+    "Номер карты": ("card", "TEXT"),
+    "Статус": ("status", "TEXT"),
+    "Сумма операции": ("amount", "REAL"),
+    "Валюта операции": ("currency", "TEXT"),
+    "Сумма платежа": ("payment_amount", "REAL"),
+    "Валюта платежа": ("payment_currency", "TEXT"),
+    "Кэшбэк": ("cashback_amount", "REAL"),
+    "Категория": ("category", "TEXT"),
+    "MCC": ("mcc", "REAL"),
+    "Описание": ("description", "TEXT"),
+    "Бонусы (включая кэшбэк)": ("bonus", "REAL"),
+    "Округление на инвесткопилку": ("invest_round", "REAL"),
+    "Сумма операции с округлением": ("amount_rounded", "REAL"),
+    PHONE_COLUMN: ("phone", "TEXT"),
+}
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+CASHBACK_TOP_COLUMNS = ["month", "category", "cashback", "rank"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    {columns},
+    sign INTEGER NOT NULL,
+    description_lower TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_date ON transactions (op_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_category
+    ON transactions (category, op_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_card ON transactions (card, op_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_sign ON transactions (sign, op_date);
+CREATE INDEX IF NOT EXISTS ix_transactions_phone
+    ON transactions (phone) WHERE phone != '';
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS descriptions USING fts5(
+    description_lower,
+    content='transactions',
+    content_rowid='id',
+    tokenize='trigram'
+)
+"""
+
+DateLike = Union[str, date, datetime]
+
+
+def _month_bounds(
+    start: Optional[str], end: Optional[str]
+) -> Tuple[Optional[str], Optional[str]]:
+    """Месяцы 'YYYY-MM' -> границы [начало, конец) для сравнения строк дат"""
+    low = pd.Period(start, "M").strftime("%Y-%m") if start is not None else None
+    high = (pd.Period(end, "M") + 1).strftime("%Y-%m") if end is not None else None
+    return low, high
+
+
+def _to_rows(df: DataFrame, columns: List[str]) -> Iterator[Tuple[Any, ...]]:
+    """Строки DataFrame в порядке колонок таблицы"""
+    if df.empty:
+        return iter(())
+    data: Dict[str, Any] = {}
+    for column in columns:
+        name = COLUMNS[column][0]
+        values = df[column] if column in df.columns else None
+        if values is None:
+            data[name] = None
+        elif column == "Дата операции":
+            data[name] = pd.to_datetime(values).dt.strftime(DATE_FORMAT)
+        else:
+            data[name] = values
+    amounts = pd.to_numeric(df["Сумма операции"]).astype(float)
+    data["sign"] = np.sign(amounts).astype(int)
+    descriptions = df["Описание"] if "Описание" in df.columns else None
+    data["description_lower"] = (
+        "" if descriptions is None else descriptions.astype(str).str.lower()
+    )
+    frame = DataFrame(data, index=df.index).astype(object)
+    frame = frame.where(frame.notna(), None)
+    return frame.itertuples(index=False, name=None)
+
+
+class SQLiteStore:
+    """
+    Хранилище транзакций в локальной базе SQLite
+
+    Транзакции импортируются частями, поэтому память не зависит от длины
+    истории. Фильтры, отчеты, кэшбэк, инвесткопилка и поиск выполняются
+    запросами по индексам (дата, категория, карта, знак суммы, телефон);
+    текстовый поиск идет по таблице FTS5 с триграммами. В память
+    попадают только результаты запросов.
+    """
+
+    def __init__(self, db_path: str = ":memory:") -> None:
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._fts = True
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        columns = ",\n    ".join(f"{name} {kind}" for name, kind in COLUMNS.values())
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA.format(columns=columns))
+            try:
+                self._conn.execute(_FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"FTS5 недоступен, поиск без индекса: {e}")
+                self._fts = False
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('token', ?)", (uuid.uuid4().hex,)
+            )
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('revision', '0')")
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('columns', '[]')")
+
+    def close(self) -> None:
+        """Закрывает соединение с базой"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "SQLiteStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return int(self._scalar("SELECT count(*) FROM transactions"))
+
+    def _scalar(self, sql: str, params: Sequence[Any] = ()) -> Any:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def _meta(self, key: str) -> str:
+        return str(self._scalar("SELECT value FROM meta WHERE key = ?", (key,)))
+
+    def columns(self) -> List[str]:
+        """Колонки выписки, которые были в импортированных данных"""
+        return json.loads(self._meta("columns"))
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Отпечаток содержимого базы для кэша результатов
+
+        Меняется при каждом импорте, данные при этом не читаются.
+
+        Returns:
+            Словарь {'shape': [строки, колонки], 'hash': hex}
+        """
+        key = f"{self._meta('token')}:{self._meta('revision')}"
+        return {
+            "shape": [len(self), len(self.columns())],
+            "hash": hashlib.blake2b(key.encode(), digest_size=16).hexdigest(),
+        }
+
+    def import_frame(self, df: DataFrame, replace: bool = False) -> int:
+        """
+        Импортирует очищенные транзакции (см. clean_transactions)
+
+        Args:
+            df: DataFrame с транзакциями
+            replace: Удалить ранее импортированные данные
+
+        Returns:
+            Количество добавленных строк
+        """
+        return self._import([df], replace)
+
+    def import_file(
+        self,
+        file_path: str = Config.DATA_FILE_PATH,
+        chunk_size: int = 50_000,
+        replace: bool = True,
+    ) -> int:
+        """
+        Импортирует Excel выписку частями (см. iter_transaction_chunks)
+
+        Args:
+            file_path: Путь к файлу
+            chunk_size: Количество строк в одной части
+            replace: Удалить ранее импортированные данные
+
+        Returns:
+            Количество добавленных строк
+        """
+        count = self._import(iter_transaction_chunks(file_path, chunk_size), replace)
+        logger.info(f"Импортировано в {self.db_path}: {count} строк")
+        return count
+
+    def _import(self, chunks: Any, replace: bool) -> int:
+        table_columns = [name for name, _ in COLUMNS.values()]
+        placeholders = ", ".join("?" * (len(table_columns) + 2))
+        insert = (
+            f"INSERT INTO transactions ({', '.join(table_columns)}, sign,"
+            f" description_lower) VALUES ({placeholders})"
+        )
+        count = 0
+        with self._lock, self._conn:
+            conn = self._conn
+            seen = [] if replace else self.columns()
+            if replace:
+                conn.execute("DELETE FROM transactions")
+                if self._fts:
+                    conn.execute(
+                        "INSERT INTO descriptions(descriptions) VALUES ('delete-all')"
+                    )
+            first_id = int(
+                conn.execute(
+                    "SELECT coalesce(max(id), 0) FROM transactions"
+                ).fetchone()[0]
+            )
+            for chunk in chunks:
+                if chunk.empty or not {"Дата операции", "Сумма операции"} <= set(
+                    chunk.columns
+                ):
+                    continue
+                seen += [c for c in chunk.columns if c in COLUMNS and c not in seen]
+                conn.executemany(insert, _to_rows(chunk, list(COLUMNS)))
+                count += len(chunk)
+            if self._fts:
+                conn.execute(
+                    "INSERT INTO descriptions(rowid, description_lower)"
+                    " SELECT id, description_lower FROM transactions WHERE id > ?",
+                    (first_id,),
+                )
+            ordered = [c for c in COLUMNS if c in seen]
+            conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'columns'",
+                (json.dumps(ordered, ensure_ascii=False),),
+            )
+            conn.execute(
+                "UPDATE meta SET value = CAST(value AS INTEGER) + 1"
+                " WHERE key = 'revision'"
+            )
+        return count
+
+    def _select_sql(self, where: str, limit: Optional[int]) -> str:
+        names = [COLUMNS[c][0] for c in self.columns()]
+        sql = (
+            f"SELECT {', '.join(names)} FROM transactions"
+            f" WHERE {where} ORDER BY op_date, id"
+        )
+        return sql if limit is None else f"{sql} LIMIT {int(limit)}"
+
+    def _read(self, sql: str, params: Sequence[Any], **kwargs: Any) -> Any:
+        return pd.read_sql_query(
+            sql,
+            self._conn,
+            params=list(params),
+            parse_dates={"op_date": DATE_FORMAT},
+            **kwargs,
+        )
+
+    def _frame(
+        self, where: str, params: Sequence[Any], limit: Optional[int] = None
+    ) -> DataFrame:
+        columns = self.columns()
+        if not columns:
+            return DataFrame()
+        with self._lock:
+            frame = self._read(self._select_sql(where, limit), params)
+        return frame.rename(columns={COLUMNS[c][0]: c for c in columns})
+
+    def _frames(
+        self,
+        where: str,
+        params: Sequence[Any],
+        limit: Optional[int],
+        chunk_size: int,
+    ) -> Iterator[DataFrame]:
+        columns = self.columns()
+        if not columns:
+            return
+        names = {COLUMNS[c][0]: c for c in columns}
+        # Блокировка берется на выполнение запроса и чтение каждой части,
+        # но не удерживается, пока вызывающий код обрабатывает часть
+        with self._lock:
+            chunks = self._read(
+                self._select_sql(where, limit), params, chunksize=chunk_size
+            )
+        while True:
+            with self._lock:
+                frame = next(chunks, None)
+            if frame is None:
+                return
+            yield frame.rename(columns=names)
+
+    def select(
+        self,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        category: Optional[str] = None,
+        card: Optional[str] = None,
+    ) -> DataFrame:
+        """
+        Транзакции в интервале [start, end) с необязательными условиями
+
+        Args:
+            start: Начало интервала (None - с начала данных)
+            end: Конец интервала, не включительно (None - до конца)
+            category: Только эта категория
+            card: Только эта карта
+
+        Returns:
+            DataFrame, отсортированный по дате
+        """
+        conditions, params = ["1"], []
+        for column, value in (("category", category), ("card", card)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append("op_date >= ?")
+            params.append(pd.Timestamp(start).strftime(DATE_FORMAT))
+        if end is not None:
+            conditions.append("op_date < ?")
+            params.append(pd.Timestamp(end).strftime(DATE_FORMAT))
+        return self._frame(" AND ".join(conditions), params)
+
+    def filter_by_date(self, date_filter: DateLike, date_range: str = "M") -> DataFrame:
+        """
+        Транзакции за период, как filter_transactions_by_date
+
+        Args:
+            date_filter: Дата внутри периода
+            date_range: Диапазон ('D', 'W', 'M', 'Y', 'ALL')
+
+        Returns:
+            DataFrame, отсортированный по дате
+        """
+        if date_range == "ALL":
+            return self.select()
+        start, end = period_bounds(date_filter, date_range)
+        return self.select(start, end)
+
+    def spending_by_category(self, category: str) -> Dict[str, float]:
+        """Суммы операций категории по дням"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT date(op_date) AS day, sum(amount) FROM transactions"
+                " WHERE category = ? GROUP BY day ORDER BY day",
+                (category,),
+            ).fetchall()
+        return {str(day): float(total) for day, total in rows}
+
+    def spending_by_weekday(self) -> Dict[int, float]:
+        """Суммы операций по дням недели (0-пн, 6-вс)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT (CAST(strftime('%w', op_date) AS INTEGER) + 6) % 7 AS weekday,"
+                " sum(amount) FROM transactions GROUP BY weekday ORDER BY weekday"
+            ).fetchall()
+        return {int(day): float(total) for day, total in rows}
+
+    def spending_by_workday(self) -> Dict[str, float]:
+        """Суммы операций в рабочие дни и выходные"""
+        with self._lock:
+            weekdays, weekends = self._conn.execute(
+                "SELECT"
+                " total(CASE WHEN strftime('%w', op_date) IN ('0', '6')"
+                " THEN 0 ELSE amount END),"
+                " total(CASE WHEN strftime('%w', op_date) IN ('0', '6')"
+                " THEN amount ELSE 0 END)"
+                " FROM transactions"
+            ).fetchone()
+        return {"weekdays": float(weekdays), "weekends": float(weekends)}
+
+    def cashback_top_by_month(
+        self, top_n: int = 3, start: Optional[str] = None, end: Optional[str] = None
+    ) -> DataFrame:
+        """
+        Категории с наибольшим кэшбэком за каждый месяц
+
+        Returns:
+            DataFrame с колонками month, category, cashback, rank
+        """
+        if "Бонусы (включая кэшбэк)" not in self.columns():
+            return DataFrame(columns=CASHBACK_TOP_COLUMNS)
+        low, high = _month_bounds(start, end)
+        sql = """
+            WITH totals AS (
+                SELECT substr(op_date, 1, 7) AS month, category,
+                       total(bonus) AS cashback
+                FROM transactions
+                WHERE (? IS NULL OR op_date >= ?) AND (? IS NULL OR op_date < ?)
+                GROUP BY month, category
+            ), ranked AS (
+                SELECT month, category, cashback,
+                       row_number() OVER (
+                           PARTITION BY month ORDER BY cashback DESC, category
+                       ) AS rank
+                FROM totals
+            )
+            SELECT month, category, cashback, rank FROM ranked
+            WHERE rank <= ? ORDER BY month, rank
+        """
+        with self._lock:
+            return pd.read_sql_query(
+                sql, self._conn, params=[low, low, high, high, int(top_n)]
+            )[CASHBACK_TOP_COLUMNS]
+
+    def monthly_spending(
+        self,
+        limits: Sequence[float] = (),
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Расходы по месяцам и остатки до округления вверх
+
+        Суммы считаются в копейках, поэтому совпадают с поштучным
+        округлением до 2 знаков.
+
+        Args:
+            limits: Шаги округления
+            start: Первый месяц 'YYYY-MM'
+            end: Последний месяц 'YYYY-MM' включительно
+
+        Returns:
+            (месяцы 'YYYY-MM', расходы по месяцам, остатки [месяц, шаг])
+        """
+        steps = [int(round(float(limit) * 100)) for limit in limits]
+        rests = "".join(
+            f", total((? - spent % ?) % ?) AS rest_{i}" for i in range(len(steps))
+        )
+        low, high = _month_bounds(start, end)
+        sql = (
+            f"SELECT month, total(spent) AS spent{rests} FROM ("
+            "  SELECT substr(op_date, 1, 7) AS month,"
+            "         CAST(round(-amount * 100) AS INTEGER) AS spent"
+            "  FROM transactions WHERE sign = -1"
+            "    AND (? IS NULL OR op_date >= ?) AND (? IS NULL OR op_date < ?)"
+            ") GROUP BY month ORDER BY month"
+        )
+        params: List[Any] = [v for step in steps for v in (step, step, step)]
+        params += [low, low, high, high]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        table = np.asarray([row[1:] for row in rows], dtype=float).reshape(
+            len(rows), len(steps) + 1
+        )
+        return [row[0] for row in rows], table[:, 0] / 100, table[:, 1:] / 100
+
+    def _text_condition(self, query: str) -> Tuple[str, List[Any]]:
+        needle = query.lower()
+        if self._fts and len(needle) >= 3:
+            phrase = '"' + needle.replace('"', '""') + '"'
+            return (
+                "id IN (SELECT rowid FROM descriptions WHERE descriptions MATCH ?)"
+                " AND instr(description_lower, ?) > 0",
+                [phrase, needle],
+            )
+        return "instr(description_lower, ?) > 0", [needle]
+
+    def _search_condition(
+        self, kind: str, queries: Sequence[str]
+    ) -> Tuple[str, List[Any]]:
+        if kind == "text":
+            parts = [self._text_condition(query) for query in queries]
+            where = " OR ".join(f"({sql})" for sql, _ in parts) or "0"
+            return where, [p for _, params in parts for p in params]
+        if kind == "phone":
+            return "phone = ?", [normalize_phone(queries[0]) if queries else ""]
+        if kind == "phones":
+            return "phone != ''", []
+        if kind == "transfers":
+            where, params = self._text_condition(TRANSFER_WORD)
+            for word in TRANSFER_EXCLUDE:
+                where += " AND instr(description_lower, ?) = 0"
+                params.append(word)
+            return where, params
+        raise ValueError(f"Неизвестный вид поиска: {kind}")
+
+    def search(
+        self, kind: str, queries: Sequence[str] = (), limit: Optional[int] = None
+    ) -> DataFrame:
+        """
+        Поиск транзакций
+
+        Args:
+            kind: 'text' - подстрока в описании (любой из queries),
+                'phone' - номер телефона queries[0], 'phones' - все
+                операции с номером, 'transfers' - переводы физлицам
+            queries: Строки поиска или номер телефона
+            limit: Наибольшее количество строк
+
+        Returns:
+            DataFrame, отсортированный по дате
+
+        Raises:
+            ValueError: При неизвестном виде поиска
+        """
+        where, params = self._search_condition(kind, queries)
+        return self._frame(where, params, limit)
+
+    def iter_search(
+        self,
+        kind: str,
+        queries: Sequence[str] = (),
+        limit: Optional[int] = None,
+        chunk_size: int = 10_000,
+    ) -> Iterator[DataFrame]:
+        """То же, что search, но результат выдается частями по chunk_size строк"""
+        where, params = self._search_condition(kind, queries)
+        return self._frames(where, params, limit, chunk_size)
+
+    def phone_totals(self) -> Dict[str, float]:
+        """Суммы операций по каждому номеру телефона"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT phone, total(amount) FROM transactions"
+                " WHERE phone != '' GROUP BY phone"
+            ).fetchall()
+        return {str(phone): float(total) for phone, total in rows}
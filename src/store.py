@@ -0,0 +1,230 @@
+import logging
+import os
+import threading
+from typing import (Any, Callable, ContextManager, Dict, List, Optional, Tuple,
+                    TypeVar, Union, cast)
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.config import Config
+from src.utils import index_by_date, load_transactions
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+Updater = Callable[[Any, DataFrame, DataFrame], None]
+
+
+def _prepare(df: DataFrame) -> DataFrame:
+    """
+    Сортирует данные по дате, чтобы фильтры по периодам были срезами
+
+    Массивы результата доступны только для чтения: запись в ячейку
+    через store.get() испортила бы производные структуры (куб, индексы),
+    построенные для текущей версии данных.
+    """
+    prepared = df
+    if not df.empty and "Дата операции" in df.columns:
+        prepared = index_by_date(df)
+    if prepared is df:
+        prepared = df.copy()
+    for array in prepared._mgr.arrays:  # type: ignore[attr-defined]
+        values = getattr(array, "_ndarray", array)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return prepared
+
+
+class TransactionStore:
+    """
+    Общий кэш транзакций в памяти процесса
+
+    Файл разбирается один раз; при каждом обращении проверяются размер
+    и mtime файла, и если он изменился, данные перечитываются.
+    Потокобезопасен: одновременные обращения не запускают повторную загрузку.
+    Данные хранятся отсортированными по дате (см. index_by_date).
+    """
+
+    def __init__(
+        self,
+        file_path: Optional[str] = Config.DATA_FILE_PATH,
+        loader: Callable[[str], DataFrame] = load_transactions,
+    ) -> None:
+        self.file_path = file_path
+        self._loader = loader
+        self._lock = threading.RLock()
+        self._df: Optional[DataFrame] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._derived: Dict[str, Tuple[int, Any, Optional[Updater]]] = {}
+        self.version = 0
+
+    @classmethod
+    def from_frame(cls, df: DataFrame) -> "TransactionStore":
+        """Создает хранилище поверх готового DataFrame без файла"""
+        store = cls(file_path=None)
+        store._df = _prepare(df)
+        store.version = 1
+        return store
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        if self.file_path is None:
+            return None
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _is_fresh(self) -> bool:
+        if self._df is None:
+            return False
+        if self.file_path is None:
+            return True
+        return self._file_stamp() == self._stamp
+
+    def _frame(self) -> DataFrame:
+        df = self._df
+        if df is not None and self._is_fresh():
+            return df
+
+        with self._lock:
+            if not self._is_fresh():
+                stamp = self._file_stamp()
+                assert self.file_path is not None
+                self._df = _prepare(self._loader(self.file_path))
+                self._stamp = stamp
+                self.version += 1
+                logger.info(f"Транзакции загружены: {len(self._df)} строк")
+            assert self._df is not None
+            return self._df
+
+    @property
+    def lock(self) -> ContextManager[bool]:
+        """Блокировка хранилища для составных операций"""
+        return self._lock
+
+    def peek(self) -> Optional[DataFrame]:
+        """Текущие данные без проверки файла (None - еще не загружены)"""
+        return self._df
+
+    def touch(self) -> None:
+        """Считает текущие данные актуальными для файла на диске"""
+        with self._lock:
+            self._stamp = self._file_stamp()
+
+    def get(self) -> DataFrame:
+        """
+        Возвращает транзакции только для чтения
+
+        Returns:
+            Поверхностная копия общего DataFrame: добавление, удаление
+            и замена колонок не затрагивают общие данные, а запись
+            в ячейки вызывает ValueError (массивы только для чтения)
+        """
+        return self._frame().copy(deep=False)
+
+    def derived(
+        self,
+        name: str,
+        factory: Callable[[DataFrame], T],
+        updater: Optional[Callable[[T, DataFrame, DataFrame], None]] = None,
+    ) -> T:
+        """
+        Возвращает структуру, построенную по текущим данным
+
+        Структура (индекс, агрегаты и т.п.) строится один раз и
+        перестраивается только после перезагрузки данных. Если передан
+        updater, при append() структура дополняется новыми строками
+        вместо перестроения.
+
+        Args:
+            name: Имя структуры
+            factory: Функция, строящая структуру по DataFrame
+            updater: Функция (структура, новые строки, все данные),
+                изменяющая структуру на месте
+
+        Returns:
+            Результат factory для текущей версии данных
+        """
+        with self._lock:
+            df = self._frame()
+            cached = self._derived.get(name)
+            if cached is not None and cached[0] == self.version:
+                return cast(T, cached[1])
+            value = factory(df)
+            self._derived[name] = (self.version, value, updater)
+            return value
+
+    def append(self, rows: DataFrame) -> int:
+        """
+        Дописывает новые транзакции без перечитывания файла
+
+        Если все новые строки не старше уже загруженных, позиции старых
+        строк не меняются и производные структуры с updater дополняются
+        на месте; иначе они будут построены заново при обращении.
+
+        Args:
+            rows: Очищенные новые транзакции
+
+        Returns:
+            Количество добавленных строк
+        """
+        if rows.empty:
+            return 0
+
+        with self._lock:
+            current = self._df if self._df is not None else self._frame()
+            added = _prepare(rows)
+            at_end = current.empty or (
+                added["Дата операции"].min() >= current["Дата операции"].max()
+            )
+            combined = _prepare(pd.concat([current, added]))
+
+            previous = self.version
+            self._df = combined
+            self._stamp = self._file_stamp()
+            self.version += 1
+
+            for name, (version, value, updater) in list(self._derived.items()):
+                if at_end and updater is not None and version == previous:
+                    updater(value, added, combined)
+                    self._derived[name] = (self.version, value, updater)
+                else:
+                    del self._derived[name]
+            return len(added)
+
+    def replace(self, df: DataFrame) -> None:
+        """Подменяет данные хранилища (например, после дозагрузки)"""
+        with self._lock:
+            self._df = _prepare(df)
+            self._stamp = self._file_stamp()
+            self.version += 1
+
+    def invalidate(self) -> None:
+        """Сбрасывает данные, следующее обращение перечитает файл"""
+        with self._lock:
+            if self.file_path is not None:
+                self._df = None
+                self._stamp = None
+
+
+Transactions = Union[List[Dict[str, Any]], DataFrame, TransactionStore]
+
+def as_dataframe(transactions: Transactions, copy: bool = True) -> DataFrame:
+    """
+    Приводит список словарей, DataFrame или хранилище к DataFrame
+
+    Args:
+        transactions: Список транзакций, DataFrame или TransactionStore
+        copy: Копировать ли переданный DataFrame
+
+    Returns:
+        DataFrame с транзакциями
+    """
+    if isinstance(transactions, TransactionStore):
+        return transactions.get()
+    if isinstance(transactions, DataFrame):
+        return transactions.copy() if copy else transactions
+    return pd.DataFrame(transactions)
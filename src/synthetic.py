@@ -0,0 +1,219 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from src.utils import clean_transactions
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+
+# Предел строк листа Excel без заголовка
+XLSX_MAX_ROWS = 1_048_575
+
+# Категория: (доля операций, MCC, медиана суммы, доход ли, описания)
+CATEGORIES: Dict[str, Tuple[float, Optional[float], float, bool, List[str]]] = {
+    "Супермаркеты": (
+        0.34,
+        5411.0,
+        150.0,
+        False,
+        ["Колхоз", "Магнит", "Пятёрочка", "Перекрёсток", "ВкусВилл"],
+    ),
+    "Фастфуд": (
+        0.19,
+        5814.0,
+        250.0,
+        False,
+        ["Mouse Tail", "KFC", "Вкусно и точка", "Шаурма"],
+    ),
+    "Транспорт": (0.06, 4121.0, 300.0, False, ["Яндекс Такси", "Ситимобил"]),
+    "Переводы": (
+        0.05,
+        6012.0,
+        3000.0,
+        False,
+        [
+            "Константин Л.",
+            "Светлана Т.",
+            "Дмитрий Ш.",
+            "Андрей Х.",
+            "Перевод Ивану И.",
+            "Перевод Анне С.",
+            "Перевод Кредитная карта. ТП 10.2 RUR",
+        ],
+    ),
+    "Ж/д билеты": (0.04, 4112.0, 1500.0, False, ["РЖД"]),
+    "Различные товары": (0.03, 5399.0, 600.0, False, ["Ozon.ru", "Wildberries"]),
+    "Мобильная связь": (
+        0.03,
+        None,
+        300.0,
+        False,
+        ["Тинькофф Мобайл", "Я МТС", "Билайн"],
+    ),
+    "Пополнения": (
+        0.03,
+        None,
+        10000.0,
+        True,
+        ["Пополнение через Газпромбанк", "Внесение наличных через банкомат"],
+    ),
+    "Аптеки": (0.02, 5912.0, 400.0, False, ["Аптека Вита", "Ригла"]),
+    "Каршеринг": (0.02, 7512.0, 350.0, False, ["Ситидрайв", "Яндекс Драйв"]),
+    "Рестораны": (0.02, 5812.0, 1500.0, False, ["Шоколадница", "Теремок"]),
+    "Бонусы": (0.015, None, 100.0, True, ["Кешбэк за обычные покупки"]),
+    "Наличные": (0.015, 6011.0, 3000.0, False, ["Снятие в банкомате Сбербанк"]),
+    "Дом и ремонт": (0.015, 5200.0, 1200.0, False, ["Леруа Мерлен", "OBI"]),
+    "ЖКХ": (0.01, None, 4000.0, False, ["ЖКУ Квартира"]),
+    "Зарплата": (0.005, None, 60000.0, True, ["Зарплата"]),
+    "Одежда и обувь": (0.01, 5651.0, 2500.0, False, ["Zara", "Спортмастер"]),
+    "Другое": (0.01, 5817.0, 500.0, False, ["Google Play", "App Store"]),
+    "": (0.006, None, 200.0, False, [""]),
+}
+PHONE_CATEGORY = "Мобильная связь"
+CARDS = np.array(["*7197", "*4556", "*5091", "*5441", "*1112"], dtype=object)
+CARD_WEIGHTS = np.array([0.72, 0.17, 0.06, 0.03, 0.02])
+CURRENCIES = np.array(["RUB", "TRY", "EUR", "CNY", "USD"], dtype=object)
+CURRENCY_WEIGHTS = np.array([0.98, 0.011, 0.0045, 0.0027, 0.0018])
+
+
+def _phone_descriptions(rng: np.random.Generator, names: List[str]) -> List[str]:
+    """Описания пополнения связи с номерами телефонов"""
+    result = []
+    for name in names:
+        for _ in range(20):
+            code, a, b, c = rng.integers([900, 100, 10, 10], [1000, 1000, 100, 100])
+            result.append(f"{name} +7 {code} {a}-{b}-{c}")
+    return result
+
+
+def generate_transactions(
+    n_rows: int,
+    seed: int = 0,
+    start: str = "2018-01-01",
+    end: str = "2021-12-31",
+) -> pd.DataFrame:
+    """
+    Генерирует правдоподобные транзакции с колонками выписки банка
+
+    Результат повторяется при одинаковом seed и очищен так же, как
+    данные из load_transactions. Строки упорядочены от новых к старым,
+    как в выписке.
+
+    Args:
+        n_rows: Количество строк
+        seed: Зерно генератора
+        start: Первая дата периода
+        end: Последняя дата периода
+
+    Returns:
+        DataFrame с колонками STATEMENT_COLUMNS и номером телефона
+    """
+    rng = np.random.default_rng(seed)
+    names = list(CATEGORIES)
+    weights = np.array([CATEGORIES[c][0] for c in names])
+    codes = rng.choice(len(names), size=n_rows, p=weights / weights.sum())
+
+    low = pd.Timestamp(start).value // 10**9
+    high = pd.Timestamp(end).value // 10**9 + 86_400
+    seconds = np.sort(rng.integers(low, high, size=n_rows))[::-1]
+    dates = pd.to_datetime(seconds, unit="s")
+    day_codes, days = pd.factorize(dates.normalize())
+    payment_dates = np.asarray(days.strftime("%d.%m.%Y"), dtype=object)[day_codes]
+
+    medians = np.array([CATEGORIES[c][2] for c in names])
+    income = np.array([CATEGORIES[c][3] for c in names])
+    magnitude = np.round(medians[codes] * rng.lognormal(0.0, 0.8, n_rows), 2)
+    amounts = np.where(income[codes], magnitude, -magnitude)
+
+    descriptions = np.empty(n_rows, dtype=object)
+    for i, name in enumerate(names):
+        pool = CATEGORIES[name][4]
+        if name == PHONE_CATEGORY:
+            pool = _phone_descriptions(rng, pool)
+        rows = np.flatnonzero(codes == i)
+        descriptions[rows] = np.asarray(pool, dtype=object)[
+            rng.integers(0, len(pool), len(rows))
+        ]
+
+    mcc = np.array(
+        [np.nan if m is None else m for m in (CATEGORIES[c][1] for c in names)]
+    )
+    failed = rng.random(n_rows) < 0.006
+    expense = amounts < 0
+    bonuses = np.where(expense & ~failed, np.floor(magnitude / 100), 0.0)
+    cashback = np.where(
+        expense & (rng.random(n_rows) < 0.09), np.round(magnitude * 0.01), np.nan
+    )
+    currencies = rng.choice(CURRENCIES, size=n_rows, p=CURRENCY_WEIGHTS)
+
+    df = pd.DataFrame(
+        {
+            "Дата операции": dates,
+            "Дата платежа": payment_dates,
+            "Номер карты": rng.choice(CARDS, size=n_rows, p=CARD_WEIGHTS),
+            "Статус": np.where(failed, "FAILED", "OK").astype(object),
+            "Сумма операции": amounts,
+            "Валюта операции": currencies,
+            "Сумма платежа": amounts,
+            "Валюта платежа": currencies,
+            "Кэшбэк": cashback,
+            "Категория": np.asarray(names, dtype=object)[codes],
+            "MCC": mcc[codes],
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": bonuses,
+            "Округление на инвесткопилку": np.zeros(n_rows),
+            "Сумма операции с округлением": magnitude,
+        },
+        columns=STATEMENT_COLUMNS,
+    )
+    return clean_transactions(df)
+
+
+def write_statement(df: pd.DataFrame, file_path: str) -> None:
+    """
+    Записывает транзакции в xlsx в формате выписки банка
+
+    Args:
+        df: Транзакции (например, из generate_transactions)
+        file_path: Путь к создаваемому файлу
+
+    Raises:
+        ValueError: Если строк больше, чем помещается на лист Excel
+    """
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"На лист Excel помещается не больше {XLSX_MAX_ROWS} строк")
+
+    columns = [c for c in STATEMENT_COLUMNS if c in df.columns]
+    frame = df[columns].reset_index(drop=True)
+    if "Дата операции" in frame.columns:
+        frame["Дата операции"] = frame["Дата операции"].dt.strftime("%d.%m.%Y %H:%M:%S")
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for row in frame.itertuples(index=False, name=None):
+        sheet.append(row)
+    workbook.save(file_path)
+    logger.info(f"Записана выписка {file_path}: {len(frame)} строк")
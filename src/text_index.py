@@ -0,0 +1,350 @@
+import json
+import logging
+import os
+import re
+from functools import reduce
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = ".index.npz"
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def index_path(file_path: str) -> str:
+    """Путь к файлу индекса рядом с исходными данными"""
+    source = Path(file_path)
+    return str(source.with_name(source.stem + INDEX_SUFFIX))
+
+
+def normalize_token(token: str) -> str:
+    """Приводит слово к виду для индекса: нижний регистр, ё -> е"""
+    return token.lower().replace("ё", "е")
+
+
+def tokenize(text: str) -> Set[str]:
+    """Разбивает описание на нормализованные слова"""
+    return {normalize_token(t) for t in TOKEN_PATTERN.findall(text)}
+
+
+def trigrams(text: str) -> Set[str]:
+    """Возвращает множество триграмм строки"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс по колонке "Описание"
+
+    Одинаковые описания хранятся один раз: каждой строке соответствует
+    номер различного описания в нижнем регистре. Два словаря - слово ->
+    номера описаний и триграмма -> номера описаний. Поиск подстроки
+    сужает кандидатов пересечением списков триграмм, проверяет их так
+    же, как simple_search (вхождение в описание в нижнем регистре), и
+    переводит найденные описания в позиции строк, поэтому результат
+    совпадает с линейным поиском. Позиции строк заранее сгруппированы
+    по описаниям, и перевод стоит порядка числа найденных строк.
+    Описания строк в нижнем регистре доступны как lower, их использует
+    SearchEngine вместо своей копии.
+    """
+
+    def __init__(self) -> None:
+        self.lower = pd.Series([], dtype=object)
+        self._texts: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._codes = np.empty(0, dtype=np.int32)
+        self._tokens: Dict[str, np.ndarray] = {}
+        self._grams: Dict[str, np.ndarray] = {}
+        self._positions: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def build(cls, descriptions: Iterable[Any]) -> "InvertedIndex":
+        """Строит индекс по списку описаний"""
+        index = cls()
+        index.extend(descriptions)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def extend(self, descriptions: Iterable[Any]) -> None:
+        """
+        Добавляет описания новых строк в конец индекса
+
+        Слова и триграммы выделяются только для описаний, которых еще
+        не было; списки строятся без цикла по строкам: все пары
+        (ключ, описание) сортируются, и каждый ключ получает срез
+        общего массива.
+
+        Args:
+            descriptions: Описания добавленных транзакций
+        """
+        raw = pd.Series([str(v) for v in descriptions], dtype=object)
+        if raw.empty:
+            return
+        codes, uniques = pd.factorize(raw)
+        first_new = len(self._texts)
+        ids = np.empty(len(uniques), dtype=np.int32)
+        for i, text in enumerate(pd.Series(uniques, dtype=object).str.lower()):
+            known = self._ids.get(text)
+            if known is None:
+                known = self._ids[text] = len(self._texts)
+                self._texts.append(text)
+            ids[i] = known
+
+        added = pd.Series(self._texts[first_new:], dtype=object)
+        if not added.empty:
+            words = added.str.replace("ё", "е", regex=False).str.findall(TOKEN_PATTERN)
+            words = words.explode().dropna()
+            _merge(
+                self._tokens,
+                _postings(
+                    words.to_numpy(dtype=object), words.index.to_numpy() + first_new
+                ),
+            )
+            grams, owners = _trigram_codes(added)
+            _merge(self._grams, _postings(grams, owners + first_new, _decode_trigram))
+
+        row_ids = ids[codes]
+        texts = np.asarray(self._texts, dtype=object)
+        self._codes = np.concatenate((self._codes, row_ids))
+        self._positions = None
+        self.lower = pd.concat(
+            [self.lower, pd.Series(texts[row_ids], dtype=object)], ignore_index=True
+        )
+
+    def lengths(self) -> np.ndarray:
+        """Длины описаний строк в символах"""
+        sizes = np.fromiter(
+            (len(text) for text in self._texts), dtype=np.int64, count=len(self._texts)
+        )
+        return sizes[self._codes]
+
+    def _row_positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Позиции строк, сгруппированные по номеру описания
+
+        Returns:
+            (позиции, границы): строки описания i - позиции
+            [границы[i], границы[i + 1])
+        """
+        positions = self._positions
+        if positions is None:
+            order = np.argsort(self._codes, kind="stable")
+            counts = np.bincount(self._codes, minlength=len(self._texts))
+            positions = (order, np.concatenate(([0], np.cumsum(counts))))
+            self._positions = positions
+        return positions
+
+    def _rows(self, ids: np.ndarray) -> np.ndarray:
+        """Позиции строк с указанными номерами описаний"""
+        if not len(ids):
+            return np.empty(0, dtype=np.int64)
+        order, bounds = self._row_positions()
+        starts, sizes = bounds[ids], bounds[ids + 1] - bounds[ids]
+        total = int(sizes.sum())
+        # Индексы всех срезов [starts, starts + sizes) одним массивом
+        shift = np.repeat(starts - np.cumsum(sizes) + sizes, sizes)
+        return np.sort(order[shift + np.arange(total)])
+
+    def substring(self, query: str) -> np.ndarray:
+        """
+        Позиции строк, описание которых содержит подстроку
+
+        Args:
+            query: Строка для поиска (без учета регистра)
+
+        Returns:
+            Отсортированный массив позиций
+        """
+        needle = query.lower()
+        if len(needle) < 3:
+            candidates = np.arange(len(self._texts))
+        else:
+            lists = []
+            for gram in trigrams(needle):
+                postings = self._grams.get(gram)
+                if postings is None:
+                    return np.empty(0, dtype=np.int64)
+                lists.append(postings)
+            lists.sort(key=len)
+            candidates = reduce(
+                lambda a, b: np.intersect1d(a, b, assume_unique=True), lists
+            )
+        texts = self._texts
+        return self._rows(
+            np.asarray([i for i in candidates if needle in texts[i]], dtype=np.int64)
+        )
+
+    def word(self, term: str) -> np.ndarray:
+        """Позиции строк, содержащих слово целиком"""
+        postings = self._tokens.get(normalize_token(term))
+        if postings is None:
+            return np.empty(0, dtype=np.int64)
+        return self._rows(postings)
+
+    def search(
+        self, terms: Sequence[str], mode: str = "and", whole_words: bool = False
+    ) -> np.ndarray:
+        """
+        Поиск по нескольким терминам
+
+        Args:
+            terms: Подстроки или слова для поиска
+            mode: 'and' - все термины, 'or' - хотя бы один
+            whole_words: Искать слова целиком, а не подстроки
+
+        Returns:
+            Отсортированный массив позиций
+
+        Raises:
+            ValueError: При некорректном режиме
+        """
+        if mode not in ("and", "or"):
+            raise ValueError(f"Некорректный режим поиска: {mode}")
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+
+        lookup = self.word if whole_words else self.substring
+        results = [lookup(term) for term in terms]
+        if mode == "and":
+            results.sort(key=len)
+            return reduce(
+                lambda a, b: np.intersect1d(a, b, assume_unique=True), results
+            )
+        return reduce(np.union1d, results)
+
+    def save(self, path: str, key: Dict[str, Any]) -> None:
+        """
+        Сохраняет индекс в .npz
+
+        Args:
+            path: Путь к файлу индекса
+            key: Ключ исходных данных, при несовпадении индекс не загрузится
+        """
+        arrays: Dict[str, np.ndarray] = {
+            "texts": np.asarray(self._texts, dtype=str),
+            "codes": self._codes,
+        }
+        for name, table in (("tokens", self._tokens), ("grams", self._grams)):
+            keys = sorted(table)
+            lengths = [len(table[k]) for k in keys]
+            arrays[f"{name}_keys"] = np.asarray(keys, dtype=str)
+            arrays[f"{name}_offsets"] = np.concatenate(([0], np.cumsum(lengths)))
+            arrays[f"{name}_postings"] = (
+                np.concatenate([table[k] for k in keys])
+                if keys
+                else np.empty(0, dtype=np.int32)
+            )
+        meta = {"version": INDEX_VERSION, "key": key, "rows": len(self)}
+        arrays["__meta__"] = np.array(json.dumps(meta, ensure_ascii=False))
+
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)  # type: ignore[arg-type]
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, key: Dict[str, Any]) -> Optional["InvertedIndex"]:
+        """
+        Загружает индекс, если он построен по тем же данным
+
+        Args:
+            path: Путь к файлу индекса
+            key: Ожидаемый ключ исходных данных
+
+        Returns:
+            InvertedIndex или None
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["__meta__"]))
+                if meta.get("version") != INDEX_VERSION or meta.get("key") != key:
+                    return None
+                index = cls()
+                index._texts = data["texts"].tolist()
+                index._ids = {text: i for i, text in enumerate(index._texts)}
+                index._codes = data["codes"]
+                texts = np.asarray(index._texts, dtype=object)
+                index.lower = pd.Series(texts[index._codes], dtype=object)
+                for name in ("tokens", "grams"):
+                    keys = data[f"{name}_keys"].tolist()
+                    offsets = data[f"{name}_offsets"]
+                    postings = data[f"{name}_postings"]
+                    table = {
+                        k: postings[offsets[i]:offsets[i + 1]]
+                        for i, k in enumerate(keys)
+                    }
+                    setattr(index, f"_{name}", table)
+            return index
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать индекс {path}: {e}")
+            return None
+
+
+def _trigram_codes(lower: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Коды всех триграмм описаний и номера описаний, где они встречаются
+
+    Описания склеиваются через нулевой символ и переводятся в массив
+    кодов символов; триграмма кодируется тремя 21-битными кодами.
+    """
+    lengths = lower.str.len().to_numpy(dtype=np.int64)
+    chars = np.frombuffer(
+        ("\x00".join(lower) + "\x00").encode("utf-32-le"), dtype=np.uint32
+    ).astype(np.int64)
+    owners = np.repeat(np.arange(len(lengths)), lengths + 1)
+    if len(chars) < 3:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    codes = (chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:]
+    valid = (chars[:-2] != 0) & (chars[1:-1] != 0) & (chars[2:] != 0)
+    return codes[valid], owners[:-2][valid]
+
+
+def _decode_trigram(code: int) -> str:
+    mask = (1 << 21) - 1
+    return chr(code >> 42) + chr((code >> 21) & mask) + chr(code & mask)
+
+
+def _postings(
+    keys: np.ndarray,
+    owners: np.ndarray,
+    decode: Optional[Callable[[Any], str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Группирует пары (ключ, номер описания) в списки без повторов
+
+    Returns:
+        Словарь {ключ: отсортированные номера int32}; массивы - срезы
+        одного общего массива
+    """
+    if not len(keys):
+        return {}
+    codes, uniques = pd.factorize(keys)
+    order = np.lexsort((owners, codes))
+    codes, owners = codes[order], owners[order]
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = (codes[1:] != codes[:-1]) | (owners[1:] != owners[:-1])
+    codes, owners = codes[keep], owners[keep].astype(np.int32)
+    bounds = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1], True])
+    names = [
+        decode(uniques[c]) if decode else str(uniques[c]) for c in codes[bounds[:-1]]
+    ]
+    return {
+        name: owners[start:end]
+        for name, start, end in zip(names, bounds[:-1], bounds[1:])
+    }
+
+
+def _merge(table: Dict[str, np.ndarray], additions: Dict[str, np.ndarray]) -> None:
+    """Дописывает новые номера в конец списков индекса"""
+    for key, added in additions.items():
+        current = table.get(key)
+        table[key] = added if current is None else np.concatenate((current, added))
@@ -0,0 +1,187 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.cube import cube_for
+from src.memo import memoize
+from src.metrics import instrument
+from src.store import Transactions
+
+TREND_KEYS = ("category", "card", "total")
+DEFAULT_WINDOWS = (7, 30, 90)
+
+
+@dataclass
+class SpendingTrends:
+    """
+    Ежедневные расходы по ключам на сплошном календаре
+
+    Строка daily - ключ (категория, карта или 'total'), столбец - день
+    из days без пропусков: дни без операций заполнены нулями, поэтому
+    скользящие окна считаются по календарным дням, а не по строкам.
+    Скользящие, накопленные и месячные суммы получаются из одной
+    накопленной суммы по строке без группировок по окнам.
+    Массивы общие для всех копий из кэша, их нельзя изменять.
+    """
+
+    days: np.ndarray
+    keys: List[str]
+    daily: np.ndarray
+
+    def __sizeof__(self) -> int:
+        return int(self.days.nbytes + self.daily.nbytes) + sum(
+            sys.getsizeof(k) for k in self.keys
+        )
+
+    def cumulative(self) -> np.ndarray:
+        """Накопленные расходы с первого дня, форма (ключи, дни)"""
+        return np.cumsum(self.daily, axis=1)
+
+    def _padded_cumulative(self) -> np.ndarray:
+        zeros = np.zeros((len(self.keys), 1))
+        return np.concatenate((zeros, self.cumulative()), axis=1)
+
+    def rolling(self, window: int) -> np.ndarray:
+        """
+        Расходы за последние window календарных дней, включая текущий
+
+        Args:
+            window: Ширина окна в днях
+
+        Returns:
+            Массив формы (ключи, дни)
+
+        Raises:
+            ValueError: При ширине окна меньше 1
+        """
+        return self.rolling_many([window])[window]
+
+    def rolling_many(self, windows: Sequence[int]) -> Dict[int, np.ndarray]:
+        """Несколько скользящих окон по одной накопленной сумме"""
+        if any(w < 1 for w in windows):
+            raise ValueError(f"Некорректная ширина окна: {list(windows)}")
+        padded = self._padded_cumulative()
+        ends = np.arange(1, len(self.days) + 1)
+        result = {}
+        for window in windows:
+            starts = np.maximum(ends - window, 0)
+            result[window] = padded[:, ends] - padded[:, starts]
+        return result
+
+    def monthly(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Расходы по календарным месяцам
+
+        Returns:
+            (месяцы datetime64[M], суммы формы (ключи, месяцы))
+        """
+        months = self.days.astype("datetime64[M]")
+        labels, starts = np.unique(months, return_index=True)
+        if not len(labels):
+            return labels, np.zeros((len(self.keys), 0))
+        return labels, np.add.reduceat(self.daily, starts, axis=1)
+
+    def month_over_month(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Изменение расходов к предыдущему месяцу
+
+        Returns:
+            (месяцы, разницы формы (ключи, месяцы)); для первого месяца NaN
+        """
+        labels, totals = self.monthly()
+        deltas = np.full_like(totals, np.nan)
+        deltas[:, 1:] = np.diff(totals, axis=1)
+        return labels, deltas
+
+    def to_dict(self, windows: Sequence[int] = DEFAULT_WINDOWS) -> Dict[str, Any]:
+        """
+        Данные для графиков: подписи осей и ряды, выровненные по ним
+
+        Суммы округлены до копеек, отсутствующие значения - None.
+        """
+
+        def rows(values: np.ndarray) -> List[List[Optional[float]]]:
+            rounded = np.round(values, 2).astype(object)
+            rounded[np.isnan(values)] = None
+            return rounded.tolist()
+
+        months, monthly = self.monthly()
+        _, deltas = self.month_over_month()
+        return {
+            "keys": list(self.keys),
+            "days": [str(d) for d in self.days],
+            "months": [str(m) for m in months],
+            "daily": rows(self.daily),
+            "cumulative": rows(self.cumulative()),
+            "rolling": {str(w): rows(v) for w, v in self.rolling_many(windows).items()},
+            "monthly": rows(monthly),
+            "month_over_month": rows(deltas),
+        }
+
+
+@instrument()
+@memoize()
+def spending_trends(
+    transactions: Transactions,
+    by: str = "category",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> SpendingTrends:
+    """
+    Ежедневные расходы по категориям или картам на сплошном календаре
+
+    Строится по кубу агрегатов (одна строка на день и ключ), поэтому
+    стоимость зависит от числа дней и ключей, а не транзакций.
+    Операции вне [start, end] не учитываются, в том числе в окнах
+    первых дней.
+
+    Args:
+        transactions: Список транзакций, DataFrame или TransactionStore
+        by: 'category', 'card' или 'total' (все расходы одной строкой)
+        start: Первый день 'YYYY-MM-DD' (None - с начала данных)
+        end: Последний день 'YYYY-MM-DD' включительно (None - до конца)
+
+    Returns:
+        SpendingTrends с расходами в виде положительных сумм
+
+    Raises:
+        ValueError: При неизвестном ключе
+    """
+    if by not in TREND_KEYS:
+        raise ValueError(f"Неизвестный ключ: {by}")
+
+    table = cube_for(transactions).table
+    table = table[table["sign"] < 0]
+    days = table["day"].to_numpy().astype("datetime64[D]")
+    if start is not None:
+        keep = days >= np.datetime64(start, "D")
+        table, days = table[keep], days[keep]
+    if end is not None:
+        keep = days <= np.datetime64(end, "D")
+        table, days = table[keep], days[keep]
+
+    if not len(days):
+        empty = np.empty(0, dtype="datetime64[D]")
+        return SpendingTrends(empty, [], np.zeros((0, 0)))
+
+    first = np.datetime64(start, "D") if start is not None else days.min()
+    last = np.datetime64(end, "D") if end is not None else days.max()
+    calendar = np.arange(first, last + 1)
+    if by == "total":
+        codes = np.zeros(len(days), dtype=np.int64)
+        keys = ["total"]
+    else:
+        codes, uniques = pd.factorize(table[by].to_numpy(), sort=True)
+        keys = [str(k) for k in uniques]
+
+    offsets = (days - first).astype(np.int64)
+    spent = -table["amount"].to_numpy(dtype=float)
+    flat = np.bincount(
+        codes * len(calendar) + offsets,
+        weights=spent,
+        minlength=len(keys) * len(calendar),
+    )
+    return SpendingTrends(calendar, keys, flat.reshape(len(keys), len(calendar)))
@@ -1,21 +1,235 @@
+import copy
+import json
 import logging
-from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Union
+import os
+import re
+import sys
+import threading
+from datetime import date, datetime
+from typing import (TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple,
+                    Union)
 
+import numpy as np
 import pandas as pd
+from openpyxl import load_workbook
 
 from src.config import Config
+from src.greeting import get_greeting  # noqa: F401
+from src.metrics import instrument
+from src.snapshot import load_snapshot, save_snapshot, source_key
+
+if TYPE_CHECKING:
+    from src.quotes import QuoteService
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def load_transactions(file_path: str = Config.DATA_FILE_PATH) -> pd.DataFrame:
+TRANSACTION_COLUMNS = ["Дата операции", "Сумма операции", "Категория", "Описание"]
+
+PHONE_COLUMN = "Номер телефона"
+PHONE_PATTERN = re.compile(
+    r"(?:\+7|8)[\s-]?\(?(\d{3})\)?[\s-]?(\d{3})[\s-]?(\d{2})[\s-]?(\d{2})"
+)
+
+
+def normalize_phone(phone: str) -> str:
+    """
+    Приводит номер телефона к виду +7XXXXXXXXXX
+
+    Args:
+        phone: Номер в любом из поддерживаемых форматов
+
+    Returns:
+        Нормализованный номер или пустая строка, если номер не распознан
+    """
+    match = PHONE_PATTERN.search(phone)
+    return "+7" + "".join(match.groups()) if match else ""
+
+
+def extract_phone_numbers(descriptions: pd.Series) -> pd.Series:
+    """
+    Извлекает первый номер телефона из каждого описания
+
+    Args:
+        descriptions: Колонка "Описание"
+
+    Returns:
+        Колонка номеров вида +7XXXXXXXXXX ("" - номера нет)
+    """
+    parts = descriptions.astype(str).str.extract(PHONE_PATTERN)
+    phones = "+7" + parts[0] + parts[1] + parts[2] + parts[3]
+    return phones.fillna("").astype(object)
+
+
+def clean_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводит сырые данные выписки к рабочим типам
+
+    Args:
+        df: DataFrame, прочитанный из выписки
+
+    Returns:
+        DataFrame с датами, текстом и числами в нужных типах и колонкой
+        нормализованных номеров телефонов
+    """
+    if df.empty:
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    # Преобразование дат
+    if "Дата операции" in df.columns:
+        df["Дата операции"] = pd.to_datetime(
+            df["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
+        )
+        df = df.dropna(subset=["Дата операции"])
+
+    # Текстовые поля
+    text_cols = ["Описание", "Категория"]
+    for col in text_cols:
+        if col in df.columns:
+            df[col] = df[col].fillna("").astype(str)
+
+    # Числовые поля
+    num_cols = ["Сумма операции", "Бонусы (включая кэшбэк)"]
+    for col in num_cols:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+
+    # Номера телефонов из описания
+    if "Описание" in df.columns:
+        df[PHONE_COLUMN] = extract_phone_numbers(df["Описание"])
+
+    return df
+
+
+CATEGORICAL_COLUMNS = [
+    "Категория",
+    "Номер карты",
+    "Статус",
+    "Валюта операции",
+    "Валюта платежа",
+]
+SMALL_NUMBER_COLUMNS = [
+    "Кэшбэк",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "MCC",
+]
+
+
+def compact_transactions(
+    df: pd.DataFrame,
+    columns: Optional[List[str]] = None,
+    amount_dtype: str = "float64",
+) -> pd.DataFrame:
+    """
+    Уменьшает объем DataFrame с транзакциями в памяти
+
+    Повторяющиеся строковые поля (категория, карта, статус, валюты)
+    становятся categorical, одинаковые описания ссылаются на один объект,
+    бонусы и кэшбэк хранятся во float32. Суммы операций по умолчанию
+    остаются float64, чтобы итоги отчетов не теряли копейки.
+
+    Args:
+        df: DataFrame с транзакциями
+        columns: Оставить только эти колонки (None - все)
+        amount_dtype: Тип сумм операций и платежей ('float64' или 'float32')
+
+    Returns:
+        Новый DataFrame
+    """
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    df = df.copy()
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    for col in SMALL_NUMBER_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+
+    for col in ["Сумма операции", "Сумма платежа", "Сумма операции с округлением"]:
+        if col in df.columns:
+            df[col] = df[col].astype(amount_dtype)
+
+    for col in ["Описание", "Дата платежа", PHONE_COLUMN]:
+        if col in df.columns and df[col].dtype == object:
+            values = df[col].to_numpy()
+            uniques, codes = np.unique(values.astype(str), return_inverse=True)
+            interned = np.array([sys.intern(str(u)) for u in uniques], dtype=object)
+            deduped = interned[codes]
+            deduped[pd.isna(values)] = np.nan
+            df[col] = deduped
+
+    return df
+
+
+def memory_report(df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Объем памяти по колонкам, байт
+
+    Для строковых колонок одинаковые объекты учитываются один раз,
+    поэтому видна экономия от дедупликации описаний.
+
+    Args:
+        df: DataFrame
+
+    Returns:
+        Словарь {колонка: байт} с итогом под ключом 'total'
+    """
+    report: Dict[str, int] = {"index": int(df.index.memory_usage(deep=True))}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            values = series.to_numpy()
+            distinct = {id(v): v for v in values}
+            report[str(col)] = int(values.nbytes) + sum(
+                sys.getsizeof(v) for v in distinct.values()
+            )
+        else:
+            report[str(col)] = int(series.memory_usage(index=False, deep=True))
+    report["total"] = sum(report.values())
+    return report
+
+
+def to_base_currency(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Переводит суммы в Config.BASE_CURRENCY, если она задана
+
+    Снимок на диске хранит суммы как в выписке, поэтому перевод
+    выполняется при каждой загрузке по актуальной таблице курсов.
+    """
+    if not Config.BASE_CURRENCY:
+        return df
+    from src.currency import normalize_amounts
+
+    return normalize_amounts(df, Config.BASE_CURRENCY)
+
+
+@instrument()
+def load_transactions(
+    file_path: str = Config.DATA_FILE_PATH,
+    use_snapshot: bool = True,
+    compact: bool = False,
+    columns: Optional[List[str]] = None,
+    convert: bool = True,
+) -> pd.DataFrame:
     """
     Загружает транзакции из Excel файла
 
+    Если рядом с файлом лежит актуальный снимок (см. src.snapshot),
+    данные читаются из него, а разбор xlsx пропускается. Если задана
+    Config.BASE_CURRENCY, суммы операций переводятся в нее (см.
+    src.currency).
+
     Args:
         file_path: Путь к файлу
+        use_snapshot: Использовать ли снимок на диске
+        compact: Вернуть компактное представление (см. compact_transactions)
+        columns: Оставить только эти колонки
+        convert: Переводить ли суммы в Config.BASE_CURRENCY
 
     Returns:
         DataFrame с транзакциями
@@ -24,47 +238,195 @@ def load_transactions(file_path: str = Config.DATA_FILE_PATH) -> pd.DataFrame:
         Exception: При ошибках загрузки
     """
     try:
-        df = pd.read_excel(file_path, engine="openpyxl")
+        df = None
+        if use_snapshot:
+            df = load_snapshot(file_path)
 
-        if df.empty:
-            return pd.DataFrame(
-                columns=["Дата операции", "Сумма операции", "Категория", "Описание"]
-            )
+        if df is None:
+            key = source_key(file_path, with_hash=False)
+            df = clean_transactions(pd.read_excel(file_path, engine="openpyxl"))
+
+            if use_snapshot and not df.empty:
+                try:
+                    save_snapshot(df, file_path, key)
+                except Exception as e:
+                    logger.warning(f"Не удалось сохранить снимок: {e}")
+
+        if convert:
+            df = to_base_currency(df)
+        if compact:
+            return compact_transactions(df, columns)
+        if columns is not None:
+            return df[[c for c in columns if c in df.columns]]
+        return df
+
+    except Exception as e:
+        logger.error(f"Ошибка загрузки транзакций: {e}")
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+
+def iter_transaction_chunks(
+    file_path: str = Config.DATA_FILE_PATH, chunk_size: int = 50_000
+) -> Iterator[pd.DataFrame]:
+    """
+    Построчно читает Excel файл и выдает очищенные части
+
+    В памяти одновременно находится не больше chunk_size строк. К каждой
+    части применяется та же очистка, что и в load_transactions.
+
+    Args:
+        file_path: Путь к файлу
+        chunk_size: Количество строк в одной части
+
+    Yields:
+        DataFrame с очередной частью транзакций
+
+    Raises:
+        ValueError: При некорректном размере части
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Некорректный размер части: {chunk_size}")
 
-        # Преобразование дат
-        if "Дата операции" in df.columns:
-            df["Дата операции"] = pd.to_datetime(
-                df["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) for c in header]
+
+        buffer: List[Any] = []
+        for row in rows:
+            if all(v is None for v in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield to_base_currency(
+                    clean_transactions(pd.DataFrame(buffer, columns=columns))
+                )
+                buffer = []
+        if buffer:
+            yield to_base_currency(
+                clean_transactions(pd.DataFrame(buffer, columns=columns))
             )
-            df = df.dropna(subset=["Дата операции"])
+    finally:
+        workbook.close()
+
+
+DATE_INDEX_NAME = "operation_date"
+
+
+def index_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сортирует транзакции по дате операции и строит индекс по ней
 
-        # Текстовые поля
-        text_cols = ["Описание", "Категория"]
-        for col in text_cols:
-            if col in df.columns:
-                df[col] = df[col].fillna("").astype(str)
+    Колонка "Дата операции" сохраняется; индекс получает отдельное имя,
+    чтобы группировки по колонке оставались однозначными. Исходный
+    DataFrame не изменяется.
 
-        # Числовые поля
-        num_cols = ["Сумма операции", "Бонусы (включая кэшбэк)"]
-        for col in num_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    Args:
+        df: DataFrame с транзакциями
 
+    Returns:
+        DataFrame, отсортированный по дате, с индексом datetime64
+    """
+    if is_date_indexed(df):
         return df
 
-    except Exception as e:
-        logger.error(f"Ошибка загрузки транзакций: {e}")
-        return pd.DataFrame(
-            columns=["Дата операции", "Сумма операции", "Категория", "Описание"]
-        )
+    dates = df["Дата операции"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="%d.%m.%Y %H:%M:%S", errors="coerce")
+    valid = dates.notna().to_numpy()
+    order = dates[valid].argsort(kind="stable").to_numpy()
+
+    result = df[valid].iloc[order].copy(deep=False)
+    result["Дата операции"] = dates[valid].iloc[order].to_numpy()
+    result.index = pd.DatetimeIndex(result["Дата операции"], name=DATE_INDEX_NAME)
+    return result
+
+
+def is_date_indexed(df: pd.DataFrame) -> bool:
+    """Проверяет, что DataFrame уже подготовлен index_by_date"""
+    return (
+        isinstance(df.index, pd.DatetimeIndex)
+        and df.index.name == DATE_INDEX_NAME
+        and df.index.is_monotonic_increasing
+    )
+
+
+def period_bounds(
+    date_filter: Union[str, date, datetime], date_range: str = "M"
+) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """
+    Возвращает полуоткрытый интервал [начало, конец) для периода
+
+    Args:
+        date_filter: Дата внутри периода
+        date_range: Диапазон ('D'-день, 'W'-неделя, 'M'-месяц, 'Y'-год)
+
+    Returns:
+        Кортеж (начало, конец)
+
+    Raises:
+        ValueError: При некорректном диапазоне
+    """
+    day = pd.Timestamp(date_filter).normalize()
+
+    if date_range == "D":
+        start = day
+        end = start + pd.Timedelta(days=1)
+    elif date_range == "W":
+        start = day - pd.Timedelta(days=day.weekday())
+        end = start + pd.Timedelta(days=7)
+    elif date_range == "M":
+        start = day.replace(day=1)
+        end = start + pd.offsets.MonthBegin(1)
+    elif date_range == "Y":
+        start = day.replace(month=1, day=1)
+        end = start + pd.offsets.YearBegin(1)
+    else:
+        raise ValueError(f"Некорректный диапазон: {date_range}")
+
+    return start, end
+
+
+def filter_transactions_by_range(
+    df: pd.DataFrame,
+    start: Union[str, date, datetime],
+    end: Union[str, date, datetime],
+) -> pd.DataFrame:
+    """
+    Возвращает транзакции в интервале [start, end)
+
+    Для DataFrame, подготовленного index_by_date, это двоичный поиск
+    и срез без копирования данных.
+
+    Args:
+        df: DataFrame с транзакциями
+        start: Начало интервала (включительно)
+        end: Конец интервала (не включительно)
+
+    Returns:
+        Отфильтрованный DataFrame, отсортированный по дате
+    """
+    if df.empty:
+        return df
+    indexed = index_by_date(df)
+    lo, hi = indexed.index.searchsorted([pd.Timestamp(start), pd.Timestamp(end)])
+    return indexed.iloc[lo:hi]
 
 
+@instrument()
 def filter_transactions_by_date(
     df: pd.DataFrame, date_filter: Union[str, date, datetime], date_range: str = "M"
 ) -> pd.DataFrame:
     """
     Фильтрует транзакции по диапазону дат
 
+    Исходный DataFrame не изменяется. Результат отсортирован по дате
+    и проиндексирован (см. index_by_date), поэтому повторные вызовы
+    на нем выполняются двоичным поиском.
+
     Args:
         df: DataFrame с транзакциями
         date_filter: Дата для фильтрации
@@ -80,70 +442,114 @@ def filter_transactions_by_date(
         if df.empty:
             return df
 
-        # Преобразование даты фильтра
-        if isinstance(date_filter, str):
-            target_date = pd.to_datetime(date_filter).date()
-        elif isinstance(date_filter, datetime):
-            target_date = date_filter.date()
-        else:
-            target_date = date_filter
+        if date_range == "ALL":
+            return index_by_date(df)
 
-        # Проверка колонки с датами
-        if not pd.api.types.is_datetime64_any_dtype(df["Дата операции"]):
-            df["Дата операции"] = pd.to_datetime(
-                df["Дата операции"], format="%d.%m.%Y %H:%M:%S", errors="coerce"
-            )
-            df = df.dropna(subset=["Дата операции"])
-
-        df["operation_date"] = df["Дата операции"].dt.date
-
-        # Определение диапазона
-        if date_range == "W":
-            start_date = target_date - timedelta(days=target_date.weekday())
-            end_date = start_date + timedelta(days=6)
-        elif date_range == "M":
-            start_date = target_date.replace(day=1)
-            end_date = (start_date + timedelta(days=32)).replace(day=1) - timedelta(
-                days=1
-            )
-        elif date_range == "Y":
-            start_date = target_date.replace(month=1, day=1)
-            end_date = target_date.replace(month=12, day=31)
-        elif date_range == "ALL":
-            return df.drop(columns=["operation_date"])
-        else:
-            raise ValueError(f"Некорректный диапазон: {date_range}")
-
-        # Фильтрация
-        filtered = df[
-            (df["operation_date"] >= start_date) & (df["operation_date"] <= end_date)
-        ]
-        return filtered.drop(columns=["operation_date"])
+        start, end = period_bounds(date_filter, date_range)
+        return filter_transactions_by_range(df, start, end)
 
     except Exception as e:
         logger.error(f"Ошибка фильтрации: {e}")
         raise ValueError(f"Ошибка фильтрации: {e}")
 
 
-def get_greeting(time: datetime) -> str:
-    """Возвращает приветствие в зависимости от времени суток"""
-    hour = time.hour
-    if 5 <= hour < 12:
-        return "Доброе утро"
-    elif 12 <= hour < 17:
-        return "Добрый день"
-    elif 17 <= hour < 23:
-        return "Добрый вечер"
-    return "Доброй ночи"
+_settings_cache: Dict[str, Tuple[Optional[Tuple[int, int]], Dict[str, Any]]] = {}
+_settings_lock = threading.Lock()
+
+
+def _read_user_settings(path: str) -> Dict[str, Any]:
+    """Читает файл настроек и дополняет значениями по умолчанию"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            settings: Dict[str, Any] = json.load(f)
+    except Exception as e:
+        logger.warning(f"Не удалось прочитать настройки: {e}")
+        settings = {}
+    settings.setdefault("user_currencies", ["USD", "EUR"])
+    settings.setdefault("user_stocks", ["AAPL", "GOOG"])
+    return settings
+
+
+def load_user_settings(path: str = Config.USER_SETTINGS_PATH) -> Dict[str, Any]:
+    """
+    Загружает пользовательские настройки (валюты и акции)
+
+    Файл читается заново только при изменении его размера или mtime,
+    иначе возвращается копия ранее прочитанных настроек.
+
+    Args:
+        path: Путь к файлу настроек
+
+    Returns:
+        Словарь с ключами 'user_currencies' и 'user_stocks'
+    """
+    try:
+        stat = os.stat(path)
+        stamp: Optional[Tuple[int, int]] = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        stamp = None
+    with _settings_lock:
+        cached = _settings_cache.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, _read_user_settings(path))
+            _settings_cache[path] = cached
+        return copy.deepcopy(cached[1])
+
+
+def _quote_service() -> Optional["QuoteService"]:
+    """
+    Общий сервис котировок, если адреса API заданы
+
+    src.quotes (и aiohttp) импортируются только при настроенных API.
+    """
+    if not Config.EXCHANGE_API_URL or not Config.STOCK_API_URL:
+        return None
+    from src.quotes import default_quote_service
+
+    return default_quote_service()
 
 
 def get_currency_rates(currencies: List[str]) -> List[Dict[str, Any]]:
-    """Возвращает курсы валют"""
-    # В реальной реализации здесь должен быть API-запрос
+    """
+    Возвращает курсы валют
+
+    Если в Config заданы адреса API, курсы запрашиваются через общий
+    QuoteClient (см. src.quotes), иначе возвращаются локальные значения.
+    """
+    service = _quote_service()
+    if service is not None:
+        return service.quotes(currencies, [])[0]
     return [{"currency": c, "rate": 75.0 if c == "USD" else 90.0} for c in currencies]
 
 
 def get_stock_prices(stocks: List[str]) -> List[Dict[str, Any]]:
-    """Возвращает цены акций"""
-    # В реальной реализации здесь должен быть API-запрос
+    """
+    Возвращает цены акций
+
+    Если в Config заданы адреса API, цены запрашиваются через общий
+    QuoteClient (см. src.quotes), иначе возвращаются локальные значения.
+    """
+    service = _quote_service()
+    if service is not None:
+        return service.quotes([], stocks)[1]
     return [{"stock": s, "price": 150.0} for s in stocks]
+
+
+@instrument()
+def get_quotes(
+    currencies: List[str], stocks: List[str]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Возвращает курсы валют и цены акций одним параллельным запросом
+
+    Args:
+        currencies: Коды валют
+        stocks: Тикеры акций
+
+    Returns:
+        Кортеж (курсы валют, цены акций)
+    """
+    service = _quote_service()
+    if service is not None:
+        return service.quotes(currencies, stocks)
+    return get_currency_rates(currencies), get_stock_prices(stocks)
@@ -1,34 +1,59 @@
 import logging
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-
-from src.utils import (get_currency_rates, get_greeting, get_stock_prices,
-                       load_transactions)
+from src.metrics import instrument
+from src.period_index import PeriodIndex, period_index_for, period_to_date
+from src.store import TransactionStore
+from src.utils import (get_greeting, get_quotes, load_transactions,
+                       load_user_settings)
 
 logger = logging.getLogger(__name__)
 
 
-def home_page(date_time: str) -> Dict[str, Any]:
-    """Формирует данные для главной страницы."""
+def _period_index(store: Optional[TransactionStore]) -> PeriodIndex:
+    """Индекс периодов хранилища или только что загруженного файла"""
+    if store is not None:
+        return period_index_for(store)
+    return PeriodIndex.build(load_transactions())
+
+
+def _period(start: Optional[datetime], end: datetime) -> Dict[str, Optional[str]]:
+    return {
+        "start": None if start is None else str(start),
+        "end": str(end),
+    }
+
+
+@instrument()
+def home_page(
+    date_time: str, store: Optional[TransactionStore] = None, date_range: str = "M"
+) -> Dict[str, Any]:
+    """
+    Формирует данные для главной страницы.
+
+    Крупнейшие операции берутся за период от начала недели, месяца или
+    года (date_range: 'W', 'M', 'Y', 'ALL' - вся история) до date_time.
+    Если передано хранилище, транзакции берутся из него без чтения файла.
+    """
     try:
-        datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
-        transactions = load_transactions()
+        moment = datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
+        start, end = period_to_date(moment, date_range)
+        index = _period_index(store)
+
+        settings = load_user_settings()
+        currency_rates, stock_prices = get_quotes(
+            settings["user_currencies"], settings["user_stocks"]
+        )
 
         result: Dict[str, Any] = {
             "greeting": get_greeting(datetime.now()),
             "cards": ["•••• 1234", "•••• 5678"],
-            "currency_rates": get_currency_rates(["USD", "EUR"]),
-            "stock_prices": get_stock_prices(["AAPL", "GOOG"]),
+            "currency_rates": currency_rates,
+            "stock_prices": stock_prices,
+            "period": _period(start, end),
+            "top_transactions": index.top(start, end, 5),
         }
-
-        if not transactions.empty:
-            result["top_transactions"] = transactions.nlargest(
-                5, "Сумма операции"
-            ).to_dict("records")
-        else:
-            result["top_transactions"] = []
-
         return result
     except Exception as e:
         logger.error(f"Ошибка в home_page: {str(e)}")
@@ -41,27 +66,23 @@ def home_page(date_time: str) -> Dict[str, Any]:
         }
 
 
-def events_page(date_time: str) -> Dict[str, Any]:
-    """Формирует данные страницы событий."""
-    try:
-        datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
-        transactions = load_transactions()
-
-        if transactions.empty:
-            return {"expenses": {"total_amount": 0}, "income": {"total_amount": 0}}
-
-        expenses = transactions[transactions["Сумма операции"] < 0]
-        income = transactions[transactions["Сумма операции"] > 0]
+@instrument()
+def events_page(
+    date_time: str, store: Optional[TransactionStore] = None, date_range: str = "M"
+) -> Dict[str, Any]:
+    """
+    Формирует данные страницы событий.
 
+    Доходы и расходы считаются за период от начала недели, месяца или
+    года (date_range: 'W', 'M', 'Y', 'ALL' - вся история) до date_time.
+    Если передано хранилище, транзакции берутся из него без чтения файла.
+    """
+    try:
+        moment = datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
+        start, end = period_to_date(moment, date_range)
         return {
-            "expenses": {
-                "total_amount": float(expenses["Сумма операции"].sum()),
-                "count": len(expenses),
-            },
-            "income": {
-                "total_amount": float(income["Сумма операции"].sum()),
-                "count": len(income),
-            },
+            **_period_index(store).totals(start, end),
+            "period": _period(start, end),
         }
     except Exception as e:
         logger.error(f"Ошибка в events_page: {str(e)}")
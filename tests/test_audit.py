@@ -0,0 +1,111 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+
+from src.audit import AuditWriter, get_writer
+from src.fingerprint import data_fingerprint
+from src.memo import memoize
+from src.reports import report_decorator
+from src.store import TransactionStore
+
+
+def test_writer_batches_and_flushes(tmp_path: Path) -> None:
+    """Записи доходят до файла после flush"""
+    log_file = tmp_path / "report.json"
+    writer = AuditWriter(str(log_file))
+    for i in range(10):
+        writer.write({"n": i})
+    writer.flush()
+
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["n"] for line in lines] == list(range(10))
+    writer.close()
+
+
+def test_writer_rotation(tmp_path: Path) -> None:
+    """Файл ротируется при превышении размера"""
+    log_file = tmp_path / "report.json"
+    writer = AuditWriter(str(log_file), max_bytes=50, backup_count=2)
+    for i in range(20):
+        writer.write({"payload": "x" * 30, "n": i})
+        writer.flush()
+    writer.close()
+
+    assert (tmp_path / "report.json.1").exists()
+    assert (tmp_path / "report.json.2").exists()
+    assert not (tmp_path / "report.json.3").exists()
+
+
+def test_report_record(tmp_path: Path, sample_transactions: pd.DataFrame) -> None:
+    """Запись содержит отпечаток данных и параметры, а не текст DataFrame"""
+    log_file = str(tmp_path / "report.json")
+
+    @report_decorator(filename=log_file)
+    def total(transactions: pd.DataFrame, category: str) -> float:
+        return float(transactions["Сумма операции"].sum())
+
+    total(sample_transactions, category="Фитнес")
+    get_writer(log_file).flush()
+
+    record = json.loads(Path(log_file).read_text(encoding="utf-8"))
+    assert record["function"] == "total"
+    assert record["params"] == {"category": "Фитнес"}
+    assert record["input"] == data_fingerprint(sample_transactions)
+    assert record["input"]["shape"] == [5, 6]
+    assert record["result"] == 3500.0
+
+
+def test_report_record_reuses_fingerprint(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, sample_transactions: pd.DataFrame
+) -> None:
+    """Запись об отчете по хранилищу не хеширует данные заново"""
+    hashed = []
+    monkeypatch.setattr(
+        "src.fingerprint.frame_fingerprint",
+        lambda df: hashed.append(len(df)) or {"shape": list(df.shape), "hash": "x"},
+    )
+    log_file = str(tmp_path / "report.json")
+
+    @report_decorator(filename=log_file)
+    @memoize()
+    def total(transactions: TransactionStore) -> float:
+        return float(transactions.get()["Сумма операции"].sum())
+
+    store = TransactionStore.from_frame(sample_transactions)
+    assert total(store) == total(store) == 3500.0
+    assert hashed == [5]
+
+    get_writer(log_file).flush()
+    records = Path(log_file).read_text(encoding="utf-8").splitlines()
+    assert [json.loads(r)["input"]["shape"] for r in records] == [[5, 6], [5, 6]]
+
+
+def test_report_record_snapshots_result(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Изменение результата после вызова не попадает в запись"""
+    released = threading.Event()
+    write_batch = AuditWriter._write_batch
+
+    def delayed(self: AuditWriter, batch: List[Any]) -> None:
+        released.wait(5)
+        write_batch(self, batch)
+
+    monkeypatch.setattr(AuditWriter, "_write_batch", delayed)
+    log_file = str(tmp_path / "report.json")
+
+    @report_decorator(filename=log_file)
+    def totals(transactions: pd.DataFrame) -> Dict[str, float]:
+        return {"Фитнес": -3000.0}
+
+    result = totals(pd.DataFrame())
+    result["Фитнес"] = 0.0
+    released.set()
+    get_writer(log_file).flush()
+
+    record = json.loads(Path(log_file).read_text(encoding="utf-8"))
+    assert record["result"] == {"Фитнес": -3000.0}
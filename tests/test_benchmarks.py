@@ -0,0 +1,36 @@
+from benchmarks.run import compare, run
+
+
+def test_benchmark_run_records_time_and_memory() -> None:
+    """Набор замеров пишет время и пик памяти по каждому случаю"""
+    result = run(
+        sizes=[200],
+        repeat=1,
+        only=["spending_by_workday", "simple_search"],
+        log=lambda line: None,
+    )
+    assert set(result["results"]) == {"spending_by_workday@200", "simple_search@200"}
+    entry = result["results"]["simple_search@200"]
+    assert entry["rows"] == 200
+    assert entry["median_s"] > 0
+    assert entry["peak_mb"] > 0
+
+
+def test_benchmark_compare_flags_regressions() -> None:
+    """Замедление сверх допуска считается регрессией, шум - нет"""
+    baseline = {
+        "results": {
+            "load@10": {"median_s": 0.100, "peak_mb": 10.0},
+            "search@10": {"median_s": 0.0005, "peak_mb": 0.5},
+        }
+    }
+    current = {
+        "results": {
+            "load@10": {"median_s": 0.200, "peak_mb": 10.0},
+            "search@10": {"median_s": 0.0010, "peak_mb": 0.9},
+            "new@10": {"median_s": 1.0, "peak_mb": 1.0},
+        }
+    }
+    regressions = compare(current, baseline, tolerance=1.5)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("load@10")
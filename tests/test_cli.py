@@ -0,0 +1,68 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from src.cli import main
+from src.store import TransactionStore
+
+
+@pytest.fixture
+def store(sample_transactions: pd.DataFrame) -> TransactionStore:
+    """Хранилище с тестовыми транзакциями"""
+    return TransactionStore.from_frame(sample_transactions)
+
+
+def run(store: TransactionStore, *argv: str) -> str:
+    out = io.StringIO()
+    assert main(list(argv), stream=out, store=store) == 0
+    return out.getvalue()
+
+
+def test_cli_search_streams_ndjson(store: TransactionStore) -> None:
+    """Результаты поиска выводятся по строке JSON на транзакцию"""
+    output = run(store, "search", "text", "оплата", "покупка", "--columns", "Описание")
+    rows = [json.loads(line) for line in output.splitlines()]
+    assert rows == [{"Описание": "Покупка в магазине"}, {"Описание": "Оплата услуг"}]
+
+
+def test_cli_search_json_array(store: TransactionStore) -> None:
+    """Формат json - один массив, в том числе пустой"""
+    output = run(store, "--format", "json", "search", "text", "спортзал")
+    rows = json.loads(output)
+    assert len(rows) == 1
+    assert rows[0]["Сумма операции"] == -3000.0
+    assert rows[0]["Дата операции"].startswith("2023-01-01T00:01:00")
+
+    assert json.loads(run(store, "--format", "json", "search", "phones")) == []
+
+
+def test_cli_reports_and_pages(store: TransactionStore) -> None:
+    """Отчеты, сервисы и страницы получают хранилище напрямую"""
+    workday = json.loads(run(store, "report", "workday"))
+    assert workday == {"weekdays": 5999.5, "weekends": -2499.5}
+
+    cashback = run(store, "cashback", "--top", "1").splitlines()
+    assert json.loads(cashback[0])["category"] == "Супермаркеты"
+
+    savings = run(store, "invest", "--limits", "100", "--start", "2023-05")
+    assert json.loads(savings) == {
+        "month": "2023-05",
+        "rule": "round",
+        "parameter": 100,
+        "savings": 0.0,
+    }
+
+    events = json.loads(
+        run(store, "events", "--date-time", "2023-05-31 00:00:00", "--range", "ALL")
+    )
+    assert events["income"]["count"] == 2
+    month = json.loads(run(store, "events", "--date-time", "2023-05-31 00:00:00"))
+    assert month["income"] == {"total_amount": 10000.0, "count": 1}
+
+
+def test_cli_requires_query(store: TransactionStore) -> None:
+    """Текстовый поиск без запроса завершается ошибкой"""
+    with pytest.raises(SystemExit):
+        run(store, "search", "text")
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from src.cube import AggregateCube, cube_for
+from src.reports import spending_by_category
+from src.services import profitable_cashback_categories
+from src.store import TransactionStore
+
+
+def test_cube_build(sample_transactions: pd.DataFrame) -> None:
+    """Тест построения куба"""
+    cube = AggregateCube.build(sample_transactions)
+    assert len(cube) == 5
+    assert cube.total_by(["sign"])[-1] == -7000.50
+    assert cube.total_by(["category"], value="cashback")["Фитнес"] == 30.00
+    assert cube.total_by(["weekday"], value="count").sum() == 5
+
+    may = cube.month_slice(2023, 5)
+    assert may.total_by(["category"]).to_dict() == {
+        "Переводы": 10000.00,
+        "Услуги": -2500.00,
+    }
+
+
+def test_cube_append(sample_transactions: pd.DataFrame) -> None:
+    """Дозапись совпадает с построением по всем данным"""
+    cube = AggregateCube.build(sample_transactions.iloc[:3])
+    cube.append(sample_transactions.iloc[3:])
+    full = AggregateCube.build(sample_transactions)
+    pd.testing.assert_series_equal(
+        cube.total_by(["day", "category"]), full.total_by(["day", "category"])
+    )
+
+
+def test_reports_from_store_cube(sample_transactions: pd.DataFrame) -> None:
+    """Отчеты по хранилищу используют общий куб"""
+    store = TransactionStore.from_frame(sample_transactions)
+    assert cube_for(store) is cube_for(store)
+
+    twice = pd.concat([sample_transactions, sample_transactions])
+    assert spending_by_category(twice, "Фитнес") == {"2023-01-01": -6000.00}
+    twice.iloc[3, twice.columns.get_loc("Сумма операции")] = -1000.0
+    assert spending_by_category(twice, "Фитнес") == {"2023-01-01": -4000.00}
+    assert profitable_cashback_categories(store, 2021, 12) == {"Супермаркеты": 15.05}
+
+
+def test_cube_monthly_total_by(sample_transactions: pd.DataFrame) -> None:
+    """Суммы по месяцам с ограничением диапазона"""
+    cube = AggregateCube.build(sample_transactions)
+    totals = cube.monthly_total_by(["category"], start="2023-01", end="2023-04")
+    assert {str(m) for m, _ in totals.index} == {"2023-01", "2023-04"}
+    assert totals[(pd.Period("2023-01", "M"), "Фитнес")] == -3000.00
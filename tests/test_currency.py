@@ -0,0 +1,150 @@
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.config import Config
+from src.currency import ORIGINAL_AMOUNT_COLUMN, RateTable, normalize_amounts
+from src.utils import load_transactions
+
+
+class FakeQuotes:
+    """Источник курсов с подсчетом запрошенных валют"""
+
+    def __init__(self, rates: Dict[str, Any]) -> None:
+        self.rates = rates
+        self.requested: List[Tuple[date, List[str]]] = []
+
+    def __call__(self, currencies: List[str], day: date) -> List[Dict[str, Any]]:
+        self.requested.append((day, list(currencies)))
+        return [{"currency": c, "rate": self.rates.get(c)} for c in currencies]
+
+
+@pytest.fixture
+def table(tmp_path: Path) -> RateTable:
+    """Таблица курсов USD за два дня и EUR за один"""
+    rates = RateTable(str(tmp_path / "rates.csv"), fetch=FakeQuotes({}))
+    rates.add("2023-01-10", {"USD": 70.0, "EUR": 80.0})
+    rates.add("2023-02-10", {"usd": 75.0})
+    return rates
+
+
+def test_lookup_as_of(table: RateTable) -> None:
+    """Курс берется последний на дату, но не старше MAX_RATE_AGE_DAYS"""
+    days = ["2023-01-10", "2023-01-15", "2023-02-12", "2023-01-12"]
+    currencies = ["USD", "usd", "USD", "EUR"]
+    assert table.lookup(days, currencies).tolist() == [70.0, 70.0, 75.0, 80.0]
+
+    # Более поздний курс не подставляется в прошлое, устаревший - не берется
+    stale = table.lookup(["2023-01-01", "2023-02-01", "2023-03-01"], ["USD"] * 3)
+    assert np.isnan(stale).all()
+
+    rates = table.lookup(["2023-01-10"] * 2, ["RUB", "TRY"])
+    assert rates[0] == 1.0 and np.isnan(rates[1])
+
+
+def test_refresh_is_incremental(table: RateTable) -> None:
+    """Запрашиваются только недостающие за день курсы, файл дописывается"""
+    fetch = FakeQuotes({"USD": 76.0, "TRY": 2.5, "CNY": None})
+    table.fetch = fetch
+    assert table.refresh(["USD", "TRY", "CNY", "RUB"], day="2023-02-10") == 1
+    assert fetch.requested == [(date(2023, 2, 10), ["CNY", "TRY"])]
+    # TRY уже есть, CNY уже запрашивался в этом процессе
+    assert table.refresh(["TRY", "CNY"], day="2023-02-10") == 0
+    assert len(fetch.requested) == 1
+
+    reloaded = RateTable(table.path, fetch=fetch)
+    assert len(reloaded) == len(table) == 4
+    assert reloaded.lookup(["2023-02-15"], ["TRY"]).tolist() == [2.5]
+
+
+def test_ensure_fetches_per_date(table: RateTable) -> None:
+    """Курсы запрашиваются на даты операций, один запрос на дату"""
+    fetch = FakeQuotes({"USD": 65.0, "EUR": 72.0})
+    table.fetch = fetch
+    days = pd.to_datetime(
+        [
+            "2019-10-01 09:00",
+            "2019-10-01 09:00",
+            "2019-10-01 18:00",
+            "2020-02-20",
+            "2023-01-10",
+        ],
+        format="mixed",
+    )
+    currencies = ["USD", "EUR", "usd", "USD", "USD"]
+    assert table.ensure(days, currencies) == 3
+    assert fetch.requested == [
+        (date(2019, 10, 1), ["EUR", "USD"]),
+        (date(2020, 2, 20), ["USD"]),
+    ]
+    assert table.lookup(["2019-10-03"], ["USD"]).tolist() == [65.0]
+
+    assert table.ensure(days, currencies) == 0
+    assert len(fetch.requested) == 2
+
+
+def test_normalize_amounts(table: RateTable) -> None:
+    """Суммы переводятся по курсу на дату, исходные сохраняются"""
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                ["2023-01-15", "2023-02-15", "2023-02-15", "2023-02-15"]
+            ),
+            "Сумма операции": [-10.0, -10.0, -700.0, -5.0],
+            "Валюта операции": ["USD", "USD", "RUB", "XYZ"],
+        }
+    )
+    result = normalize_amounts(df, table=table)
+    assert result["Сумма операции"].tolist() == [-700.0, -750.0, -700.0, -5.0]
+    assert result[ORIGINAL_AMOUNT_COLUMN].tolist() == [-10.0, -10.0, -700.0, -5.0]
+    assert df["Сумма операции"].tolist() == [-10.0, -10.0, -700.0, -5.0]
+
+    in_usd = normalize_amounts(df, "USD", table)
+    assert in_usd["Сумма операции"].tolist() == [-10.0, -10.0, -9.33, -5.0]
+
+
+def test_normalize_amounts_uses_payment(
+    table: RateTable, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Сумма списания в базовой валюте берется из выписки, а не по курсу"""
+    df = pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(["2021-08-30", "2021-08-30", "2019-10-01"]),
+            "Сумма операции": [-8.61, -13.67, -5.0],
+            "Валюта операции": ["USD", "CNY", "USD"],
+            "Сумма платежа": [-648.76, -13.67, -5.0],
+            "Валюта платежа": ["RUB", "CNY", "USD"],
+        }
+    )
+    with caplog.at_level(logging.WARNING, logger="src.currency"):
+        result = normalize_amounts(df, table=table)
+    assert result["Сумма операции"].tolist() == [-648.76, -13.67, -5.0]
+    assert table.fetch.requested == [  # type: ignore[attr-defined]
+        (date(2019, 10, 1), ["USD"]),
+        (date(2021, 8, 30), ["CNY"]),
+    ]
+    assert "Нет курсов для 2 операций в ['CNY', 'USD']" in caplog.text
+
+
+def test_load_transactions_in_base_currency(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, sample_transactions: pd.DataFrame
+) -> None:
+    """При заданной BASE_CURRENCY загрузка возвращает суммы в ней"""
+    df = sample_transactions.copy()
+    df["Валюта операции"] = ["RUB", "USD", "RUB", "RUB", "RUB"]
+    path = str(tmp_path / "operations.xlsx")
+    df.to_excel(path, index=False)
+
+    table = RateTable(None, fetch=FakeQuotes({"USD": 100.0}))
+    monkeypatch.setattr("src.currency.default_rate_table", lambda: table)
+    monkeypatch.setattr(Config, "BASE_CURRENCY", "RUB")
+
+    loaded = load_transactions(path, use_snapshot=False)
+    assert loaded["Сумма операции"].iloc[1] == df["Сумма операции"].iloc[1] * 100
+    assert loaded[ORIGINAL_AMOUNT_COLUMN].iloc[1] == df["Сумма операции"].iloc[1]
+    assert len(table) == 1
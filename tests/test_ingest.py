@@ -0,0 +1,194 @@
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pandas as pd
+import pytest
+
+from src.config import Config
+from src.currency import RateTable
+from src.ingest import (ingest_new_transactions, load_statements,
+                        merge_statements, read_new_rows, resolve_statements)
+from src.reports import spending_by_workday
+from src.search import engine_for
+from src.services import phone_number_search, simple_search
+from src.store import TransactionStore
+from src.utils import load_transactions
+
+
+def _statement(path: Path, rows: list) -> None:
+    pd.DataFrame(
+        rows, columns=["Дата операции", "Сумма операции", "Категория", "Описание"]
+    ).to_excel(path, index=False)
+
+
+@pytest.fixture
+def statements(tmp_path: Path) -> Path:
+    """Две выписки с пересекающимся днем"""
+    _statement(
+        tmp_path / "2023-05.xlsx",
+        [
+            ["01.05.2023 10:00:00", -100.0, "Кафе", "Кофе"],
+            ["31.05.2023 12:00:00", -200.0, "Фастфуд", "Бургер"],
+            ["31.05.2023 12:00:00", -200.0, "Фастфуд", "Бургер"],
+        ],
+    )
+    _statement(
+        tmp_path / "2023-06.xlsx",
+        [
+            ["31.05.2023 12:00:00", -200.0, "Фастфуд", "Бургер"],
+            ["31.05.2023 12:00:00", -200.0, "Фастфуд", "Бургер"],
+            ["02.06.2023 09:00:00", -50.0, "Транспорт", "Метро"],
+        ],
+    )
+    (tmp_path / "notes.txt").write_text("не выписка")
+    return tmp_path
+
+
+def test_resolve_statements(statements: Path) -> None:
+    """Тест поиска файлов выписок"""
+    assert [Path(p).name for p in resolve_statements(str(statements))] == [
+        "2023-05.xlsx",
+        "2023-06.xlsx",
+    ]
+    assert len(resolve_statements(str(statements / "*-06.xlsx"))) == 1
+
+
+def test_load_statements_parallel(statements: Path) -> None:
+    """Выписки объединяются без пересечений и сортируются по дате"""
+    merged = load_statements(str(statements), max_workers=2)
+    assert list(merged["Описание"]) == ["Кофе", "Бургер", "Бургер", "Метро"]
+    assert merged["Дата операции"].is_monotonic_increasing
+
+    sequential = load_statements(str(statements), max_workers=1)
+    pd.testing.assert_frame_equal(merged, sequential)
+
+
+def test_merge_statements_ignores_dtypes(sample_transactions: pd.DataFrame) -> None:
+    """Пересечение находится, даже если типы колонок в выписках разные"""
+    df = sample_transactions.assign(**{"Бонусы (включая кэшбэк)": [15, 0, 0, 30, 0]})
+    first = df.iloc[:4]
+    second = df.iloc[3:].astype({"Бонусы (включая кэшбэк)": float})
+    merged = merge_statements([first, second])
+    assert len(merged) == len(sample_transactions)
+
+
+def test_load_statements_in_base_currency(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Суммы переводятся после объединения, курсы пишет один процесс"""
+    columns = ["Дата операции", "Сумма операции", "Валюта операции", "Описание"]
+    for name in ["a.xlsx", "b.xlsx"]:
+        rows = [["02.06.2023 09:00:00", -1.5, "USD", name]]
+        pd.DataFrame(rows, columns=columns).to_excel(tmp_path / name, index=False)
+
+    rates_path = tmp_path / "rates.csv"
+    fetched = []
+
+    def fetch(currencies: List[str], day: date) -> List[Dict[str, Any]]:
+        fetched.append(day)
+        return [{"currency": c, "rate": 100.0} for c in currencies]
+
+    table = RateTable(str(rates_path), fetch=fetch)
+    monkeypatch.setattr("src.currency.default_rate_table", lambda: table)
+    monkeypatch.setattr(Config, "BASE_CURRENCY", "RUB")
+
+    merged = load_statements(str(tmp_path / "*.xlsx"), max_workers=2)
+    assert merged["Сумма операции"].tolist() == [-150.0, -150.0]
+    assert len(fetched) == 1
+    assert len(rates_path.read_text().splitlines()) == 2
+
+
+def test_merge_statements_empty(tmp_path: Path) -> None:
+    """Тест граничных случаев"""
+    assert merge_statements([]).empty
+    assert load_statements(str(tmp_path / "*.xlsx")).empty
+
+
+def test_ingest_new_transactions(tmp_path: Path) -> None:
+    """Дозагрузка добавляет только новые строки и обновляет структуры"""
+    old_rows = [
+        ["02.06.2023 09:00:00", -50.0, "Транспорт", "Метро"],
+        ["02.06.2023 09:00:00", -50.0, "Транспорт", "Метро"],
+        ["01.06.2023 10:00:00", -100.0, "Кафе", "Кофе"],
+    ]
+    data_file = tmp_path / "operations.xlsx"
+    _statement(data_file, old_rows)
+
+    store = TransactionStore(str(data_file))
+    assert spending_by_workday(store)["weekdays"] == -200.0
+    assert len(simple_search("метро", store)) == 2
+    engine = engine_for(store)
+
+    new_rows = [
+        ["03.06.2023 12:00:00", -300.0, "Переводы", "Перевод +7 921 111-22-33"],
+        ["02.06.2023 09:00:00", -50.0, "Транспорт", "Метро"],
+    ]
+    _statement(data_file, new_rows + old_rows)
+
+    assert ingest_new_transactions(store) == 2
+    assert len(store.get()) == 5
+    assert engine_for(store) is engine
+    assert len(simple_search("метро", store)) == 3
+    assert len(phone_number_search(store)) == 1
+    assert spending_by_workday(store) == {"weekdays": -250.0, "weekends": -300.0}
+
+    assert ingest_new_transactions(store) == 0
+    reloaded = load_transactions(str(data_file))
+    parsed = load_transactions(str(data_file), use_snapshot=False)
+    assert list(reloaded["Описание"]) == list(parsed["Описание"])
+    assert list(reloaded["Описание"]) == [
+        "Перевод +7 921 111-22-33",
+        "Метро",
+        "Метро",
+        "Метро",
+        "Кофе",
+    ]
+    fresh = TransactionStore(str(data_file))
+    assert [r["Описание"] for r in phone_number_search(fresh)] == [
+        "Перевод +7 921 111-22-33"
+    ]
+
+
+def test_read_new_rows_stops_early(tmp_path: Path) -> None:
+    """Чтение прекращается на первой более старой строке"""
+    data_file = tmp_path / "operations.xlsx"
+    _statement(
+        data_file,
+        [
+            ["03.06.2023 12:00:00", -1.0, "А", "Новая"],
+            ["01.06.2023 12:00:00", -1.0, "А", "Старая"],
+            ["05.06.2023 12:00:00", -1.0, "А", "Вне порядка"],
+        ],
+    )
+    rows = read_new_rows(str(data_file), pd.Timestamp("2023-06-02"))
+    assert list(rows["Описание"]) == ["Новая"]
+    assert len(read_new_rows(str(data_file), None)) == 3
+
+
+def test_ingest_in_base_currency(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Дозагрузка и повторная загрузка не переводят суммы дважды"""
+    table = RateTable(None, fetch=lambda currencies, day: [])
+    table.add("2023-06-01", {"USD": 100.0})
+    monkeypatch.setattr("src.currency.default_rate_table", lambda: table)
+    monkeypatch.setattr(Config, "BASE_CURRENCY", "USD")
+
+    columns = ["Дата операции", "Сумма операции", "Валюта операции", "Описание"]
+    old_rows = [["02.06.2023 09:00:00", -1000.0, "RUB", "Метро"]]
+    data_file = tmp_path / "operations.xlsx"
+    pd.DataFrame(old_rows, columns=columns).to_excel(data_file, index=False)
+
+    store = TransactionStore(str(data_file))
+    assert store.get()["Сумма операции"].tolist() == [-10.0]
+
+    new_rows = [["03.06.2023 12:00:00", -500.0, "RUB", "Кафе"]]
+    pd.DataFrame(new_rows + old_rows, columns=columns).to_excel(data_file, index=False)
+    assert ingest_new_transactions(store) == 1
+    assert ingest_new_transactions(store) == 0
+    assert store.get()["Сумма операции"].tolist() == [-10.0, -5.0]
+
+    reloaded = load_transactions(str(data_file))
+    assert reloaded["Сумма операции"].tolist() == [-5.0, -10.0]
+    assert reloaded["Сумма в валюте операции"].tolist() == [-500.0, -1000.0]
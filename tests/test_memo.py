@@ -0,0 +1,78 @@
+import time
+from typing import Dict
+
+import pandas as pd
+import pytest
+
+from src.memo import MemoCache, memoize
+from src.store import TransactionStore
+
+
+def test_memoize_hits_and_invalidation(sample_transactions: pd.DataFrame) -> None:
+    """Повторный вызов берется из кэша, изменение данных сбрасывает его"""
+    calls = []
+
+    @memoize()
+    def total(transactions: TransactionStore, sign: int) -> Dict[str, float]:
+        calls.append(sign)
+        amounts = transactions.get()["Сумма операции"]
+        return {"total": float(amounts[amounts * sign > 0].sum())}
+
+    store = TransactionStore.from_frame(sample_transactions)
+    first = total(store, -1)
+    assert total(store, -1) == first
+    assert total(store, sign=-1) == first
+    assert len(calls) == 1
+
+    total(store, 1)
+    assert len(calls) == 2
+
+    store.replace(sample_transactions.iloc[:2])
+    assert total(store, -1) == {"total": -4000.50}
+    assert len(calls) == 3
+
+    info = total.cache_info()  # type: ignore[attr-defined]
+    assert (info.hits, info.misses) == (2, 3)
+
+
+def test_memoize_returns_copies(sample_transactions: pd.DataFrame) -> None:
+    """Изменение результата не портит кэш"""
+
+    @memoize()
+    def categories(transactions: pd.DataFrame) -> Dict[str, int]:
+        return {"count": len(transactions)}
+
+    categories(sample_transactions)["count"] = 0
+    assert categories(sample_transactions) == {"count": 5}
+
+
+def test_cache_eviction_and_ttl() -> None:
+    """Тест вытеснения по объему и времени жизни"""
+    cache = MemoCache(max_bytes=300)
+    cache.put(("a",), "x" * 100)
+    cache.put(("b",), "y" * 100)
+    cache.get(("a",))
+    cache.put(("c",), "z" * 100)
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",))[0]
+    assert cache.info().evictions == 1
+
+    ttl_cache = MemoCache(ttl=0.01)
+    ttl_cache.put(("a",), 1)
+    time.sleep(0.02)
+    assert ttl_cache.get(("a",)) == (False, None)
+
+
+def test_memoize_sees_in_place_edits(sample_transactions: pd.DataFrame) -> None:
+    """Запись в ячейку DataFrame на месте сбрасывает кэш"""
+
+    @memoize()
+    def total(transactions: pd.DataFrame) -> Dict[str, float]:
+        return {"total": float(transactions["Сумма операции"].sum())}
+
+    df = sample_transactions.copy()
+    before = total(df)
+    assert total(df) == before
+    df.loc[0, "Сумма операции"] = -999.0
+    assert total(df) == {"total": float(df["Сумма операции"].sum())} != before
+    assert total.cache_info().hits == 1
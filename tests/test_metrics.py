@@ -0,0 +1,91 @@
+import asyncio
+import json
+from typing import Any, Iterator
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.reports import spending_by_weekday
+from src.utils import filter_transactions_by_date
+
+
+@pytest.fixture
+def enabled_metrics() -> Iterator[None]:
+    """Включает метрики на время теста"""
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_metrics_disabled_by_default(sample_transactions: pd.DataFrame) -> None:
+    """Выключенные метрики ничего не собирают"""
+    metrics.reset()
+    filter_transactions_by_date(sample_transactions, "2023-05-20", "M")
+    metrics.add("events")
+    assert metrics.snapshot() == {"timers": {}, "counters": {}}
+
+
+def test_metrics_collects_timers(
+    enabled_metrics: None, sample_transactions: pd.DataFrame
+) -> None:
+    """Время, строки и байты результата собираются по функциям"""
+    result = filter_transactions_by_date(sample_transactions, "2023-05-20", "M")
+    weekdays = spending_by_weekday(sample_transactions)
+
+    timers = metrics.snapshot()["timers"]
+    stats = timers["utils.filter_transactions_by_date"]
+    assert stats["calls"] == 1
+    assert stats["rows"] == len(result) == 2
+    assert stats["bytes"] > 0
+    assert timers["reports.spending_by_weekday"]["rows"] == len(weekdays)
+
+
+def test_metrics_async_and_errors(enabled_metrics: None) -> None:
+    """Async функции и исключения учитываются"""
+
+    @metrics.instrument("test.fetch")
+    async def fetch() -> list:
+        return [1, 2, 3]
+
+    @metrics.instrument("test.fail")
+    def fail() -> None:
+        raise ValueError("boom")
+
+    asyncio.run(fetch())
+    with pytest.raises(ValueError):
+        fail()
+
+    timers = metrics.snapshot()["timers"]
+    assert timers["test.fetch"]["rows"] == 3
+    assert timers["test.fail"]["errors"] == 1
+
+
+def test_metrics_export(enabled_metrics: None, tmp_path: Any) -> None:
+    """Экспорт в формат Prometheus и трассу Chrome"""
+    metrics.instrument("test.call")(lambda: [1])()
+    metrics.add("quotes.cache_hit", 2)
+
+    prom_path = tmp_path / "bank.prom"
+    metrics.write_prometheus(str(prom_path))
+    text = prom_path.read_text(encoding="utf-8")
+    assert 'bank_calls_total{name="test.call"} 1' in text
+    assert 'bank_events_total{name="quotes.cache_hit"} 2' in text
+
+    trace_path = tmp_path / "trace.json"
+    metrics.write_trace(str(trace_path))
+    events = json.loads(trace_path.read_text(encoding="utf-8"))["traceEvents"]
+    assert events[0]["name"] == "test.call"
+    assert events[0]["ph"] == "X"
+
+
+def test_profile_call(sample_transactions: pd.DataFrame) -> None:
+    """Профиль одного вызова с пиком памяти"""
+    profile = metrics.profile_call(
+        filter_transactions_by_date, sample_transactions, "2023-05-20", date_range="Y"
+    )
+    assert len(profile.result) == 4
+    assert "filter_transactions_by_date" in profile.stats
+    assert profile.peak_bytes > 0
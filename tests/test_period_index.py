@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from src.period_index import PeriodIndex, period_index_for, period_to_date
+from src.store import TransactionStore
+from src.synthetic import generate_transactions
+
+
+@pytest.fixture(scope="module")
+def frame() -> pd.DataFrame:
+    """Синтетические транзакции за несколько месяцев"""
+    return generate_transactions(3000, seed=5, start="2021-01-01", end="2021-07-01")
+
+
+@pytest.mark.parametrize(
+    "date_time", ["2021-01-01 00:00:00", "2021-03-17 13:05:00", "2021-06-30 23:59:59"]
+)
+@pytest.mark.parametrize("date_range", ["W", "M", "Y", "ALL"])
+def test_period_index_matches_scan(
+    frame: pd.DataFrame, date_time: str, date_range: str
+) -> None:
+    """Итоги и крупнейшие операции совпадают с прямым отбором строк"""
+    index = PeriodIndex.build(frame)
+    start, end = period_to_date(date_time, date_range)
+    dates = frame["Дата операции"]
+    rows = frame[(dates <= end) & ((dates >= start) if start is not None else True)]
+    amounts = rows["Сумма операции"]
+
+    totals = index.totals(start, end)
+    assert totals["income"]["count"] == (amounts > 0).sum()
+    assert totals["expenses"]["total_amount"] == pytest.approx(
+        amounts[amounts < 0].sum()
+    )
+
+    top = [row["Сумма операции"] for row in index.top(start, end, 5)]
+    expected = rows.sort_values("Дата операции", kind="stable").nlargest(
+        5, "Сумма операции"
+    )
+    assert top == expected["Сумма операции"].tolist()
+
+
+def test_period_index_empty_and_store(frame: pd.DataFrame) -> None:
+    """Пустые данные дают нули, хранилище строит индекс один раз"""
+    empty = PeriodIndex.build(pd.DataFrame())
+    assert empty.top(None, "2021-01-01", 5) == []
+    assert empty.totals(None, "2021-01-01")["income"] == {
+        "total_amount": 0.0,
+        "count": 0,
+    }
+
+    store = TransactionStore.from_frame(frame)
+    assert period_index_for(store) is period_index_for(store)
+    with pytest.raises(ValueError):
+        period_to_date("2021-01-01", "Q")
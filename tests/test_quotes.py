@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import date
+
+from src.fake_quotes import FakeQuoteServer
+from src.quotes import QuoteClient, QuoteService
+
+
+def test_quotes_fetched_concurrently() -> None:
+    """Курсы и цены запрашиваются одновременно через одну сессию"""
+
+    async def scenario() -> None:
+        async with FakeQuoteServer(delay=0.2) as server:
+            async with QuoteClient(server.exchange_url, server.stock_url) as client:
+                started = time.monotonic()
+                rates, prices = await client.get_quotes(
+                    ["USD", "EUR"], ["AAPL", "MSFT", "TSLA"]
+                )
+                elapsed = time.monotonic() - started
+
+        assert elapsed < 0.5
+        assert rates == [
+            {"currency": "USD", "rate": 75.0},
+            {"currency": "EUR", "rate": 90.0},
+        ]
+        assert prices[1] == {"stock": "MSFT", "price": 330.0}
+        assert server.hits == {"exchange": 1, "stock": 3}
+
+    asyncio.run(scenario())
+
+
+def test_quotes_cache_and_coalescing() -> None:
+    """Одновременные запросы объединяются, повторные берутся из кэша"""
+
+    async def scenario() -> None:
+        async with FakeQuoteServer(delay=0.05) as server:
+            async with QuoteClient(server.exchange_url, server.stock_url) as client:
+                await asyncio.gather(
+                    *(client.get_stock_prices(["AAPL"]) for _ in range(10))
+                )
+                await client.get_stock_prices(["AAPL"])
+                assert server.hits["stock"] == 1
+                assert client.requests_made == 1
+
+    asyncio.run(scenario())
+
+
+def test_quotes_stale_while_revalidate() -> None:
+    """Устаревшее значение отдается сразу, ошибка обновления не мешает"""
+
+    async def scenario() -> None:
+        async with FakeQuoteServer() as server:
+            async with QuoteClient(
+                server.exchange_url, server.stock_url, ttl=0.0, timeout=0.5
+            ) as client:
+                first = await client.get_stock_prices(["AAPL"])
+                server.prices["AAPL"] = 200.0
+                server.fail = True
+                stale = await client.get_stock_prices(["AAPL"])
+                await asyncio.sleep(0.05)
+                assert stale == first
+
+                server.fail = False
+                await client.get_stock_prices(["AAPL"])
+                await asyncio.sleep(0.05)
+                fresh = await client.get_stock_prices(["AAPL"])
+                assert fresh == [{"stock": "AAPL", "price": 200.0}]
+
+                missing = await client.get_stock_prices(["NONE"])
+                assert missing == [{"stock": "NONE", "price": None}]
+
+    asyncio.run(scenario())
+
+
+def test_historical_rates_cached() -> None:
+    """Курсы на прошедшую дату запрашиваются один раз"""
+
+    async def scenario() -> None:
+        async with FakeQuoteServer() as server:
+            async with QuoteClient(
+                server.exchange_url, server.stock_url, history_url=server.history_url
+            ) as client:
+                rates = await client.get_historical_rates(
+                    ["USD", "XYZ"], date(2020, 1, 1)
+                )
+                await client.get_historical_rates(["EUR"], date(2020, 1, 1))
+                assert rates == [
+                    {"currency": "USD", "rate": 75.0},
+                    {"currency": "XYZ", "rate": None},
+                ]
+                assert server.hits["exchange"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_quote_service_sync() -> None:
+    """Синхронная обертка переиспользует клиента между вызовами"""
+    server = FakeQuoteServer()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    try:
+        service = QuoteService(QuoteClient(server.exchange_url, server.stock_url))
+        # Сервер работает в этом потоке, поэтому ответы нужно обслуживать
+        future = loop.run_in_executor(None, service.quotes, ["USD"], ["AAPL"])
+        rates, prices = loop.run_until_complete(future)
+        assert rates[0]["rate"] == 75.0
+        assert prices[0]["price"] == 150.0
+        loop.run_until_complete(loop.run_in_executor(None, service.close))
+    finally:
+        loop.run_until_complete(server.stop())
+        loop.close()
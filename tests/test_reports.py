@@ -1,8 +1,9 @@
 import pandas as pd
 import pytest
 
-from src.reports import (spending_by_category, spending_by_weekday,
-                         spending_by_workday)
+from src.reports import (spending_by_category, spending_by_category_chunked,
+                         spending_by_weekday, spending_by_weekday_chunked,
+                         spending_by_workday, spending_by_workday_chunked)
 
 
 @pytest.fixture
@@ -62,3 +63,20 @@ def test_edge_cases() -> None:
     assert spending_by_category(invalid_df, "Тест") == {}
     assert spending_by_weekday(invalid_df) == {}
     assert spending_by_workday(invalid_df) == {"weekdays": 0.0, "weekends": 0.0}
+
+
+def test_chunked_reports_match_full(sample_transactions: pd.DataFrame) -> None:
+    """Тест отчетов, накопленных по частям"""
+    chunks = [sample_transactions.iloc[:2], sample_transactions.iloc[2:]]
+
+    assert spending_by_category_chunked(chunks, "Супермаркеты") == (
+        spending_by_category(sample_transactions, "Супермаркеты")
+    )
+    assert spending_by_weekday_chunked(chunks) == spending_by_weekday(
+        sample_transactions
+    )
+    assert spending_by_workday_chunked(chunks) == spending_by_workday(
+        sample_transactions
+    )
+    assert spending_by_category_chunked([], "Тест") == {}
+    assert spending_by_workday_chunked([]) == {"weekdays": 0.0, "weekends": 0.0}
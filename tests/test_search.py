@@ -0,0 +1,77 @@
+import pandas as pd
+
+from src.search import PhoneIndex, SearchEngine, engine_for
+from src.services import (batch_search, phone_number_search,
+                          phone_number_totals, phone_transactions_search,
+                          simple_search)
+from src.store import TransactionStore
+
+
+def test_engine_contains(sample_transactions: pd.DataFrame) -> None:
+    """Тест поиска подстроки без учета регистра"""
+    engine = SearchEngine.from_frame(sample_transactions)
+    assert list(engine.contains("ПЕРЕВОД")) == [2]
+    assert list(engine.contains("в")) == [0, 2, 3, 4]
+    assert list(engine.contains("нет такого")) == []
+    assert len(engine.contains("")) == 5
+    assert list(engine.take(engine.contains("услуг"))["Категория"]) == ["Услуги"]
+
+    repeated = SearchEngine(["Кофе, кофе", "чай", "кофе.", "Ко"])
+    assert list(repeated.contains("кофе")) == [0, 2]
+    assert list(repeated.contains("ко")) == [0, 2, 3]
+    assert list(repeated.contains("кофе.")) == [2]
+
+
+def test_engine_contains_many(sample_transactions: pd.DataFrame) -> None:
+    """Тест пакетного поиска"""
+    engine = SearchEngine.from_frame(sample_transactions)
+    result = engine.contains_many(["покупка", "средств"])
+    assert list(result["покупка"]) == [0]
+    assert list(result["средств"]) == [4]
+
+    found = batch_search(["покупка", "абонемент"], sample_transactions)
+    assert found["абонемент"][0]["Категория"] == "Фитнес"
+
+
+def test_engine_cached_per_store_version(sample_transactions: pd.DataFrame) -> None:
+    """Движок строится один раз для версии данных хранилища"""
+    store = TransactionStore.from_frame(sample_transactions)
+    assert engine_for(store) is engine_for(store)
+
+    store.replace(sample_transactions.iloc[:2])
+    assert len(engine_for(store)) == 2
+    assert len(simple_search("перевод", store)) == 0
+
+
+def test_engine_person_transfers() -> None:
+    """Тест фильтра переводов физлицам"""
+    engine = SearchEngine(
+        ["Перевод Ивану", "Перевод в банк", "Перевод организация", None]
+    )
+    assert list(engine.person_transfer_positions()) == [0]
+    assert list(engine.phone_positions()) == []
+
+
+def test_phone_index() -> None:
+    """Тест индекса номеров телефонов"""
+    transactions = pd.DataFrame(
+        {
+            "Описание": [
+                "Перевод +7 921 111-22-33",
+                "Оплата 8(921)1112233",
+                "Кафе",
+                "МТС +7 995 555-55-55",
+            ],
+            "Сумма операции": [-100.0, -50.0, -10.0, -300.0],
+        }
+    )
+    index = PhoneIndex.from_frame(transactions)
+    assert sorted(index.phones()) == ["+79211112233", "+79955555555"]
+    assert list(index.positions("8 921 111 22 33")) == [0, 1]
+    assert list(index.positions("+70000000000")) == []
+    assert index.totals()["+79211112233"] == -150.0
+
+    found = phone_transactions_search("+79955555555", transactions)
+    assert [t["Описание"] for t in found] == ["МТС +7 995 555-55-55"]
+    assert phone_number_totals(transactions)["+79955555555"] == -300.0
+    assert len(phone_number_search(transactions)) == 3
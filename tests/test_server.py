@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any
+
+import pandas as pd
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.server import DashboardService, LatencyStats, create_app
+from src.store import TransactionStore
+
+
+def test_latency_stats_percentiles() -> None:
+    """p50 и p99 считаются по последним замерам"""
+    stats = LatencyStats(window=100)
+    for i in range(1, 201):
+        stats.record("/home", i / 1000)
+
+    summary = stats.summary()["/home"]
+    assert summary["count"] == 200
+    assert summary["p50_ms"] == 150.5
+    assert summary["max_ms"] == 200.0
+
+
+def test_server_pages_and_stats(sample_transactions: pd.DataFrame) -> None:
+    """Страницы отдаются по HTTP, задержки учитываются по адресам"""
+    store = TransactionStore.from_frame(sample_transactions)
+    service = DashboardService(file_path=None, store=store)
+
+    async def scenario() -> None:
+        async with TestClient(TestServer(create_app(service))) as client:
+            params = {"date_time": "2023-05-15 23:59:59", "date_range": "ALL"}
+            responses = await asyncio.gather(
+                *(client.get("/events", params=params) for _ in range(5))
+            )
+            bodies = [await r.json() for r in responses]
+            assert bodies[0]["income"] == {"total_amount": 10500.5, "count": 2}
+            assert all(body == bodies[0] for body in bodies)
+
+            home = await client.get("/home", params=params)
+            assert len((await home.json())["top_transactions"]) == 5
+
+            bad = await client.get("/events", params={"date_time": "15.05.2023"})
+            assert bad.status == 400
+
+            stats = await (await client.get("/stats")).json()
+            assert stats["/events"]["count"] == 6
+            assert stats["/home"]["count"] == 1
+
+            bad = await client.get("/home", params={"date_range": "Q"})
+            assert bad.status == 400
+
+    asyncio.run(scenario())
+
+
+def test_server_reload_swaps_data(
+    sample_transactions: pd.DataFrame, tmp_path: Any
+) -> None:
+    """Перезагрузка подменяет данные только при изменении файла"""
+    data_file = tmp_path / "operations.xlsx"
+    data_file.write_bytes(b"1")
+    frames = [sample_transactions, sample_transactions.head(2)]
+    service = DashboardService(str(data_file), loader=lambda path: frames.pop(0))
+
+    async def scenario() -> None:
+        async with TestClient(TestServer(create_app(service))) as client:
+            first = service.store
+            assert await service.reload() is False
+            assert service.store is first
+
+            data_file.write_bytes(b"22")
+            assert await service.reload() is True
+            params = {"date_range": "ALL"}
+            events = await (await client.get("/events", params=params)).json()
+            assert events["expenses"]["count"] == 2
+            assert events["income"]["count"] == 0
+
+    asyncio.run(scenario())
@@ -3,7 +3,8 @@ from typing import Any, Dict, List
 
 import pytest
 
-from src.services import (investment_bank, person_transfers_search,
+from src.services import (cashback_top_by_month, investment_bank,
+                          investment_savings, person_transfers_search,
                           phone_number_search, profitable_cashback_categories,
                           simple_search)
 
@@ -38,11 +39,46 @@ def test_profitable_cashback_categories(
     assert "Супермаркеты" in result
 
 
+def test_cashback_top_by_month(sample_transactions: List[Dict[str, Any]]) -> None:
+    """Тестирует расчет лидеров кэшбэка по всем месяцам сразу"""
+    extra = dict(sample_transactions[0], **{"Дата операции": datetime(2023, 6, 1)})
+    result = cashback_top_by_month(sample_transactions + [extra], top_n=1)
+    assert result.to_dict("records") == [
+        {"month": "2023-05", "category": "Супермаркеты", "cashback": 15.05, "rank": 1},
+        {"month": "2023-06", "category": "Супермаркеты", "cashback": 15.05, "rank": 1},
+    ]
+    assert cashback_top_by_month([], top_n=1).empty
+
+
 def test_investment_bank(sample_transactions: List[Dict[str, Any]]) -> None:
     """Тестирует расчет инвестиционных накоплений"""
     result = investment_bank("2023-05", sample_transactions, 10)
     assert isinstance(result, float)
     assert result == 150.05
+    for month in ["2023-5", "2023-13", "май 2023", ""]:
+        assert investment_bank(month, sample_transactions, 10) == 0.0
+
+
+def test_investment_savings() -> None:
+    """Тестирует правила округления и процента за несколько месяцев"""
+    transactions = [
+        {"Дата операции": datetime(2023, 5, 1), "Сумма операции": -1712.0},
+        {"Дата операции": datetime(2023, 5, 2), "Сумма операции": -150.0},
+        {"Дата операции": datetime(2023, 5, 3), "Сумма операции": 5000.0},
+        {"Дата операции": datetime(2023, 6, 1), "Сумма операции": -99.5},
+    ]
+    result = investment_savings(transactions, limits=[10, 50], percents=[10])
+    table = result.set_index(["month", "rule", "parameter"])["savings"]
+    assert table[("2023-05", "round", 10)] == 8.0
+    assert table[("2023-05", "round", 50)] == 38.0
+    assert table[("2023-05", "percent", 10)] == 186.2
+    assert table[("2023-06", "round", 50)] == 0.5
+    assert len(result) == 6
+
+    june = investment_savings(transactions, limits=[100], start="2023-06")
+    assert june.to_dict("records") == [
+        {"month": "2023-06", "rule": "round", "parameter": 100, "savings": 0.5}
+    ]
 
 
 def test_simple_search(sample_transactions: List[Dict[str, Any]]) -> None:
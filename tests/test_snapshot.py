@@ -0,0 +1,93 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from src.snapshot import (load_snapshot, save_snapshot, snapshot_path,
+                          source_key)
+from src.utils import load_transactions
+
+
+@pytest.fixture
+def sample_file(tmp_path: Path) -> Path:
+    """Фикстура с тестовым xlsx файлом"""
+    df = pd.DataFrame(
+        {
+            "Дата операции": [
+                "31.12.2021 16:44:00",
+                "неверная дата",
+                "20.05.2023 18:15:00",
+            ],
+            "Номер карты": ["*7197", None, "*4556"],
+            "Сумма операции": [-1500.50, -2500.00, 10000.00],
+            "Категория": ["Супермаркеты", "Услуги", None],
+            "Описание": ["Покупка", "Оплата", "Перевод"],
+            "Бонусы (включая кэшбэк)": [15, 0, 0],
+        }
+    )
+    test_file = tmp_path / "ops.xlsx"
+    df.to_excel(test_file, index=False)
+    return test_file
+
+
+def test_snapshot_roundtrip(sample_file: Path) -> None:
+    """Снимок восстанавливает тот же DataFrame"""
+    original = load_transactions(str(sample_file), use_snapshot=False)
+    assert save_snapshot(original, str(sample_file))
+    assert Path(snapshot_path(str(sample_file))).exists()
+
+    restored = load_snapshot(str(sample_file))
+    assert restored is not None
+    pd.testing.assert_frame_equal(restored, original)
+
+
+def test_load_transactions_uses_snapshot(sample_file: Path) -> None:
+    """Повторная загрузка не разбирает xlsx"""
+    first = load_transactions(str(sample_file))
+    with patch("src.utils.pd.read_excel") as read_excel:
+        second = load_transactions(str(sample_file))
+        read_excel.assert_not_called()
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_snapshot_invalidated_on_change(sample_file: Path) -> None:
+    """Изменение исходного файла делает снимок устаревшим"""
+    load_transactions(str(sample_file))
+    df = pd.DataFrame(
+        {
+            "Дата операции": ["01.01.2024 10:00:00"],
+            "Сумма операции": [-1.0],
+            "Категория": ["Фастфуд"],
+            "Описание": ["Кофе"],
+        }
+    )
+    df.to_excel(sample_file, index=False)
+
+    assert load_snapshot(str(sample_file)) is None
+    result = load_transactions(str(sample_file))
+    assert list(result["Описание"]) == ["Кофе"]
+
+
+def test_snapshot_skipped_if_source_changed(sample_file: Path) -> None:
+    """Снимок не пишется, если файл изменился после чтения"""
+    key = source_key(str(sample_file), with_hash=False)
+    original = load_transactions(str(sample_file), use_snapshot=False)
+    os.utime(sample_file, ns=(key["mtime_ns"] + 10**9, key["mtime_ns"] + 10**9))
+
+    assert not save_snapshot(original, str(sample_file), key)
+    assert not Path(snapshot_path(str(sample_file))).exists()
+
+
+def test_snapshot_temp_files_unique(sample_file: Path) -> None:
+    """Каждая запись идет через свой временный файл"""
+    original = load_transactions(str(sample_file), use_snapshot=False)
+    with patch("src.snapshot.os.replace") as replace:
+        save_snapshot(original, str(sample_file))
+        save_snapshot(original, str(sample_file))
+    first, second = (call.args[0] for call in replace.call_args_list)
+    assert first != second
+    assert Path(first).parent == sample_file.parent
+    for tmp in (first, second):
+        os.unlink(tmp)
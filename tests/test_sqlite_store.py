@@ -0,0 +1,139 @@
+import io
+import json
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src import reports, services
+from src.cli import main
+from src.sqlite_store import SQLiteStore
+from src.store import TransactionStore
+from src.synthetic import generate_transactions, write_statement
+from src.utils import extract_phone_numbers
+
+
+@pytest.fixture
+def frame(sample_transactions: pd.DataFrame) -> pd.DataFrame:
+    """Тестовые транзакции с переводом на номер телефона"""
+    df = sample_transactions.copy()
+    df.loc[2, "Описание"] = "Перевод +7 921 111-22-33"
+    df["Номер телефона"] = extract_phone_numbers(df["Описание"])
+    return df
+
+
+@pytest.fixture
+def db(frame: pd.DataFrame) -> SQLiteStore:
+    """База в памяти с тестовыми транзакциями"""
+    store = SQLiteStore()
+    store.import_frame(frame)
+    return store
+
+
+def test_reports_match_dataframe(frame: pd.DataFrame, db: SQLiteStore) -> None:
+    """Отчеты в SQL совпадают с расчетом по DataFrame"""
+    assert reports.spending_by_category(db, "Услуги") == reports.spending_by_category(
+        frame, "Услуги"
+    )
+    assert reports.spending_by_weekday(db) == reports.spending_by_weekday(frame)
+    assert reports.spending_by_workday(db) == {
+        "weekdays": 5999.5,
+        "weekends": -2499.5,
+    }
+
+
+def test_services_match_dataframe(frame: pd.DataFrame, db: SQLiteStore) -> None:
+    """Кэшбэк и инвесткопилка в SQL совпадают с расчетом по DataFrame"""
+    pd.testing.assert_frame_equal(
+        services.cashback_top_by_month(db, 2),
+        services.cashback_top_by_month(frame, 2),
+        check_dtype=False,
+    )
+    assert services.profitable_cashback_categories(db, 2021, 12) == {
+        "Супермаркеты": 15.05
+    }
+    pd.testing.assert_frame_equal(
+        services.investment_savings(db, [10, 100], [5], "2023-01", "2023-05"),
+        services.investment_savings(frame, [10, 100], [5], "2023-01", "2023-05"),
+        check_dtype=False,
+    )
+
+
+def test_searches(frame: pd.DataFrame, db: SQLiteStore) -> None:
+    """Поиск по FTS5 и короткие запросы дают те же строки, что и движок"""
+    store = TransactionStore.from_frame(frame)
+    for query in ["оплата", "ПЕРЕВОД", "в", "нет такого"]:
+        found = services.simple_search(query, db)
+        expected = services.simple_search(query, store)
+        assert [r["Описание"] for r in found] == [r["Описание"] for r in expected]
+
+    assert [r["Сумма операции"] for r in services.person_transfers_search(db)] == [
+        10000.0
+    ]
+    assert len(services.phone_transactions_search("89211112233", db)) == 1
+    assert services.phone_number_totals(db) == {"+79211112233": 10000.0}
+    assert services.batch_search(["спорт", "магазин"], db)["спорт"][0]["Категория"] == (
+        "Фитнес"
+    )
+
+
+def test_iter_search_releases_lock(db: SQLiteStore) -> None:
+    """Между частями результата база доступна другим потокам"""
+    chunks = db.iter_search("text", ["а"], chunk_size=1)
+    first = next(chunks)
+
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (len(db), done.set()), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert done.is_set()
+
+    rest = list(chunks)
+    assert len(first) == 1 and len(rest) >= 1
+
+
+def test_filter_by_date(db: SQLiteStore) -> None:
+    """Фильтр по периоду возвращает строки по возрастанию даты"""
+    may = db.filter_by_date("2023-05-20", "M")
+    assert may["Описание"].tolist() == ["Оплата услуг", "Перевод +7 921 111-22-33"]
+    assert pd.api.types.is_datetime64_any_dtype(may["Дата операции"])
+    assert len(db.filter_by_date("2023-05-20", "ALL")) == 5
+    assert db.select(card="9876543210987654")["Сумма операции"].tolist() == [
+        -3000.0,
+        500.5,
+    ]
+
+
+def test_fingerprint_changes_on_import(frame: pd.DataFrame, db: SQLiteStore) -> None:
+    """Повторный импорт сбрасывает кэш результатов"""
+    before = reports.spending_by_weekday(db)
+    db.import_frame(frame.head(1))
+    after = reports.spending_by_weekday(db)
+    assert after[4] == before[4] - 1500.5
+    assert len(db) == 6
+
+    db.import_frame(frame, replace=True)
+    assert len(db) == 5
+    assert len(services.simple_search("магазин", db)) == 1
+
+
+def test_import_file_and_cli(tmp_path: Path) -> None:
+    """Выписка импортируется частями, команды работают с базой"""
+    df = generate_transactions(300, seed=3)
+    path = str(tmp_path / "statement.xlsx")
+    write_statement(df, path)
+    db_path = str(tmp_path / "bank.sqlite")
+
+    out = io.StringIO()
+    main(["--data", path, "--sqlite", db_path, "import", "--chunk-size", "64"], out)
+    assert json.loads(out.getvalue()) == {"rows": 300}
+
+    with SQLiteStore(db_path) as db:
+        assert reports.spending_by_workday(db) == pytest.approx(
+            reports.spending_by_workday(TransactionStore.from_frame(df))
+        )
+        out = io.StringIO()
+        main(["search", "phones", "--columns", "Номер телефона"], out, db)
+        phones = [json.loads(line)["Номер телефона"] for line in out.getvalue().splitlines()]
+        assert phones and all(p.startswith("+7") for p in phones)
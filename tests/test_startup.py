@@ -0,0 +1,64 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import src
+
+ROOT = Path(__file__).parent.parent
+# Бюджет импорта пакета с get_greeting и Config (мс, с запасом на медленные машины)
+IMPORT_BUDGET_MS = 150
+HEAVY_MODULES = ("pandas", "numpy", "dotenv", "aiohttp", "openpyxl")
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_import_is_lazy() -> None:
+    """Импорт пакета и легких имен не тянет тяжелые зависимости"""
+    code = (
+        "import sys\n"
+        "from src import Config, get_greeting\n"
+        "Config.DATA_FILE_PATH\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = _run(code)
+    assert result.stdout.strip() == ""
+
+    # Строки вида "import time: self | cumulative | module"
+    cumulative_us = sum(
+        int(line.split("|")[1])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[2].strip() == "src"
+    )
+    assert cumulative_us / 1000 < IMPORT_BUDGET_MS
+
+
+def test_lazy_exports_resolve() -> None:
+    """Имена пакета загружаются по первому обращению"""
+    from src.utils import load_transactions
+
+    assert src.load_transactions is load_transactions
+    assert "spending_by_workday" in dir(src)
+    with pytest.raises(AttributeError):
+        src.no_such_name
+
+
+def test_config_reads_environment_on_first_access() -> None:
+    """Окружение и .env читаются при первом обращении к настройке"""
+    code = (
+        "import os, sys\n"
+        "from src.config import Config\n"
+        "print('dotenv' in sys.modules)\n"
+        "os.environ['STOCK_API_URL'] = 'http://quotes.local'\n"
+        "print(Config.STOCK_API_URL, 'dotenv' in sys.modules)"
+    )
+    assert _run(code).stdout.split() == ["False", "http://quotes.local", "True"]
@@ -0,0 +1,81 @@
+import os
+import threading
+from pathlib import Path
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+
+from src.reports import spending_by_workday
+from src.services import investment_bank, simple_search
+from src.store import TransactionStore
+from src.views import events_page
+
+
+def test_store_loads_once(tmp_path: Path, sample_transactions: pd.DataFrame) -> None:
+    """Файл читается один раз при конкурентных обращениях"""
+    data_file = tmp_path / "ops.xlsx"
+    data_file.write_bytes(b"stub")
+    loader = Mock(return_value=sample_transactions)
+    store = TransactionStore(str(data_file), loader=loader)
+
+    threads = [threading.Thread(target=store.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loader.call_count == 1
+    assert store.version == 1
+
+
+def test_store_reloads_on_file_change(
+    tmp_path: Path, sample_transactions: pd.DataFrame
+) -> None:
+    """Изменение файла приводит к повторной загрузке"""
+    data_file = tmp_path / "ops.xlsx"
+    data_file.write_bytes(b"stub")
+    loader = Mock(return_value=sample_transactions)
+    store = TransactionStore(str(data_file), loader=loader)
+
+    store.get()
+    data_file.write_bytes(b"changed stub")
+    stat = data_file.stat()
+    os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    store.get()
+
+    assert loader.call_count == 2
+    assert store.version == 2
+
+
+def test_store_views_do_not_leak(sample_transactions: pd.DataFrame) -> None:
+    """Изменение выданного DataFrame не затрагивает общие данные"""
+    store = TransactionStore.from_frame(sample_transactions)
+    view = store.get()
+    view["new_col"] = 1
+    assert "new_col" not in store.get().columns
+
+
+def test_store_views_are_read_only(sample_transactions: pd.DataFrame) -> None:
+    """Запись в ячейки выданного DataFrame запрещена, замена колонки - нет"""
+    amounts = sample_transactions["Сумма операции"].tolist()
+    store = TransactionStore.from_frame(sample_transactions)
+    view = store.get()
+
+    with pytest.raises(ValueError):
+        view.iloc[0, view.columns.get_loc("Сумма операции")] = 12345.0
+    view["Сумма операции"] = 0.0
+    assert sorted(store.get()["Сумма операции"].tolist()) == sorted(amounts)
+
+    # Исходный DataFrame вызывающего кода остается изменяемым
+    sample_transactions.loc[0, "Сумма операции"] = 1.0
+
+
+def test_store_accepted_everywhere(sample_transactions: pd.DataFrame) -> None:
+    """Сервисы, отчеты и представления принимают хранилище"""
+    store = TransactionStore.from_frame(sample_transactions)
+
+    assert len(simple_search("магазин", store)) == 1
+    assert investment_bank("2023-05", store, 10) == 250.0
+    assert spending_by_workday(store)["weekdays"] == 5999.5
+    assert events_page("2023-05-15 23:59:59", store, "ALL")["income"]["count"] == 2
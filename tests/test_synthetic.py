@@ -0,0 +1,39 @@
+from typing import Any
+
+import pandas as pd
+import pytest
+
+from src.synthetic import (STATEMENT_COLUMNS, XLSX_MAX_ROWS,
+                           generate_transactions, write_statement)
+from src.utils import load_transactions
+
+
+def test_generate_transactions_is_seeded() -> None:
+    """Одинаковое зерно дает одинаковые данные"""
+    first = generate_transactions(500, seed=7)
+    pd.testing.assert_frame_equal(first, generate_transactions(500, seed=7))
+    assert not first.equals(generate_transactions(500, seed=8))
+
+    assert list(first.columns[: len(STATEMENT_COLUMNS)]) == STATEMENT_COLUMNS
+    assert first["Дата операции"].is_monotonic_decreasing
+    assert (first["Номер телефона"] != "").any()
+    assert (first["Сумма операции"] > 0).any()
+
+
+def test_write_statement_round_trip(tmp_path: Any) -> None:
+    """Записанная выписка читается load_transactions без потерь"""
+    df = generate_transactions(300, seed=1)
+    path = str(tmp_path / "statement.xlsx")
+    write_statement(df, path)
+
+    loaded = load_transactions(path, use_snapshot=False)
+    pd.testing.assert_frame_equal(
+        loaded.reset_index(drop=True), df.reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_write_statement_row_limit(tmp_path: Any) -> None:
+    """Больше строк, чем вмещает лист Excel, записать нельзя"""
+    too_big = pd.DataFrame(index=range(XLSX_MAX_ROWS + 1))
+    with pytest.raises(ValueError):
+        write_statement(too_big, str(tmp_path / "big.xlsx"))
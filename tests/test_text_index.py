@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.search import SearchEngine, text_index_for
+from src.store import TransactionStore
+from src.text_index import InvertedIndex, tokenize
+
+
+@pytest.fixture
+def descriptions() -> list:
+    """Тестовые описания"""
+    return [
+        "Пятёрочка",
+        "Перевод Ивану Иванову",
+        "Магнит у дома",
+        "Перевод в банк",
+        "Кафе",
+    ]
+
+
+def test_substring_matches_linear_search(descriptions: list) -> None:
+    """Поиск по индексу совпадает с линейным поиском"""
+    index = InvertedIndex.build(descriptions)
+    engine = SearchEngine(descriptions)
+    for query in ["перевод", "ПЯТЁ", "у дом", "ка", "банк", "нет такого"]:
+        assert list(index.substring(query)) == list(engine.contains(query))
+
+
+def test_contains_many_overlapping(descriptions: list) -> None:
+    """Пакетный поиск с перекрывающимися запросами совпадает с поштучным"""
+    queries = ["перевод", "ПЕРЕВ", "еревод и", "вод", "ка", "", "нет такого"]
+    plain = SearchEngine(descriptions)
+    expected = [list(plain.contains(query)) for query in queries]
+    index = InvertedIndex.build(descriptions)
+    for engine in [plain, SearchEngine(descriptions, index=index)]:
+        found = engine.contains_many(queries)
+        assert [list(found[query]) for query in queries] == expected
+
+
+def test_search_and_or(descriptions: list) -> None:
+    """Тест поиска по нескольким терминам"""
+    index = InvertedIndex.build(descriptions)
+    assert list(index.search(["перевод", "банк"], mode="and")) == [3]
+    assert list(index.search(["магнит", "кафе"], mode="or")) == [2, 4]
+    assert list(index.search(["пятерочка"], whole_words=True)) == [0]
+    assert "пятерочка" in tokenize("Пятёрочка!")
+    with pytest.raises(ValueError):
+        index.search(["кафе"], mode="xor")
+
+
+def test_extend_and_persist(tmp_path: Path, descriptions: list) -> None:
+    """Тест дозаписи и сохранения индекса"""
+    index = InvertedIndex.build(descriptions[:3])
+    index.extend(descriptions[3:])
+    assert list(index.substring("перевод")) == [1, 3]
+
+    path = str(tmp_path / "ops.index.npz")
+    index.save(path, {"rows": 5})
+    loaded = InvertedIndex.load(path, {"rows": 5})
+    assert loaded is not None
+    assert list(loaded.substring("перевод")) == [1, 3]
+    assert InvertedIndex.load(path, {"rows": 6}) is None
+
+
+def test_store_index(sample_transactions: pd.DataFrame) -> None:
+    """Хранилище строит индекс и использует его в поиске"""
+    store = TransactionStore.from_frame(sample_transactions)
+    index = text_index_for(store)
+    assert index is text_index_for(store)
+    positions = index.substring("абонемент")
+    assert list(store.get().iloc[positions]["Категория"]) == ["Фитнес"]
+
+
+def test_repeated_descriptions(descriptions: list) -> None:
+    """Одинаковые описания индексируются один раз, движок делит с индексом текст"""
+    repeated = descriptions * 3 + ["КАФЕ"]
+    index = InvertedIndex.build(repeated)
+    assert len(index) == 16
+    assert list(index.substring("кафе")) == [4, 9, 14, 15]
+    assert list(index.word("магнит")) == [2, 7, 12]
+    assert list(index.substring("а")) == list(SearchEngine(repeated).contains("а"))
+
+    engine = SearchEngine(repeated, index=index)
+    assert engine._lower is index.lower
+    assert list(engine.contains("у дом")) == [2, 7, 12]
+
+    index.extend(["магнит", "Кафе у дома"])
+    assert list(index.substring("кафе")) == [4, 9, 14, 15, 17]
+    assert list(index.word("магнит")) == [2, 7, 12, 16]
@@ -0,0 +1,82 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cli import main
+from src.store import TransactionStore
+from src.trends import spending_trends
+
+
+@pytest.fixture
+def frame() -> pd.DataFrame:
+    """Редкие расходы двух категорий с пропусками в календаре"""
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.to_datetime(
+                [
+                    "2023-01-01 10:00:00",
+                    "2023-01-05 12:00:00",
+                    "2023-01-05 18:00:00",
+                    "2023-02-20 09:00:00",
+                    "2023-03-01 09:00:00",
+                    "2023-03-02 09:00:00",
+                ]
+            ),
+            "Сумма операции": [-100.0, -50.0, -30.0, -200.0, 1000.0, -10.0],
+            "Категория": ["Еда", "Еда", "Такси", "Еда", "Зарплата", "Такси"],
+            "Номер карты": ["*1", "*2", "*1", "*1", "*1", "*2"],
+        }
+    )
+
+
+def test_trends_on_sparse_calendar(frame: pd.DataFrame) -> None:
+    """Окна считаются по календарным дням, доходы не учитываются"""
+    trends = spending_trends(frame)
+    assert trends.keys == ["Еда", "Такси"]
+    assert len(trends.days) == 61
+    assert str(trends.days[0]) == "2023-01-01"
+
+    food = trends.keys.index("Еда")
+    rolling = trends.rolling_many([7, 30])
+    assert rolling[7][food, 4] == 150.0
+    assert rolling[7][food, 11] == 0.0
+    assert rolling[30][food, 30] == 50.0
+    assert trends.cumulative()[food, -1] == 350.0
+
+    months, deltas = trends.month_over_month()
+    assert [str(m) for m in months] == ["2023-01", "2023-02", "2023-03"]
+    np.testing.assert_array_equal(deltas[food], [np.nan, 50.0, -200.0])
+
+    with pytest.raises(ValueError):
+        trends.rolling(0)
+
+
+def test_trends_match_pandas_rolling(frame: pd.DataFrame) -> None:
+    """Совпадают с rolling по дням, заполненным нулями"""
+    store = TransactionStore.from_frame(frame)
+    trends = spending_trends(store, "card", start="2023-01-03")
+    dates = frame["Дата операции"]
+    expenses = frame[(frame["Сумма операции"] < 0) & (dates >= "2023-01-03")]
+    for row, card in enumerate(trends.keys):
+        part = expenses[expenses["Номер карты"] == card]
+        daily = -part.groupby(part["Дата операции"].dt.normalize())[
+            "Сумма операции"
+        ].sum()
+        daily = daily.reindex(pd.date_range("2023-01-03", "2023-03-02"), fill_value=0)
+        expected = daily.rolling(30, min_periods=1).sum().to_numpy()
+        np.testing.assert_allclose(trends.rolling(30)[row], expected)
+
+
+def test_trends_cli(frame: pd.DataFrame) -> None:
+    """Команда trends выводит выровненные ряды"""
+    out = io.StringIO()
+    store = TransactionStore.from_frame(frame)
+    main(["trends", "--by", "total", "--windows", "7"], out, store)
+    data = json.loads(out.getvalue())
+    assert data["keys"] == ["total"]
+    assert len(data["rolling"]["7"][0]) == len(data["days"])
+    assert data["month_over_month"][0][0] is None
+    assert spending_trends(pd.DataFrame(columns=frame.columns)).keys == []
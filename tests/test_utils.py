@@ -1,11 +1,19 @@
+import json
 from datetime import datetime
 from pathlib import Path
+from unittest.mock import Mock
 
 import pandas as pd
 import pytest
 
-from src.utils import (filter_transactions_by_date, get_currency_rates,
-                       get_greeting, get_stock_prices, load_transactions)
+from src import utils
+from src.utils import (compact_transactions, extract_phone_numbers,
+                       filter_transactions_by_date,
+                       filter_transactions_by_range, get_currency_rates,
+                       get_greeting, get_stock_prices, index_by_date,
+                       is_date_indexed, iter_transaction_chunks,
+                       load_transactions, load_user_settings, memory_report,
+                       normalize_phone, period_bounds)
 
 
 @pytest.fixture
@@ -32,6 +40,26 @@ def test_load_transactions(sample_data: Path) -> None:
     result = load_transactions(str(sample_data))
     assert not result.empty
     assert "Дата операции" in result.columns
+    assert "Номер телефона" in result.columns
+
+    compact = load_transactions(
+        str(sample_data), compact=True, columns=["Дата операции", "Категория"]
+    )
+    assert list(compact.columns) == ["Дата операции", "Категория"]
+
+
+def test_iter_transaction_chunks(sample_data: Path) -> None:
+    """Тест потокового чтения по частям"""
+    chunks = list(iter_transaction_chunks(str(sample_data), chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    assert pd.api.types.is_datetime64_any_dtype(chunks[0]["Дата операции"])
+
+    full = load_transactions(str(sample_data), use_snapshot=False)
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert list(streamed["Описание"]) == list(full["Описание"])
+
+    with pytest.raises(ValueError):
+        next(iter_transaction_chunks(str(sample_data), chunk_size=0))
 
 
 def test_filter_transactions(sample_data: Path) -> None:
@@ -41,6 +69,68 @@ def test_filter_transactions(sample_data: Path) -> None:
     assert len(filtered) == 2
 
 
+def test_filter_transactions_ranges(sample_transactions: pd.DataFrame) -> None:
+    """Тест диапазонов D/W/Y/ALL и произвольного интервала"""
+    original = sample_transactions.copy()
+
+    day = filter_transactions_by_date(sample_transactions, "2023-05-15", "D")
+    assert len(day) == 2
+    week = filter_transactions_by_date(
+        sample_transactions, datetime(2023, 5, 17), "W"
+    )
+    assert len(week) == 2
+    year = filter_transactions_by_date(sample_transactions, "2023-06-01", "Y")
+    assert list(year["Дата операции"]) == sorted(year["Дата операции"])
+    assert len(year) == 4
+    everything = filter_transactions_by_date(sample_transactions, "2023-05-15", "ALL")
+    assert len(everything) == 5
+
+    # Исходный DataFrame не изменяется
+    pd.testing.assert_frame_equal(sample_transactions, original)
+
+    indexed = index_by_date(sample_transactions)
+    assert is_date_indexed(indexed)
+    assert len(filter_transactions_by_range(indexed, "2023-01-01", "2023-05-15")) == 2
+    assert period_bounds("2023-12-31", "M") == (
+        pd.Timestamp("2023-12-01"),
+        pd.Timestamp("2024-01-01"),
+    )
+
+    with pytest.raises(ValueError):
+        filter_transactions_by_date(sample_transactions, "2023-05-15", "Q")
+
+
+def test_phone_numbers() -> None:
+    """Тест нормализации номеров телефонов"""
+    assert normalize_phone("+7 (921) 111-22-33") == "+79211112233"
+    assert normalize_phone("8 921 111 22 33") == "+79211112233"
+    assert normalize_phone("без номера") == ""
+
+    phones = extract_phone_numbers(pd.Series(["МТС 89211112233", "Кафе"]))
+    assert list(phones) == ["+79211112233", ""]
+
+
+def test_compact_transactions(sample_transactions: pd.DataFrame) -> None:
+    """Тест компактного представления и отчета о памяти"""
+    doubled = pd.concat([sample_transactions] * 20, ignore_index=True)
+    compact = compact_transactions(doubled)
+
+    assert isinstance(compact["Категория"].dtype, pd.CategoricalDtype)
+    assert compact["Бонусы (включая кэшбэк)"].dtype == "float32"
+    assert compact["Сумма операции"].dtype == "float64"
+    assert compact["Описание"].iloc[0] is compact["Описание"].iloc[5]
+    assert list(compact["Описание"]) == list(doubled["Описание"])
+    assert compact["Номер карты"].isna().sum() == 20
+
+    before, after = memory_report(doubled), memory_report(compact)
+    assert after["Категория"] < before["Категория"]
+    assert after["total"] < before["total"]
+    assert before["total"] == sum(v for k, v in before.items() if k != "total")
+
+    projected = compact_transactions(doubled, columns=["Дата операции", "Нет такой"])
+    assert list(projected.columns) == ["Дата операции"]
+
+
 def test_greeting() -> None:
     """Тест приветствия"""
     assert get_greeting(datetime(2023, 1, 1, 6, 0)) == "Доброе утро"
@@ -61,3 +151,25 @@ def test_stock_prices() -> None:
     prices = get_stock_prices(["AAPL", "GOOG"])
     assert len(prices) == 2
     assert prices[0]["stock"] == "AAPL"
+
+
+def test_user_settings_cached_by_mtime(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Настройки перечитываются только после изменения файла"""
+    path = tmp_path / "user_settings.json"
+    path.write_text(json.dumps({"user_currencies": ["USD"]}), encoding="utf-8")
+    read = Mock(wraps=utils._read_user_settings)
+    monkeypatch.setattr(utils, "_read_user_settings", read)
+
+    first = load_user_settings(str(path))
+    first["user_currencies"].append("CNY")
+    assert load_user_settings(str(path)) == {
+        "user_currencies": ["USD"],
+        "user_stocks": ["AAPL", "GOOG"],
+    }
+    assert read.call_count == 1
+
+    path.write_text(json.dumps({"user_currencies": ["EUR", "TRY"]}), encoding="utf-8")
+    assert load_user_settings(str(path))["user_currencies"] == ["EUR", "TRY"]
+    assert read.call_count == 2
@@ -3,6 +3,7 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
+from src.store import TransactionStore
 from src.views import events_page, home_page
 
 
@@ -24,7 +25,7 @@ def sample_transactions() -> pd.DataFrame:
 def test_home_page_success(sample_transactions: pd.DataFrame) -> None:
     """Тест успешного выполнения home_page"""
     with patch("src.views.load_transactions", return_value=sample_transactions):
-        result = home_page("2023-05-15 12:00:00")
+        result = home_page("2023-05-16 12:00:00")
         assert "greeting" in result
         assert len(result["top_transactions"]) == 2
 
@@ -49,3 +50,18 @@ def test_events_page_empty_data() -> None:
     with patch("src.views.load_transactions", return_value=pd.DataFrame()):
         result = events_page("2023-05-15 12:00:00")
         assert result["expenses"]["total_amount"] == 0
+
+
+def test_events_page_period(sample_transactions: pd.DataFrame) -> None:
+    """Итоги считаются от начала периода до date_time включительно"""
+    store = TransactionStore.from_frame(sample_transactions)
+    day = events_page("2023-05-16 10:59:59", store, "W")
+    assert day["income"]["count"] == 0
+    assert day["expenses"] == {"total_amount": -1000.0, "count": 1}
+    assert day["period"] == {
+        "start": "2023-05-15 00:00:00",
+        "end": "2023-05-16 10:59:59",
+    }
+    assert events_page("2023-05-16 11:00:00", store)["income"]["count"] == 1
+    assert events_page("2023-06-01 00:00:00", store)["expenses"]["count"] == 0
+    assert events_page("2023-06-01 00:00:00", store, "Y")["expenses"]["count"] == 1